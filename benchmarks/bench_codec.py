@@ -0,0 +1,89 @@
+"""
+Benchmark JSON codecs on gradebook sized payloads.
+
+Encodes a ``multi_grade`` array of 100,000 grades and decodes a roster
+of 5,000 students with grade history, the bodies that dominate CPU time
+in large uploads and downloads, with every codec installed.
+
+.. code-block:: sh
+
+    pip install orjson  # optional, to compare
+    python benchmarks/bench_codec.py
+"""
+import time
+
+from pylmod.codec import JSONCodec, OrjsonCodec
+
+GRADES = 100000
+STUDENTS = 5000
+HISTORY = 20
+REPEAT = 5
+
+
+def grade_array():
+    """Build a multi_grade body"""
+    return [
+        {
+            'studentId': number % STUDENTS,
+            'assignmentId': number // STUDENTS,
+            'numericGradeValue': float(number % 100),
+            'mode': 2,
+            'isGradeApproved': False,
+        }
+        for number in range(GRADES)
+    ]
+
+
+def roster():
+    """Build a get_students response with grade history"""
+    return {'status': 1, 'message': '', 'data': [
+        {
+            'studentId': number,
+            'accountEmail': 'student{0}@mit.edu'.format(number),
+            'displayName': 'Student {0}'.format(number),
+            'section': 'Section {0}'.format(number % 10),
+            'sectionId': number % 10,
+            'gradeHistory': [
+                {'assignmentId': item, 'numericGradeValue': 1.5 * item,
+                 'updatedTime': 1383541200000 + item,
+                 'comment': 'from MITx'}
+                for item in range(HISTORY)
+            ],
+        }
+        for number in range(STUDENTS)
+    ]}
+
+
+def best(func, *args):
+    """Best time of REPEAT runs, seconds"""
+    times = []
+    for _ in range(REPEAT):
+        tstart = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - tstart)
+    return min(times)
+
+
+def main():
+    """Print encode and decode times for each codec installed."""
+    codecs = [JSONCodec()]
+    try:
+        codecs.append(OrjsonCodec())
+    except ImportError:
+        print('orjson is not installed, only timing the json module')
+    grades = grade_array()
+    students = JSONCodec.dumps(roster())
+    print('encode {0} grades, decode {1} students ({2:.1f} MB)'.format(
+        GRADES, STUDENTS, len(students) / 1e6
+    ))
+    print('{0:<8} {1:>12} {2:>12}'.format('codec', 'encode ms', 'decode ms'))
+    for codec in codecs:
+        print('{0:<8} {1:>12.1f} {2:>12.1f}'.format(
+            codec.name,
+            best(codec.dumps, grades) * 1000,
+            best(codec.loads, students) * 1000,
+        ))
+
+
+if __name__ == '__main__':
+    main()
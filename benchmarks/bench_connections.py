@@ -0,0 +1,135 @@
+"""
+Benchmark connection reuse of a client shared by many threads.
+
+Makes 1,000 calls through one client from a pool of threads against a
+local stand-in for LMod and counts the connections the server accepts.
+Against LMod every new connection is a full TLS handshake with the
+client certificate, so the count is the number of handshakes per 1,000
+calls. Calls are spread over gradebook and membership service paths and
+made in bursts of one call per thread, the way a job fanning out over a
+roster does: connections beyond the pool size are discarded at the end
+of every burst and opened again in the next one.
+
+The baseline row uses the adapter of earlier releases, a default
+``HTTPAdapter`` mounted on the ``urlbase`` only.
+
+.. code-block:: sh
+
+    python benchmarks/bench_connections.py
+"""
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from pylmod.base import Base
+
+CALLS = 1000
+THREADS = 32
+#: Simulated service time of LMod, seconds
+LATENCY = 0.01
+#: Service paths the calls are spread over
+SERVICES = (
+    'service/gradebook/students/1',
+    'service/gradebook/assignments/1',
+    'service/membership/group/1/member',
+    'service/membership/courseguide/course/1/staff',
+)
+
+# requests checks the certificate exists even for plain HTTP
+CERT = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)),
+    '..', 'pylmod', 'tests', 'data', 'certs', 'test_cert.pem'
+)
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Answer every GET with an empty student list on a kept-alive
+    connection, counting connections."""
+    protocol_version = 'HTTP/1.1'
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        with Handler.lock:
+            Handler.connections += 1
+        BaseHTTPRequestHandler.setup(self)
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Send an empty student list"""
+        time.sleep(LATENCY)
+        body = json.dumps({'data': []}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+def use_baseline_adapter(base):
+    """Mount the adapter of earlier releases on ``base``.
+
+    It is a default ``HTTPAdapter`` retrying in urllib3, mounted on the
+    ``urlbase`` only, in a session of its own.
+    """
+    # pylint: disable=protected-access
+    base._session = requests.Session()
+    base._session.cert = base.cert
+    base._session.mount(base.urlbase, HTTPAdapter(max_retries=Base.RETRIES))
+
+
+def run(urlbase, baseline=False, **kwargs):
+    """Make CALLS calls from THREADS threads, return connections made."""
+    Handler.connections = 0
+    base = Base(CERT, urlbase, **kwargs)
+    if baseline:
+        use_baseline_adapter(base)
+    tstart = time.time()
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        for burst in range(0, CALLS, THREADS):
+            list(executor.map(
+                lambda call: base.get(SERVICES[call % len(SERVICES)]),
+                range(burst, min(burst + THREADS, CALLS))
+            ))
+    return Handler.connections, time.time() - tstart
+
+
+def main():
+    """Print connections per 1,000 calls for pool configurations."""
+    logging.disable(logging.CRITICAL)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    urlbase = 'http://127.0.0.1:{0}/'.format(server.server_address[1])
+
+    configurations = [
+        ('baseline HTTPAdapter on urlbase', dict(baseline=True)),
+        ('default pool (10, non-blocking)', {}),
+        ('pool_maxsize={0}'.format(THREADS), dict(pool_maxsize=THREADS)),
+        ('pool_maxsize=16, pool_block',
+         dict(pool_maxsize=16, pool_block=True)),
+        ('keep_alive=False', dict(keep_alive=False)),
+    ]
+    print('{0} calls from {1} threads'.format(CALLS, THREADS))
+    print('{0:<36} {1:>12} {2:>9}'.format(
+        'configuration', 'connections', 'seconds'
+    ))
+    for name, kwargs in configurations:
+        connections, duration = run(urlbase, **kwargs)
+        print('{0:<36} {1:>12} {2:>9.2f}'.format(name, connections, duration))
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark the memory held by compact records against dictionaries.
+
+Measures, with ``tracemalloc``, the memory taken by a ``multi_grade``
+array of 200,000 grades, a roster of 20,000 students and 500
+assignments, as LMod dictionaries and as the records of
+``pylmod.records``, and the time taken to encode the grades.
+
+.. code-block:: sh
+
+    python benchmarks/bench_records.py
+"""
+import time
+import tracemalloc
+
+from pylmod.codec import JSONCodec, OrjsonCodec
+from pylmod.records import Assignment, GradeColumns, Student
+
+GRADES = 200000
+STUDENTS = 20000
+ASSIGNMENTS = 500
+
+
+def grade_dicts():
+    """Build a multi_grade array as spreadsheet uploads used to"""
+    return [
+        {
+            'studentId': number % STUDENTS,
+            'assignmentId': number // STUDENTS,
+            'numericGradeValue': float(number % 100) / 10,
+            'mode': 2,
+            'isGradeApproved': False,
+        }
+        for number in range(GRADES)
+    ]
+
+
+def grade_columns():
+    """Build the same grades as columns"""
+    grades = GradeColumns()
+    for number in range(GRADES):
+        grades.append(
+            number % STUDENTS, number // STUDENTS,
+            float(number % 100) / 10, 2, False
+        )
+    return grades
+
+
+def student_dicts():
+    """Build a get_students response body"""
+    return [
+        {
+            'accountEmail': 'student{0}@mit.edu'.format(number),
+            'displayName': 'Student {0}'.format(number),
+            'editable': False,
+            'email': 'student{0}@mit.edu'.format(number),
+            'givenName': 'Student',
+            'middleName': None,
+            'nickName': 'Student',
+            'overallGradeInformation': None,
+            'photoUrl': None,
+            'section': 'Section {0}'.format(number % 10),
+            'sectionId': number % 10,
+            'sortableName': '{0}, Student'.format(number),
+            'studentAssignmentInfo': None,
+            'studentId': number,
+            'surname': str(number),
+        }
+        for number in range(STUDENTS)
+    ]
+
+
+def assignment_dicts():
+    """Build a get_assignments response body"""
+    return [
+        {
+            'assignmentId': number, 'categoryId': 1, 'description': '',
+            'dueDate': 1383541200000, 'dueDateString': '11-04-2013',
+            'gradebookId': 1, 'graderVisible': True,
+            'gradingSchemeId': number, 'gradingSchemeType': 'NUMERIC',
+            'isComposite': False, 'isHomework': False,
+            'maxPointsTotal': 10.0, 'name': 'Homework {0}'.format(number),
+            'shortName': 'HW{0}'.format(number), 'userDeleted': False,
+            'weight': 1.0,
+        }
+        for number in range(ASSIGNMENTS)
+    ]
+
+
+def measure(func, *args):
+    """Memory held by what ``func`` returns, bytes, and the result"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = func(*args)
+        return tracemalloc.get_traced_memory()[0] - before, result
+    finally:
+        tracemalloc.stop()
+
+
+def report(name, count, dict_bytes, record_bytes):
+    """Print one row of the comparison"""
+    print('{0:<12} {1:>8} {2:>10.1f} {3:>10.1f} {4:>8.1f}x'.format(
+        name, count, dict_bytes / 1e6, record_bytes / 1e6,
+        float(dict_bytes) / record_bytes
+    ))
+
+
+def main():
+    """Print the memory of each representation and encoding times."""
+    print('{0:<12} {1:>8} {2:>10} {3:>10} {4:>9}'.format(
+        'data', 'count', 'dict MB', 'record MB', 'saving'
+    ))
+    dict_bytes, grades = measure(grade_dicts)
+    column_bytes, columns = measure(grade_columns)
+    report('grades', GRADES, dict_bytes, column_bytes)
+
+    students = student_dicts()
+    dict_bytes, _ = measure(student_dicts)
+    record_bytes, _ = measure(
+        lambda: [Student.from_dict(x) for x in students]
+    )
+    report('students', STUDENTS, dict_bytes, record_bytes)
+
+    assignments = assignment_dicts()
+    dict_bytes, _ = measure(assignment_dicts)
+    record_bytes, _ = measure(
+        lambda: [Assignment.from_dict(x) for x in assignments]
+    )
+    report('assignments', ASSIGNMENTS, dict_bytes, record_bytes)
+
+    codecs = [JSONCodec()]
+    try:
+        codecs.append(OrjsonCodec())
+    except ImportError:
+        pass
+    for codec in codecs:
+        tstart = time.perf_counter()
+        codec.dumps(grades)
+        print('encode {0} grade dicts with {1}: {2:.1f} ms'.format(
+            GRADES, codec.name, (time.perf_counter() - tstart) * 1000
+        ))
+    tstart = time.perf_counter()
+    columns.encode()
+    print('encode {0} grade columns: {1:.1f} ms'.format(
+        GRADES, (time.perf_counter() - tstart) * 1000
+    ))
+
+
+if __name__ == '__main__':
+    main()
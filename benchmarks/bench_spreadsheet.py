@@ -0,0 +1,84 @@
+"""
+Benchmark preparing a spreadsheet upload against a large roster.
+
+Runs ``GradeBook._spreadsheet2gradebook_multi`` with the network calls
+stubbed out, so the reported time is the cost of matching CSV rows to
+students and assignments. The time per row should stay flat as the
+number of rows and students grows.
+
+.. code-block:: sh
+
+    python benchmarks/bench_spreadsheet.py
+"""
+import logging
+import time
+
+from pylmod import GradeBook
+
+ASSIGNMENTS = 5
+
+
+class OfflineGradeBook(GradeBook):
+    """GradeBook serving a generated roster instead of calling LMod."""
+
+    def __init__(self, students):
+        super(OfflineGradeBook, self).__init__('cert.pem', 'https://bench/')
+        self.gradebook_id = 1
+        self._students = [
+            {
+                'accountEmail': 'student{0}@mit.edu'.format(number),
+                'studentId': number,
+            }
+            for number in range(students)
+        ]
+        self._assignments = [
+            {'assignmentId': number, 'name': 'HW {0}'.format(number),
+             'shortName': 'HW{0}'.format(number)}
+            for number in range(ASSIGNMENTS)
+        ]
+
+    def get_students(self, *args, **kwargs):
+        return self._students
+
+    def get_assignments(self, *args, **kwargs):
+        return self._assignments
+
+    def multi_grade(self, grade_array, gradebook_id=''):
+        return {'status': 1, 'message': '', 'data': len(grade_array)}
+
+
+def make_rows(count):
+    """Build spreadsheet rows for the first ``count`` students."""
+    rows = []
+    for number in range(count):
+        row = {'External email': 'Student{0}@MIT.EDU'.format(number)}
+        for assignment in range(ASSIGNMENTS):
+            row['HW {0}'.format(assignment)] = '0.5'
+        rows.append(row)
+    return rows
+
+
+def run(count):
+    """Time upload preparation for ``count`` rows and students."""
+    gradebook = OfflineGradeBook(count)
+    rows = make_rows(count)
+    tstart = time.time()
+    gradebook._spreadsheet2gradebook_multi(  # pylint: disable=W0212
+        rows, 'External email', ['External email']
+    )
+    return time.time() - tstart
+
+
+def main():
+    """Print preparation time per row for growing uploads."""
+    logging.disable(logging.CRITICAL)
+    print('{0:>8} {1:>10} {2:>12}'.format('rows', 'seconds', 'us/row'))
+    for count in (500, 1000, 2000, 3000, 6000):
+        duration = run(count)
+        print('{0:>8} {1:>10.3f} {2:>12.1f}'.format(
+            count, duration, duration / count * 1e6
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,10 @@
+"""
+Asyncio implementation of the PyLmod clients.
+
+Requires the optional ``httpx`` dependency, i.e.
+``pip install pylmod[async]``.
+"""
+from pylmod.aio.gradebook import AsyncGradeBook
+from pylmod.aio.membership import AsyncMembership
+
+__all__ = ['AsyncGradeBook', 'AsyncMembership']
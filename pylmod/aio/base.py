@@ -0,0 +1,288 @@
+"""
+    Asyncio transport for accessing MIT Learning Modules Web service.
+"""
+import asyncio
+import logging
+import ssl
+
+import httpx
+
+from pylmod.base import Base
+from pylmod.codec import get_default_codec
+
+
+log = logging.getLogger(__name__)  # pylint: disable=C0103
+
+
+class AsyncBase(object):
+    """
+    AsyncBase provides the asyncio transport for accessing LMod.
+
+    It is the asyncio counterpart of :py:class:`pylmod.base.Base`,
+    authenticating with the same client certificate, and shouldn't be
+    instantiated directly as it is inherited by the classes that
+    implement the API. Requests are made through one ``httpx``
+    connection pool, and at most ``max_concurrency`` of them are in
+    flight at once no matter how many coroutines call into the client.
+
+    The client should be closed when done with, either with
+    :py:meth:`aclose` or by using it as an async context manager:
+
+    .. code-block:: python
+
+        async with AsyncGradeBook(cert, gbuuid=gbuuid) as gradebook:
+            students = await gradebook.get_students()
+
+    Attributes:
+        cert (unicode): File path to the certificate used to
+            authenticate access to LMod Web service
+        urlbase (str): The URL of the LMod Web service. i.e.
+            ``learning-modules.mit.edu`` or ``learning-modules-test.mit.edu``
+        max_concurrency (int): Maximum number of requests in flight
+        codec (pylmod.codec.JSONCodec): encodes request and decodes
+            response bodies
+        single_flight (pylmod.singleflight.AsyncSingleFlight): coalesces
+            concurrent identical GET requests, or ``None``
+    """
+    #: Seconds to wait for a connection to LMod to be established
+    CONNECT_TIMEOUT = Base.CONNECT_TIMEOUT
+
+    #: Seconds to wait for LMod to send data once connected
+    READ_TIMEOUT = Base.READ_TIMEOUT
+
+    #: Read timeout, kept for compatibility, see ``READ_TIMEOUT``
+    TIMEOUT = READ_TIMEOUT
+
+    #: Number of connection retries
+    RETRIES = Base.RETRIES
+
+    #: Default maximum number of requests in flight
+    MAX_CONCURRENCY = 20
+
+    def __init__(
+            self,
+            cert,
+            urlbase='https://learning-modules.mit.edu:8443/',
+            max_concurrency=MAX_CONCURRENCY,
+            transport=None,
+            codec=None,
+            single_flight=None
+    ):
+        """Initialize AsyncBase instance.
+
+        Args:
+            cert (unicode): File path to the certificate used to
+                authenticate access to LMod Web service
+            urlbase (str): The URL of the LMod Web service. i.e.
+                ``learning-modules.mit.edu`` or
+                ``learning-modules-test.mit.edu``
+            max_concurrency (int): Maximum number of requests in flight,
+                which is also the size of the connection pool
+            transport (httpx.AsyncBaseTransport): transport to use
+                instead of the default certificate authenticated one,
+                i.e. ``httpx.MockTransport`` in tests
+            codec (pylmod.codec.JSONCodec): JSON codec for bodies,
+                default is the fastest one installed
+            single_flight (pylmod.singleflight.AsyncSingleFlight): make
+                identical GET requests made concurrently share one call
+                to LMod, default is to make every request
+        """
+        if max_concurrency < 1:
+            raise ValueError('max_concurrency must be at least 1')
+        self.cert = cert
+        self.urlbase = urlbase
+        if not urlbase.endswith('/'):
+            self.urlbase += '/'
+        self.max_concurrency = max_concurrency
+        self._transport = transport
+        if codec is None:
+            codec = get_default_codec()
+        self.codec = codec
+        self.single_flight = single_flight
+        # Created on first use so they bind to the running event loop
+        self._client = None
+        self._semaphore = None
+
+        log.debug("------------------------------------------------------")
+        log.info("[PyLmod] init async urlbase=%s", urlbase)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        """Close the connection pool."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _ssl_context(self):
+        """Build the SSL context presenting the client certificate.
+
+        Returns:
+            ssl.SSLContext: context verifying the site certificate and
+            presenting ``cert``
+        """
+        context = ssl.create_default_context()
+        context.load_cert_chain(self.cert)
+        return context
+
+    def _get_client(self):
+        """Get the ``httpx`` client, creating it on first use.
+
+        Returns:
+            httpx.AsyncClient: client shared by all requests
+        """
+        if self._client is None:
+            transport = self._transport
+            if transport is None:
+                transport = httpx.AsyncHTTPTransport(
+                    verify=self._ssl_context(),
+                    retries=self.RETRIES,
+                    limits=httpx.Limits(
+                        max_connections=self.max_concurrency,
+                        max_keepalive_connections=self.max_concurrency,
+                    ),
+                )
+            self._client = httpx.AsyncClient(
+                transport=transport,
+                timeout=httpx.Timeout(
+                    self.READ_TIMEOUT, connect=self.CONNECT_TIMEOUT
+                ),
+            )
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    @staticmethod
+    def _data_to_json(data):
+        """Convert to json if it isn't already a string.
+
+        Args:
+            data (str): data to convert to json
+        """
+        return Base._data_to_json(data)  # pylint: disable=protected-access
+
+    def _encode(self, data):
+        """Encode a body with ``codec`` if it isn't already encoded.
+
+        Args:
+            data (object): JSON string or bytes, or object to encode
+
+        Returns:
+            bytes: the encoded body
+        """
+        if isinstance(data, str):
+            return data.encode('utf-8')
+        if isinstance(data, bytes):
+            return data
+        return self.codec.dumps(data)
+
+    def _url_format(self, service):
+        """Generate URL from urlbase and service.
+
+        Args:
+            service (str): The endpoint service to use, i.e. gradebook
+        Returns:
+            str: URL to where the request should be made
+        """
+        return '{base}{service}'.format(base=self.urlbase, service=service)
+
+    async def rest_action(self, method, url, **kwargs):
+        """Routine to do low-level REST operation.
+
+        Args:
+            method (str): HTTP method, i.e. ``GET``
+            url (str): service URL endpoint
+            kwargs (dict): addition parameters for ``httpx``
+
+        Raises:
+            httpx.HTTPError: Exception connection error
+            ValueError: Unable to decode response content
+
+        Returns:
+            list: the json-encoded content of the response
+        """
+        client = self._get_client()
+        async with self._semaphore:
+            try:
+                response = await client.request(method, url, **kwargs)
+            except httpx.HTTPError as err:
+                log.exception(
+                    "[PyLmod] Error - connection error in "
+                    "rest_action, err=%s", err
+                )
+                raise err
+        try:
+            return self.codec.loads(response.content)
+        except ValueError as err:
+            log.exception('Unable to decode %s', response.content)
+            raise err
+
+    async def get(self, service, params=None):
+        """Generic GET operation for retrieving data from Learning Modules API.
+
+        Args:
+            service (str): The endpoint service to use, i.e. gradebook
+            params (dict): additional parameters to add to the call
+
+        Raises:
+            httpx.HTTPError: Exception connection error
+            ValueError: Unable to decode response content
+
+        Returns:
+            list: the json-encoded content of the response
+        """
+        url = self._url_format(service)
+        # httpx replaces any query string in the URL with params, even
+        # when they are empty, so only pass params we actually have.
+        flight = self.single_flight
+        if flight is None:
+            return await self.rest_action('GET', url, params=params or None)
+        return await flight.do(
+            flight.make_key(url, params),
+            lambda: self.rest_action('GET', url, params=params or None)
+        )
+
+    async def post(self, service, data):
+        """Generic POST operation for sending data to Learning Modules API.
+
+        Data should be a JSON string or a dict.  If it is not a string,
+        it is turned into a JSON string for the POST body.
+
+        Args:
+            service (str): The endpoint service to use, i.e. gradebook
+            data (json or dict): the data payload
+
+        Raises:
+            httpx.HTTPError: Exception connection error
+            ValueError: Unable to decode response content
+
+        Returns:
+            list: the json-encoded content of the response
+        """
+        url = self._url_format(service)
+        data = self._encode(data)
+        # Add content-type for body in POST.
+        headers = {'content-type': 'application/json'}
+        return await self.rest_action(
+            'POST', url, content=data, headers=headers
+        )
+
+    async def delete(self, service):
+        """Generic DELETE operation for Learning Modules API.
+
+        Args:
+            service (str): The endpoint service to use, i.e. gradebook
+
+        Raises:
+            httpx.HTTPError: Exception connection error
+            ValueError: Unable to decode response content
+
+        Returns:
+            list: the json-encoded content of the response
+        """
+        url = self._url_format(service)
+        return await self.rest_action('DELETE', url)
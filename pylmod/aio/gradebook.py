@@ -0,0 +1,295 @@
+"""
+Contains AsyncGradeBook class
+"""
+import asyncio
+import json
+import logging
+import time
+
+from pylmod.aio.base import AsyncBase
+from pylmod.catalog import StudentIndex
+from pylmod.exceptions import PyLmodNoSuchSection
+from pylmod.gradebook import GradeBook
+from pylmod.records import GradeColumns
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+
+class AsyncGradeBook(AsyncBase):
+    """
+    Asyncio counterpart of :py:class:`pylmod.gradebook.GradeBook`.
+
+    Every API method is a coroutine taking the same arguments and
+    returning the same data as the method of the same name on
+    ``GradeBook``. As a constructor can't make a request, the gradebook
+    id for ``gbuuid`` is resolved by the first call that needs it, and
+    calls made meanwhile wait for that lookup instead of repeating it.
+
+    .. code-block:: python
+
+        async with AsyncGradeBook(cert, gbuuid=gbuuid) as gradebook:
+            students, assignments = await asyncio.gather(
+                gradebook.get_students(),
+                gradebook.get_assignments(),
+            )
+
+    API reference at
+    https://learning-modules-dev.mit.edu/service/gradebook/doc.html
+    """
+
+    def __init__(
+            self,
+            cert,
+            urlbase='https://learning-modules.mit.edu:8443/',
+            gbuuid=None,
+            **kwargs
+    ):
+        super(AsyncGradeBook, self).__init__(cert, urlbase, **kwargs)
+        # Add service base
+        self.urlbase += 'service/gradebook/'
+        self.gbuuid = gbuuid
+        self.gradebook_id = None
+        # Created on first use so it binds to the running event loop
+        self._gradebook_id_lock = None
+
+    async def _gradebook_id(self, gradebook_id=''):
+        """Return ``gradebook_id`` or the id of this client's gradebook.
+
+        Args:
+            gradebook_id (str): unique identifier for gradebook, i.e. ``2314``
+
+        Returns:
+            str: value of gradebook id
+        """
+        if gradebook_id:
+            return gradebook_id
+        if self.gradebook_id is None and self.gbuuid is not None:
+            if self._gradebook_id_lock is None:
+                self._gradebook_id_lock = asyncio.Lock()
+            async with self._gradebook_id_lock:
+                if self.gradebook_id is None:
+                    self.gradebook_id = await self.get_gradebook_id(
+                        self.gbuuid
+                    )
+        return self.gradebook_id
+
+    async def get_gradebook_id(self, gbuuid):
+        """See :py:meth:`pylmod.gradebook.GradeBook.get_gradebook_id`."""
+        gradebook = await self.get('gradebook', params={'uuid': gbuuid})
+        # pylint: disable=protected-access
+        return GradeBook._gradebook_id_from_response(gradebook)
+
+    async def get_options(self, gradebook_id=''):
+        """See :py:meth:`pylmod.gradebook.GradeBook.get_options`."""
+        end_point = 'gradebook/options/{gradebookId}'.format(
+            gradebookId=await self._gradebook_id(gradebook_id))
+        options = await self.get(end_point)
+        return options['data']
+
+    async def get_assignments(
+            self,
+            gradebook_id='',
+            simple=False,
+            max_points=True,
+            avg_stats=False,
+            grading_stats=False
+    ):
+        """See :py:meth:`pylmod.gradebook.GradeBook.get_assignments`."""
+        # pylint: disable=too-many-arguments
+        params = dict(
+            includeMaxPoints=json.dumps(max_points),
+            includeAvgStats=json.dumps(avg_stats),
+            includeGradingStats=json.dumps(grading_stats)
+        )
+        assignments = await self.get(
+            'assignments/{gradebookId}'.format(
+                gradebookId=await self._gradebook_id(gradebook_id)
+            ),
+            params=params,
+        )
+        if simple:
+            return [{'AssignmentName': x['name']}
+                    for x in assignments['data']]
+        return assignments['data']
+
+    async def get_assignment_by_name(self, assignment_name, assignments=None):
+        """See :py:meth:`pylmod.gradebook.GradeBook.get_assignment_by_name`.
+        """
+        if assignments is None:
+            assignments = await self.get_assignments()
+        if hasattr(assignments, 'by_name'):
+            return assignments.by_name(assignment_name)
+        for assignment in assignments:
+            if assignment['name'] == assignment_name:
+                return assignment['assignmentId'], assignment
+        return None, None
+
+    async def create_assignment(  # pylint: disable=too-many-arguments
+            self,
+            name,
+            short_name,
+            weight,
+            max_points,
+            due_date_str,
+            gradebook_id='',
+            **kwargs
+    ):
+        """See :py:meth:`pylmod.gradebook.GradeBook.create_assignment`."""
+        data = {
+            'name': name,
+            'shortName': short_name,
+            'weight': weight,
+            'graderVisible': False,
+            'gradingSchemeType': 'NUMERIC',
+            'gradebookId': await self._gradebook_id(gradebook_id),
+            'maxPointsTotal': max_points,
+            'dueDateString': due_date_str
+        }
+        data.update(kwargs)
+        log.info("Creating assignment %s", name)
+        response = await self.post('assignment', data)
+        log.debug('Received response data: %s', response)
+        return response
+
+    async def delete_assignment(self, assignment_id):
+        """See :py:meth:`pylmod.gradebook.GradeBook.delete_assignment`."""
+        return await self.delete(
+            'assignment/{assignmentId}'.format(assignmentId=assignment_id),
+        )
+
+    async def set_grade(
+            self,
+            assignment_id,
+            student_id,
+            grade_value,
+            gradebook_id='',
+            **kwargs
+    ):
+        """See :py:meth:`pylmod.gradebook.GradeBook.set_grade`."""
+        # pylint: disable=too-many-arguments
+        grade_info = {
+            'studentId': student_id,
+            'assignmentId': assignment_id,
+            'mode': 2,
+            'comment': 'from MITx {0}'.format(time.ctime(time.time())),
+            'numericGradeValue': str(grade_value),
+            'isGradeApproved': False
+        }
+        grade_info.update(kwargs)
+        log.info(
+            "student %s set_grade=%s for assignment %s",
+            student_id,
+            grade_value,
+            assignment_id)
+        return await self.post(
+            'grades/{gradebookId}'.format(
+                gradebookId=await self._gradebook_id(gradebook_id)
+            ),
+            data=grade_info,
+        )
+
+    async def multi_grade(self, grade_array, gradebook_id=''):
+        """See :py:meth:`pylmod.gradebook.GradeBook.multi_grade`."""
+        log.info('Sending grades: %r', grade_array)
+        data = grade_array
+        if isinstance(grade_array, GradeColumns):
+            data = grade_array.encode()
+        return await self.post(
+            'multiGrades/{gradebookId}'.format(
+                gradebookId=await self._gradebook_id(gradebook_id)
+            ),
+            data=data,
+        )
+
+    async def get_sections(self, gradebook_id='', simple=False):
+        """See :py:meth:`pylmod.gradebook.GradeBook.get_sections`."""
+        params = dict(includeMembers='false')
+
+        section_data = await self.get(
+            'sections/{gradebookId}'.format(
+                gradebookId=await self._gradebook_id(gradebook_id)
+            ),
+            params=params
+        )
+
+        if simple:
+            sections = GradeBook.unravel_sections(section_data['data'])
+            return [{'SectionName': x['name']} for x in sections]
+        return section_data['data']
+
+    async def get_section_by_name(self, section_name):
+        """See :py:meth:`pylmod.gradebook.GradeBook.get_section_by_name`."""
+        sections = GradeBook.unravel_sections(await self.get_sections())
+        for section in sections:
+            if section['name'] == section_name:
+                return section['groupId'], section
+        return None, None
+
+    async def get_students(
+            self,
+            gradebook_id='',
+            simple=False,
+            section_name='',
+            include_photo=False,
+            include_grade_info=False,
+            include_grade_history=False,
+            include_makeup_grades=False
+    ):
+        """See :py:meth:`pylmod.gradebook.GradeBook.get_students`."""
+        # pylint: disable=too-many-arguments
+        params = dict(
+            includePhoto=json.dumps(include_photo),
+            includeGradeInfo=json.dumps(include_grade_info),
+            includeGradeHistory=json.dumps(include_grade_history),
+            includeMakeupGrades=json.dumps(include_makeup_grades),
+        )
+
+        url = 'students/{gradebookId}'
+        if section_name:
+            group_id, _ = await self.get_section_by_name(section_name)
+            if group_id is None:
+                failure_message = (
+                    'in get_students -- Error: '
+                    'No such section %s' % section_name
+                )
+                log.critical(failure_message)
+                raise PyLmodNoSuchSection(failure_message)
+            url += '/section/{0}'.format(group_id)
+
+        student_data = await self.get(
+            url.format(
+                gradebookId=await self._gradebook_id(gradebook_id)
+            ),
+            params=params,
+        )
+
+        if simple:
+            # pylint: disable=protected-access
+            return GradeBook._simplify_students(student_data['data'])
+        return student_data['data']
+
+    async def get_student_index(self, gradebook_id='', students=None):
+        """See :py:meth:`pylmod.gradebook.GradeBook.get_student_index`."""
+        if students is None:
+            students = await self.get_students(gradebook_id=gradebook_id)
+        if isinstance(students, StudentIndex):
+            return students
+        return StudentIndex(students)
+
+    async def get_student_by_email(self, email, students=None):
+        """See :py:meth:`pylmod.gradebook.GradeBook.get_student_by_email`."""
+        index = await self.get_student_index(students=students)
+        return index.get_by_email(email)
+
+    async def get_staff(self, gradebook_id='', simple=False):
+        """See :py:meth:`pylmod.gradebook.GradeBook.get_staff`."""
+        staff_data = await self.get(
+            'staff/{gradebookId}'.format(
+                gradebookId=await self._gradebook_id(gradebook_id)
+            ),
+            params=None,
+        )
+        if simple:
+            # pylint: disable=protected-access
+            return GradeBook._simplify_staff(staff_data)
+        return staff_data['data']
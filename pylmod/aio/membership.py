@@ -0,0 +1,104 @@
+"""
+Contains AsyncMembership class
+"""
+import asyncio
+import logging
+
+from pylmod.aio.base import AsyncBase
+from pylmod.membership import Membership
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+
+class AsyncMembership(AsyncBase):
+    """
+    Asyncio counterpart of :py:class:`pylmod.membership.Membership`.
+
+    Every API method is a coroutine taking the same arguments and
+    returning the same data as the method of the same name on
+    ``Membership``. As a constructor can't make a request, the course
+    id for ``uuid`` is resolved by the first call that needs it, and
+    calls made meanwhile wait for that lookup instead of repeating it.
+
+    API reference at
+    https://learning-modules-dev.mit.edu/service/membership/doc.html
+    """
+    # The response parsing is shared with the synchronous client
+    # pylint: disable=protected-access
+
+    def __init__(
+            self,
+            cert,
+            urlbase='https://learning-modules.mit.edu:8443/',
+            uuid=None,
+            **kwargs
+    ):
+        super(AsyncMembership, self).__init__(cert, urlbase, **kwargs)
+        # Add service base
+        self.urlbase += 'service/membership/'
+        self.course_id = None
+        self.uuid = uuid
+        # Created on first use so it binds to the running event loop
+        self._course_id_lock = None
+
+    async def _course_id(self, course_id=''):
+        """Return ``course_id`` or the id of this client's course.
+
+        Args:
+            course_id (int): unique identifier for course, i.e. ``2314``
+
+        Returns:
+            int: numeric course id
+        """
+        if course_id:
+            return course_id
+        if self.course_id is None and self.uuid is not None:
+            if self._course_id_lock is None:
+                self._course_id_lock = asyncio.Lock()
+            async with self._course_id_lock:
+                if self.course_id is None:
+                    self.course_id = await self.get_course_id(self.uuid)
+        return self.course_id
+
+    async def get_group(self, uuid=None):
+        """See :py:meth:`pylmod.membership.Membership.get_group`."""
+        if uuid is None:
+            uuid = self.uuid
+        return await self.get('group', params={'uuid': uuid})
+
+    async def get_group_id(self, uuid=None):
+        """See :py:meth:`pylmod.membership.Membership.get_group_id`."""
+        group_data = await self.get_group(uuid)
+        return Membership._group_id_from_response(group_data)
+
+    async def get_membership(self, uuid=None):
+        """See :py:meth:`pylmod.membership.Membership.get_membership`."""
+        group_id = await self.get_group_id(uuid=uuid)
+        uri = 'group/{group_id}/member'
+        return await self.get(uri.format(group_id=group_id), params=None)
+
+    async def email_has_role(self, email, role_name, uuid=None):
+        """See :py:meth:`pylmod.membership.Membership.email_has_role`."""
+        mbr_data = await self.get_membership(uuid=uuid)
+        return Membership._membership_has_role(mbr_data, email, role_name)
+
+    async def get_course_id(self, course_uuid):
+        """See :py:meth:`pylmod.membership.Membership.get_course_id`."""
+        course_data = await self.get(
+            'courseguide/course?uuid={uuid}'.format(
+                uuid=course_uuid or self.course_id
+            ),
+            params=None
+        )
+        return Membership._course_id_from_response(course_data)
+
+    async def get_course_guide_staff(self, course_id=''):
+        """See :py:meth:`pylmod.membership.Membership.get_course_guide_staff`.
+        """
+        staff_data = await self.get(
+            'courseguide/course/{courseId}/staff'.format(
+                courseId=await self._course_id(course_id)
+            ),
+            params=None
+        )
+        return staff_data['response']['docs']
@@ -2,14 +2,120 @@
     Python class representing interface to MIT Learning Modules Web service.
 """
 
+import copy
+import gzip
 import json
 import logging
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
 import requests
 from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+from pylmod import timing
+from pylmod.cache import MISSING
+from pylmod.codec import get_default_codec
+from pylmod.exceptions import PyLmodDeadlineExceeded
+from pylmod.retry import RetryPolicy
+from pylmod.stream import iter_json_array
 
 
 log = logging.getLogger(__name__)  # pylint: disable=C0103
 
+# Details of the request being made by each thread, for request hooks
+_context = threading.local()
+
+#: Events that callbacks can be registered for with
+#: :py:meth:`Base.register_hook`:
+#:
+#: - ``before_request`` - a request is about to be made, with its
+#:   ``method``, ``url``, ``endpoint`` template (i.e. ``students/{id}``),
+#:   the ``gradebook_id`` it is made to, if any, and its ``cache`` use:
+#:   ``'miss'`` when made after a ``response_cache`` miss,
+#:   ``'revalidate'`` when conditional, else ``None``
+#: - ``retry`` - a request failed and is about to be retried, after
+#:   sleeping ``sleep`` seconds
+#: - ``request`` - a request got its final response or failed, with the
+#:   details of ``before_request``, the ``status`` (``None`` on failure)
+#:   and ``error``, the ``duration`` and ``retries`` it took, the body
+#:   bytes on the wire (``bytes_sent``, ``bytes_received``) and before
+#:   compression or after decompression (``bytes_sent_raw``,
+#:   ``bytes_received_raw``), and the ``timings`` of the last attempt
+#:   by phase, see :py:data:`pylmod.timing.PHASES`
+#: - ``cache`` - ``response_cache`` was looked up for a read, with the
+#:   ``url``, ``endpoint`` template, ``gradebook_id`` and whether it
+#:   was a ``hit``
+#: - ``throttle`` - a request waited ``sleep`` seconds for the
+#:   ``rate_limiter`` before being sent
+#: - ``circuit`` - the ``circuit_breaker`` changed from the ``previous``
+#:   to the new ``state`` after ``failures`` consecutive failures
+HOOKS = (
+    'before_request', 'retry', 'request', 'throttle', 'circuit', 'cache'
+)
+
+#: Default number of concurrent requests of bulk operations
+DEFAULT_MAX_WORKERS = 4
+
+#: TCP keep-alive probing of idle pooled connections, seconds, applied
+#: where the platform supports the option
+TCP_KEEPALIVE_OPTIONS = (
+    ('TCP_KEEPIDLE', 60),
+    ('TCP_KEEPINTVL', 15),
+    ('TCP_KEEPCNT', 4),
+)
+
+
+class PoolAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that can turn on TCP keep-alive for its connections.
+
+    Connections to LMod are expensive to set up as every one of them
+    negotiates TLS with the client certificate, so pooled connections
+    are probed while idle to keep firewalls and load balancers from
+    silently dropping them.
+    """
+    __attrs__ = HTTPAdapter.__attrs__ + ['keep_alive']
+
+    def __init__(self, keep_alive=True, **kwargs):
+        """Initialize PoolAdapter instance.
+
+        Args:
+            keep_alive (bool): enable TCP keep-alive on connections
+            kwargs (dict): arguments for ``requests.adapters.HTTPAdapter``
+        """
+        # Set before HTTPAdapter.__init__ which builds the pool manager
+        self.keep_alive = keep_alive
+        super(PoolAdapter, self).__init__(**kwargs)
+
+    @staticmethod
+    def keep_alive_socket_options():
+        """Get the socket options enabling TCP keep-alive.
+
+        Returns:
+            list: ``(level, option, value)`` tuples for ``setsockopt``
+        """
+        options = list(HTTPConnection.default_socket_options)
+        options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+        for name, value in TCP_KEEPALIVE_OPTIONS:
+            if hasattr(socket, name):
+                options.append((socket.IPPROTO_TCP, getattr(socket, name),
+                                value))
+        return options
+
+    def init_poolmanager(self, *args, **kwargs):
+        # pylint: disable=arguments-differ
+        if self.keep_alive:
+            kwargs['socket_options'] = self.keep_alive_socket_options()
+        super(PoolAdapter, self).init_poolmanager(*args, **kwargs)
+        # Time the phases of the connections made, for request hooks
+        self.poolmanager.pool_classes_by_scheme = dict(
+            timing.POOL_CLASSES_BY_SCHEME
+        )
+
 
 class Base(object):
     """
@@ -20,25 +126,90 @@ class Base(object):
     instantiated directly as it is inherited by the classes that
     implement the API.
 
+    Instances can be shared between threads: requests don't modify the
+    instance, and the state kept between requests (hooks, and the caches
+    of subclasses) is guarded by a lock. The one connection pool is then
+    shared by all threads, so ``pool_maxsize`` should be at least the
+    number of threads. Subclasses hold a default gradebook or course;
+    to work on a different one per thread without changing that default,
+    pass it to each call or use a bound copy such as
+    :py:meth:`pylmod.gradebook.GradeBook.for_gradebook`.
+
     Attributes:
         cert (unicode): File path to the certificate used to
             authenticate access to LMod Web service
         urlbase (str): The URL of the LMod Web service. i.e.
             ``learning-modules.mit.edu`` or ``learning-modules-test.mit.edu``
+        retry_policy (pylmod.retry.RetryPolicy): when and how long to
+            wait before retrying failed requests
+        hooks (dict): lists of callbacks by event name, see ``HOOKS``
+        response_cache (pylmod.cache.ResponseCache): cache of read-only
+            responses, or ``None`` to always fetch
+        conditional_cache (pylmod.cache.ConditionalCache): validators of
+            GET responses for conditional requests, or ``None``
+        codec (pylmod.codec.JSONCodec): encodes request and decodes
+            response bodies
+        compress (bool): gzip request bodies of at least
+            ``COMPRESS_MIN_SIZE`` bytes
+        single_flight (pylmod.singleflight.SingleFlight): coalesces
+            concurrent identical GET requests, or ``None``
+        rate_limiter (pylmod.ratelimit.RateLimiter): paces requests, or
+            ``None``
+        circuit_breaker (pylmod.circuit.CircuitBreaker): stops requests
+            to a failing host, or ``None``
+        timeout (tuple): ``(connect, read)`` timeouts of requests
+        timeouts (dict): timeouts by endpoint or HTTP method
     """
-    #: connection timeout, seconds
-    TIMEOUT = 200
+    #: Seconds to wait for a connection to LMod to be established
+    CONNECT_TIMEOUT = 10
 
-    #: Number of connection retries
+    #: Seconds to wait for LMod to send data once connected
+    READ_TIMEOUT = 200
+
+    #: Read timeout, kept for compatibility, see ``READ_TIMEOUT``
+    TIMEOUT = READ_TIMEOUT
+
+    #: Number of retries of the default retry policy
     RETRIES = 10
 
+    #: Default number of hosts to keep connection pools for
+    POOL_CONNECTIONS = 10
+
+    #: Default number of connections kept open per host
+    POOL_MAXSIZE = 10
+
+    #: Bytes read at a time from streamed responses
+    STREAM_CHUNK_SIZE = 65536
+
+    #: Smallest request body compressed when ``compress`` is set, bytes
+    COMPRESS_MIN_SIZE = 1024
+
     verbose = True
     gradebookid = None
 
+    #: ``time.monotonic()`` by which operations of this instance must
+    #: complete, see :py:meth:`with_deadline`
+    deadline = None
+
     def __init__(
             self,
             cert,
             urlbase='https://learning-modules.mit.edu:8443/',
+            retry_policy=None,
+            pool_connections=POOL_CONNECTIONS,
+            pool_maxsize=POOL_MAXSIZE,
+            pool_block=False,
+            keep_alive=True,
+            response_cache=None,
+            conditional_cache=None,
+            codec=None,
+            compress=False,
+            single_flight=None,
+            rate_limiter=None,
+            circuit_breaker=None,
+            timeout=None,
+            timeouts=None,
+            id_cache=None
     ):
         """Initialize Base instance.
 
@@ -48,7 +219,56 @@ class Base(object):
             urlbase (str): The URL of the LMod Web service. i.e.
                 ``learning-modules.mit.edu`` or
                 ``learning-modules-test.mit.edu``
+            retry_policy (pylmod.retry.RetryPolicy): when and how long
+                to wait before retrying failed requests, default is
+                exponential backoff for up to ``RETRIES`` retries
+            pool_connections (int): number of hosts to keep connection
+                pools for
+            pool_maxsize (int): number of connections kept open to
+                LMod, which should be at least the number of threads
+                sharing this instance
+            pool_block (bool): make threads wait for a pooled connection
+                when all ``pool_maxsize`` are in use, instead of opening
+                (and then discarding) extra connections
+            keep_alive (bool): reuse connections between requests and
+                probe idle ones with TCP keep-alive. If ``False``, every
+                request is made on a new connection.
+            response_cache (pylmod.cache.ResponseCache): cache read-only
+                responses, default is to always fetch
+            conditional_cache (pylmod.cache.ConditionalCache): make GET
+                requests conditional on the validators of the last
+                response, default is to always download the content
+            codec (pylmod.codec.JSONCodec): JSON codec for bodies,
+                default is the fastest one installed, see
+                :py:func:`pylmod.codec.get_default_codec`
+            compress (bool): send request bodies compressed with
+                ``Content-Encoding: gzip``. ``multi_grade`` arrays
+                typically shrink 10-20 times, but the service must
+                accept compressed bodies.
+            single_flight (pylmod.singleflight.SingleFlight): make
+                identical GET requests made concurrently, i.e. by
+                several threads, share one call to LMod, default is to
+                make every request
+            rate_limiter (pylmod.ratelimit.RateLimiter): pace requests,
+                and retries, with token buckets, which may be shared
+                with other clients. Default is not to limit requests.
+            circuit_breaker (pylmod.circuit.CircuitBreaker): fail fast
+                with ``PyLmodCircuitOpen`` while LMod keeps failing,
+                default is to always make requests
+            timeout (tuple): ``(connect, read)`` timeouts of requests,
+                seconds, or one number for both. Default is
+                ``(CONNECT_TIMEOUT, READ_TIMEOUT)``.
+            timeouts (dict): timeouts by endpoint or HTTP method,
+                overriding ``timeout``, i.e. ``{'GET': (5, 30),
+                'multiGrades': (5, 600)}``. An endpoint takes
+                precedence over a method.
+            id_cache (pylmod.cache.IdCache): keep the ids that uuids
+                resolve to on disk, so that a restarted process doesn't
+                resolve them again, default is to only keep them in
+                memory
          """
+        # These are all transport settings
+        # pylint: disable=too-many-arguments
         # pem with private and public key application certificate for access
         self.cert = cert
 
@@ -57,14 +277,216 @@ class Base(object):
             self.urlbase += '/'
         self._session = requests.Session()
         self._session.cert = cert
-        self._session.timeout = self.TIMEOUT  # connection timeout
         self._session.verify = True  # verify site certificate
-        # Mount the retry adapter to the base url
-        self._session.mount(urlbase, HTTPAdapter(max_retries=self.RETRIES))
+        # Mount the adapter on the whole host so that every service
+        # path shares one connection pool. Retries are made by
+        # rest_action according to the retry policy.
+        self._session.mount(self._host_prefix(self.urlbase), PoolAdapter(
+            keep_alive=keep_alive,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            max_retries=0,
+        ))
+        if not keep_alive:
+            self._session.headers['Connection'] = 'close'
+        # Responses are decompressed by requests
+        self._session.headers['Accept-Encoding'] = 'gzip, deflate'
+        self.compress = compress
+        if retry_policy is None:
+            retry_policy = RetryPolicy(total=self.RETRIES)
+        self.retry_policy = retry_policy
+        self.hooks = dict((event, []) for event in HOOKS)
+        self.response_cache = response_cache
+        self.conditional_cache = conditional_cache
+        if codec is None:
+            codec = get_default_codec()
+        self.codec = codec
+        self.single_flight = single_flight
+        # Memoized ids of uuids, by (kind, uuid), see _resolve_id
+        self._resolved_ids = {}
+        self.id_cache = id_cache
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker = circuit_breaker
+        if timeout is None:
+            timeout = (self.CONNECT_TIMEOUT, self.READ_TIMEOUT)
+        self.timeout = timeout
+        self.timeouts = dict(timeouts or {})
+        # Guards state shared between threads and with bound copies
+        self._lock = threading.RLock()
 
         log.debug("------------------------------------------------------")
         log.info("[PyLmod] init urlbase=%s", urlbase)
 
+    def _clone(self, **attributes):
+        """Make a copy sharing the session and state of this instance.
+
+        The copy uses the same connection pool, retry policy, hooks and
+        lock, so it is cheap to make one per thread or per call.
+
+        Args:
+            attributes (dict): attributes to set on the copy
+
+        Returns:
+            Base: the copy
+        """
+        clone = copy.copy(self)
+        for name, value in attributes.items():
+            setattr(clone, name, value)
+        return clone
+
+    def _resolve_id(self, kind, uuid, resolver):
+        """Get the id of a uuid, resolving it only the first time.
+
+        Resolved ids are shared with bound copies of this instance, and
+        kept in ``id_cache``, if any, for other processes.
+
+        Args:
+            kind (str): kind of id, i.e. ``gradebook`` or ``group``
+            uuid (str): uuid to resolve
+            resolver (callable): gets the id of a uuid from LMod
+
+        Raises:
+            PyLmodUnexpectedData: No id was returned
+            requests.RequestException: Exception connection error
+
+        Returns:
+            object: the id
+        """
+        key = (kind, uuid)
+        with self._lock:
+            if key in self._resolved_ids:
+                return self._resolved_ids[key]
+        resolved = MISSING
+        if self.id_cache is not None:
+            resolved = self.id_cache.get(self.urlbase, kind, uuid)
+        if resolved is MISSING:
+            # Not resolved under the lock so that lookups can run in
+            # parallel
+            resolved = resolver(uuid)
+            if self.id_cache is not None:
+                self.id_cache.set(self.urlbase, kind, uuid, resolved)
+        with self._lock:
+            self._resolved_ids[key] = resolved
+        return resolved
+
+    def invalidate_ids(self, kind=None, uuid=None):
+        """Forget resolved ids, so that they are resolved again.
+
+        Ids are dropped from memory, for this instance and its bound
+        copies, and from ``id_cache``, if any.
+
+        Args:
+            kind (str): only forget ids of this kind, i.e. ``gradebook``
+            uuid (str): only forget the id of this uuid
+        """
+        with self._lock:
+            for key in list(self._resolved_ids):
+                if kind in (None, key[0]) and uuid in (None, key[1]):
+                    del self._resolved_ids[key]
+        if self.id_cache is not None:
+            self.id_cache.invalidate(self.urlbase, kind, uuid)
+
+    def _prefetch_ids(self, kind, uuids, resolver, max_workers):
+        """Resolve many uuids concurrently, see :py:meth:`_resolve_id`.
+
+        Args:
+            kind (str): kind of id, i.e. ``gradebook`` or ``group``
+            uuids (iterable): uuids to resolve
+            resolver (callable): gets the id of a uuid from LMod
+            max_workers (int): maximum number of concurrent requests
+
+        Raises:
+            ValueError: ``max_workers`` is less than 1
+            PyLmodUnexpectedData: No id was returned for a uuid
+            requests.RequestException: Exception connection error
+
+        Returns:
+            dict: ids by uuid
+        """
+        if max_workers < 1:
+            raise ValueError('max_workers must be at least 1')
+        uuids = list(uuids)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            resolved = list(executor.map(
+                lambda uuid: self._resolve_id(kind, uuid, resolver), uuids
+            ))
+        return dict(zip(uuids, resolved))
+
+    def with_deadline(self, seconds):
+        """Get a copy whose requests must complete within ``seconds``.
+
+        The deadline is shared by every request made through the copy,
+        including the retries and the several requests of operations
+        such as :py:meth:`pylmod.gradebook.GradeBook.spreadsheet2gradebook`,
+        so that the whole operation has a bounded latency. Each request
+        waits at most the time left, and once it has run out requests
+        raise ``PyLmodDeadlineExceeded``. As ``requests`` applies the
+        read timeout to each read from the connection rather than to the
+        whole response, a slowly trickling response may overrun it.
+
+        .. code-block:: python
+
+            gradebook.with_deadline(60).get_students()
+
+        Args:
+            seconds (float): time allowed from now. A copy of a copy
+                with an earlier deadline keeps the earlier one.
+
+        Returns:
+            Base: the copy
+        """
+        deadline = time.monotonic() + seconds
+        if self.deadline is not None:
+            deadline = min(deadline, self.deadline)
+        return self._clone(deadline=deadline)
+
+    def _timeout(self, method, url):
+        """Get the timeouts of a request.
+
+        Args:
+            method (str): HTTP method of the request, i.e. ``GET``
+            url (str): service URL endpoint
+
+        Raises:
+            PyLmodDeadlineExceeded: ``deadline`` has passed
+
+        Returns:
+            tuple: ``(connect, read)`` timeouts, seconds
+        """
+        timeout = self.timeouts.get(
+            self._endpoint(url), self.timeouts.get(method, self.timeout)
+        )
+        if not isinstance(timeout, (tuple, list)):
+            timeout = (timeout, timeout)
+        if self.deadline is None:
+            return tuple(timeout)
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            raise PyLmodDeadlineExceeded(
+                'Deadline passed {0:.2f}s before {1} {2}'.format(
+                    -remaining, method, url
+                )
+            )
+        return tuple(
+            remaining if value is None else min(value, remaining)
+            for value in timeout
+        )
+
+    @staticmethod
+    def _host_prefix(url):
+        """Get the scheme and host part of a URL.
+
+        Args:
+            url (str): URL, i.e. ``https://learning-modules.mit.edu:8443/``
+
+        Returns:
+            str: the URL up to the path, i.e.
+            ``https://learning-modules.mit.edu:8443/``
+        """
+        parts = urlsplit(url)
+        return '{0}://{1}/'.format(parts.scheme, parts.netloc)
+
     @staticmethod
     def _data_to_json(data):
         """Convert to json if it isn't already a string.
@@ -76,6 +498,21 @@ class Base(object):
             data = json.dumps(data)
         return data
 
+    def _encode(self, data):
+        """Encode a body with ``codec`` if it isn't already encoded.
+
+        Args:
+            data (object): JSON string or bytes, or object to encode
+
+        Returns:
+            bytes: the encoded body
+        """
+        if isinstance(data, str):
+            return data.encode('utf-8')
+        if isinstance(data, bytes):
+            return data
+        return self.codec.dumps(data)
+
     def _url_format(self, service):
         """Generate URL from urlbase and service.
 
@@ -90,9 +527,110 @@ class Base(object):
         )
         return base_service_url
 
+    def register_hook(self, event, hook):
+        """Register a callback for an event.
+
+        The callback is called with a dictionary describing the event,
+        which always includes the ``event`` name. Exceptions raised by
+        callbacks are logged and otherwise ignored.
+
+        .. code-block:: python
+
+            def on_retry(info):
+                stats['retries'] += 1
+                stats['sleep'] += info['sleep']
+
+            gbk.register_hook('retry', on_retry)
+
+        Args:
+            event (str): name of the event, one of ``HOOKS``
+            hook (callable): callback taking the event dictionary
+
+        Raises:
+            ValueError: Unknown event
+        """
+        if event not in self.hooks:
+            raise ValueError(
+                'Unsupported event {0}, must be one of {1}'.format(
+                    event, HOOKS
+                )
+            )
+        with self._lock:
+            self.hooks[event].append(hook)
+
+    def deregister_hook(self, event, hook):
+        """Remove a callback registered with ``register_hook``.
+
+        Args:
+            event (str): name of the event
+            hook (callable): callback to remove
+
+        Returns:
+            bool: True if the callback was registered
+        """
+        try:
+            with self._lock:
+                self.hooks[event].remove(hook)
+        except (KeyError, ValueError):
+            return False
+        return True
+
+    def _dispatch_hook(self, event, **info):
+        """Call the callbacks registered for an event.
+
+        Args:
+            event (str): name of the event
+            info (dict): details of the event
+        """
+        info['event'] = event
+        for hook in tuple(self.hooks[event]):
+            try:
+                hook(info)
+            except Exception:  # pylint: disable=broad-except
+                log.exception('[PyLmod] Error in %s hook %r', event, hook)
+
+    def _wait_to_retry(self, method, url, retries, tstart, reason,
+                       response=None):
+        """Sleep before a retry if the retry policy allows another one.
+
+        Args:
+            method (str): HTTP method of the request, i.e. ``GET``
+            url (str): service URL endpoint
+            retries (int): number of the upcoming retry, starting at ``1``
+            tstart (float): time the request was first tried
+            reason (object): the error or status code being retried
+            response (requests.Response): response being retried, if any
+
+        Returns:
+            bool: True if the request should be retried
+        """
+        # pylint: disable=too-many-arguments
+        sleep = self.retry_policy.get_sleep(retries, response)
+        elapsed = time.time() - tstart
+        if not self.retry_policy.allows(retries, elapsed, sleep):
+            return False
+        if (
+                self.deadline is not None and
+                time.monotonic() + sleep >= self.deadline
+        ):
+            return False
+        log.warning(
+            '[PyLmod] Retry %d of %s %s in %.2f seconds, reason=%s',
+            retries, method, url, sleep, reason
+        )
+        self._dispatch_hook(
+            'retry', method=method, url=url, attempt=retries,
+            sleep=sleep, elapsed=elapsed, reason=reason
+        )
+        self.retry_policy.sleep(sleep)
+        return True
+
     def rest_action(self, func, url, **kwargs):
         """Routine to do low-level REST operation, with retry.
 
+        Failed requests are retried as decided by ``retry_policy``,
+        unless ``circuit_breaker`` is open.
+
         Args:
             func (callable): API function to call
             url (str): service URL endpoint
@@ -101,20 +639,327 @@ class Base(object):
         Raises:
             requests.RequestException: Exception connection error
             ValueError: Unable to decode response content
+            pylmod.exceptions.PyLmodCircuitOpen: ``circuit_breaker``
+                is open
+            pylmod.exceptions.PyLmodDeadlineExceeded: ``deadline`` has
+                passed
 
         Returns:
             list: the json-encoded content of the response
         """
+        return self._decode(self._request(func, url, **kwargs))
+
+    def _request(self, func, url, raw_size=None, **kwargs):
+        """Make a request, retrying as decided by ``retry_policy``.
+
+        The ``before_request`` hook is dispatched before the request is
+        first tried, and the ``request`` hook once it has a final
+        response or has failed.
+
+        Args:
+            func (callable): API function to call
+            url (str): service URL endpoint
+            raw_size (int): size of the body before compression, if
+                it is compressed
+            kwargs (dict): addition parameters
+
+        Raises:
+            requests.RequestException: Exception connection error
+            pylmod.exceptions.PyLmodCircuitOpen: ``circuit_breaker``
+                is open
+            pylmod.exceptions.PyLmodDeadlineExceeded: ``deadline`` has
+                passed
+
+        Returns:
+            requests.Response: the last response received
+        """
+        method = getattr(func, '__name__', '').upper()
+        info = self._describe_request(method, url, kwargs.get('headers'))
+        self._dispatch_hook('before_request', **info)
+        tstart = time.time()
+        attempts = {'retries': 0, 'timings': None, 'tstart': None}
         try:
-            response = func(url, timeout=self.TIMEOUT, **kwargs)
-        except requests.RequestException as err:
-            log.exception(
-                "[PyLmod] Error - connection error in "
-                "rest_action, err=%s", err
+            response = self._send(func, url, method, tstart, attempts,
+                                  **kwargs)
+        except Exception as err:
+            self._report_request(
+                info, None, time.time() - tstart, attempts,
+                kwargs.get('data'), raw_size, False, err
             )
-            raise err
+            raise
+        self._report_request(
+            info, response, time.time() - tstart, attempts,
+            kwargs.get('data'), raw_size, kwargs.get('stream', False)
+        )
+        return response
+
+    def _send(self, func, url, method, tstart, attempts, **kwargs):
+        """Try a request until it succeeds or may not be retried.
+
+        Args:
+            func (callable): API function to call
+            url (str): service URL endpoint
+            method (str): HTTP method of the request, i.e. ``GET``
+            tstart (float): time the request was first tried
+            attempts (dict): updated with the number of ``retries``
+                made, and the ``timings`` and start time (``tstart``)
+                of the last attempt
+            kwargs (dict): addition parameters
+
+        Raises:
+            requests.RequestException: Exception connection error
+            pylmod.exceptions.PyLmodCircuitOpen: ``circuit_breaker``
+                is open
+            pylmod.exceptions.PyLmodDeadlineExceeded: ``deadline`` has
+                passed
+
+        Returns:
+            requests.Response: the last response received
+        """
+        # pylint: disable=too-many-arguments
+        retries = 0
+        while True:
+            self._throttle(method, url)
+            timeout = self._timeout(method, url)
+            attempts['tstart'] = time.perf_counter()
+            try:
+                with timing.collect() as attempts['timings']:
+                    response = self._attempt(func, url, timeout=timeout,
+                                             **kwargs)
+            except requests.RequestException as err:
+                if (
+                        self.retry_policy.should_retry_error(method, err) and
+                        self._wait_to_retry(
+                            method, url, retries + 1, tstart, err
+                        )
+                ):
+                    retries += 1
+                    attempts['retries'] = retries
+                    continue
+                log.exception(
+                    "[PyLmod] Error - connection error in "
+                    "rest_action, err=%s", err
+                )
+                if retries and isinstance(err, requests.ConnectionError):
+                    raise requests.ConnectionError(
+                        'Max retries exceeded with url: {0} ({1} retries, '
+                        'caused by {2!r})'.format(url, retries, err),
+                        request=err.request
+                    ) from err
+                raise err
+            if (
+                    self.retry_policy.should_retry_status(
+                        method, response.status_code
+                    ) and
+                    self._wait_to_retry(
+                        method, url, retries + 1, tstart,
+                        response.status_code, response
+                    )
+            ):
+                retries += 1
+                attempts['retries'] = retries
+                continue
+            return response
+
+    def _attempt(self, func, url, **kwargs):
+        """Make one attempt at a request, through ``circuit_breaker``.
+
+        Args:
+            func (callable): API function to call
+            url (str): service URL endpoint
+            kwargs (dict): addition parameters
+
+        Raises:
+            requests.RequestException: Exception connection error
+            pylmod.exceptions.PyLmodCircuitOpen: ``circuit_breaker``
+                is open
+
+        Returns:
+            requests.Response: the response received
+        """
+        breaker = self.circuit_breaker
+        if breaker is None:
+            return func(url, **kwargs)
+        self._circuit_changed(breaker.before_request(), url)
+        tstart = time.time()
+        success = False
         try:
-            return response.json()
+            response = func(url, **kwargs)
+            success = response.status_code < 500
+            return response
+        finally:
+            self._circuit_changed(
+                breaker.record(success, time.time() - tstart), url
+            )
+
+    def _circuit_changed(self, transition, url):
+        """Dispatch the ``circuit`` hook if the circuit changed state.
+
+        Args:
+            transition (tuple): ``(previous, state)``, or ``None``
+            url (str): URL of the request that changed it
+        """
+        if transition is not None:
+            self._dispatch_hook(
+                'circuit', previous=transition[0], state=transition[1],
+                failures=self.circuit_breaker.failures, url=url
+            )
+
+    def _endpoint(self, url):
+        """Get the endpoint of a URL, i.e. ``multiGrades``.
+
+        Args:
+            url (str): service URL endpoint
+
+        Returns:
+            str: the first path segment after ``urlbase``, or the URL
+            if it isn't under ``urlbase``
+        """
+        segments = self._url_segments(url)
+        if segments is None:
+            return url
+        return segments[0]
+
+    def _throttle(self, method, url):
+        """Wait for ``rate_limiter`` to let a request through.
+
+        Args:
+            method (str): HTTP method of the request, i.e. ``GET``
+            url (str): service URL endpoint
+        """
+        if self.rate_limiter is None:
+            return
+        endpoint = self._endpoint(url)
+        wait = self.rate_limiter.acquire(method, endpoint)
+        if wait:
+            self._dispatch_hook(
+                'throttle', method=method, url=url, endpoint=endpoint,
+                sleep=wait
+            )
+
+    def _url_segments(self, url):
+        """Split the path of a URL under ``urlbase`` into segments.
+
+        Args:
+            url (str): service URL endpoint
+
+        Returns:
+            list: path segments after ``urlbase``, i.e. ``['students',
+            '1234']``, or ``None`` if the URL isn't under ``urlbase``
+        """
+        if not url.startswith(self.urlbase):
+            return None
+        return url[len(self.urlbase):].split('?', 1)[0].split('/')
+
+    def _request_gradebook_id(self, segments):
+        """Get the gradebook a request is made to.
+
+        Args:
+            segments (list): path segments of the request URL
+
+        Returns:
+            str: id of the gradebook, or ``None`` if the request isn't
+            made to one
+        """
+        # pylint: disable=unused-argument,no-self-use
+        return None
+
+    def _describe_request(self, method, url, headers=None):
+        """Get the details of a request given to request hooks.
+
+        Args:
+            method (str): HTTP method of the request, i.e. ``GET``
+            url (str): service URL endpoint
+            headers (dict): headers of the request
+
+        Returns:
+            dict: the ``method``, ``url``, ``endpoint`` template, i.e.
+            ``students/{id}``, ``gradebook_id`` and ``cache`` use of the
+            request
+        """
+        segments = self._url_segments(url)
+        if segments is None:
+            endpoint = url
+            gradebook_id = None
+        else:
+            endpoint = '/'.join(
+                '{id}' if segment.isdigit() else segment
+                for segment in segments
+            )
+            gradebook_id = self._request_gradebook_id(segments)
+        cache = getattr(_context, 'cache', None)
+        if cache is None and headers and (
+                'If-None-Match' in headers or 'If-Modified-Since' in headers
+        ):
+            cache = 'revalidate'
+        return {
+            'method': method, 'url': url, 'endpoint': endpoint,
+            'gradebook_id': gradebook_id, 'cache': cache,
+        }
+
+    def _report_request(self, info, response, duration, attempts, data,
+                        raw_size, stream, error=None):
+        """Dispatch the ``request`` hook for a completed request.
+
+        Args:
+            info (dict): details of the request from
+                :py:meth:`_describe_request`
+            response (requests.Response): the final response, ``None``
+                if the request failed
+            duration (float): seconds taken, including retries
+            attempts (dict): ``retries`` made, and ``timings`` and
+                start time (``tstart``) of the last attempt
+            data (bytes): the request body sent, if any
+            raw_size (int): size of the body before compression, if
+                it was compressed
+            stream (bool): the response content hasn't been read yet
+            error (Exception): why the request failed, if it did
+        """
+        # pylint: disable=too-many-arguments
+        if not self.hooks['request']:
+            return
+        bytes_sent = len(data) if data else 0
+        bytes_received = bytes_received_raw = None
+        if response is not None and not stream:
+            bytes_received_raw = len(response.content)
+            # Bytes read from the connection, before decompression
+            bytes_received = bytes_received_raw
+            if response.raw is not None and hasattr(response.raw, 'tell'):
+                bytes_received = response.raw.tell() or bytes_received_raw
+        timings = dict(attempts['timings'] or {})
+        if attempts['tstart'] is not None:
+            timings['total'] = time.perf_counter() - attempts['tstart']
+        if response is not None and response.elapsed is not None:
+            # requests times from sending the request to receiving the
+            # headers, including making the connection
+            timings['ttfb'] = max(0.0, response.elapsed.total_seconds() - sum(
+                timings.get(phase) or 0 for phase in ('dns', 'connect', 'tls')
+            ))
+        self._dispatch_hook(
+            'request',
+            status=response.status_code if response is not None else None,
+            duration=duration, retries=attempts['retries'],
+            bytes_sent=bytes_sent,
+            bytes_sent_raw=raw_size if raw_size is not None else bytes_sent,
+            bytes_received=bytes_received,
+            bytes_received_raw=bytes_received_raw,
+            timings=timings, error=error, **info
+        )
+
+    def _decode(self, response):
+        """Decode the JSON content of a response with ``codec``.
+
+        Args:
+            response (requests.Response): response to decode
+
+        Raises:
+            ValueError: Unable to decode response content
+
+        Returns:
+            list: the json-encoded content of the response
+        """
+        try:
+            return self.codec.loads(response.content)
         except ValueError as err:
             log.exception('Unable to decode %s', response.content)
             raise err
@@ -126,6 +971,10 @@ class Base(object):
 
             gbk.get('students/{gradebookId}', params=params, gradebookId=gbid)
 
+        With a ``conditional_cache`` the request carries the validators
+        of the last response, and the content of that response is
+        returned if the service answers ``304 Not Modified``.
+
         Args:
             service (str): The endpoint service to use, i.e. gradebook
             params (dict): additional parameters to add to the call
@@ -140,7 +989,133 @@ class Base(object):
         url = self._url_format(service)
         if params is None:
             params = {}
-        return self.rest_action(self._session.get, url, params=params)
+        flight = self.single_flight
+        if flight is None:
+            return self._get(url, params)
+        return flight.do(
+            flight.make_key(url, params), lambda: self._get(url, params),
+            deadline=self.deadline
+        )
+
+    def _get(self, url, params):
+        """Make a GET request, conditional if there is a cache for it.
+
+        Args:
+            url (str): URL of the request
+            params (dict): query parameters of the request
+
+        Raises:
+            requests.RequestException: Exception connection error
+            ValueError: Unable to decode response content
+
+        Returns:
+            list: the json-encoded content of the response
+        """
+        cache = self.conditional_cache
+        if cache is None:
+            return self.rest_action(self._session.get, url, params=params)
+        key = cache.make_key(url, params)
+        response = self._request(
+            self._session.get, url, params=params,
+            headers=cache.get_headers(key)
+        )
+        if response.status_code == 304:
+            content = cache.get_content(key)
+            if content is not MISSING:
+                return content
+            # The entry was evicted after its validators were sent, so
+            # the full response is needed
+            log.debug('Cached content of %s is gone, getting it again', url)
+            response = self._request(self._session.get, url, params=params)
+        content = self._decode(response)
+        cache.update(key, response, content)
+        return content
+
+    def iter_get(self, service, params=None, key='data'):
+        """GET a list, yielding its items as they are received.
+
+        The response is streamed and parsed incrementally, so memory use
+        doesn't grow with the size of the list. The caches aren't used.
+
+        .. code-block:: python
+
+            for student in gbk.iter_get('students/{0}'.format(gbid)):
+                ...
+
+        Args:
+            service (str): The endpoint service to use, i.e. gradebook
+            params (dict): additional parameters to add to the call
+            key (str): member of the response holding the list
+
+        Raises:
+            requests.RequestException: Exception connection error
+            ValueError: Unable to decode response content
+            PyLmodUnexpectedData: The response has no ``key`` list
+
+        Yields:
+            object: each item of the list
+        """
+        url = self._url_format(service)
+        response = self._request(
+            self._session.get, url, params=params or {}, stream=True
+        )
+        try:
+            for item in iter_json_array(
+                    response.iter_content(self.STREAM_CHUNK_SIZE), key
+            ):
+                yield item
+        finally:
+            response.close()
+
+    def _cached_get(self, endpoint, service, params=None, gradebook_id=None):
+        """GET through ``response_cache``, if there is one.
+
+        Args:
+            endpoint (str): endpoint family deciding the lifetime of the
+                response, i.e. ``students``
+            service (str): The endpoint service to use, i.e. gradebook
+            params (dict): additional parameters to add to the call
+            gradebook_id (str): gradebook the response is read from,
+                whose writes invalidate it
+
+        Raises:
+            requests.RequestException: Exception connection error
+            ValueError: Unable to decode response content
+
+        Returns:
+            list: the json-encoded content of the response
+        """
+        cache = self.response_cache
+        if cache is None:
+            return self.get(service, params=params)
+        url = self._url_format(service)
+        key = cache.make_key(url, params)
+        response = cache.get(key)
+        if self.hooks['cache']:
+            info = self._describe_request('GET', url)
+            self._dispatch_hook(
+                'cache', url=url, endpoint=info['endpoint'],
+                gradebook_id=info['gradebook_id'],
+                hit=response is not MISSING
+            )
+        if response is MISSING:
+            generation = cache.generation
+            _context.cache = 'miss'
+            try:
+                response = self.get(service, params=params)
+            finally:
+                _context.cache = None
+            cache.set(key, response, endpoint, gradebook_id, generation)
+        return response
+
+    def _invalidate_cached(self, gradebook_id=None):
+        """Drop cached responses after a write.
+
+        Args:
+            gradebook_id (str): gradebook written to, default is all
+        """
+        if self.response_cache is not None:
+            self.response_cache.invalidate(gradebook_id)
 
     def post(self, service, data):
         """Generic POST operation for sending data to Learning Modules API.
@@ -160,11 +1135,18 @@ class Base(object):
             list: the json-encoded content of the response
         """
         url = self._url_format(service)
-        data = Base._data_to_json(data)
+        data = self._encode(data)
         # Add content-type for body in POST.
         headers = {'content-type': 'application/json'}
-        return self.rest_action(self._session.post, url,
-                                data=data, headers=headers)
+        raw_size = None
+        if self.compress and len(data) >= self.COMPRESS_MIN_SIZE:
+            raw_size = len(data)
+            data = gzip.compress(data)
+            headers['Content-Encoding'] = 'gzip'
+        return self._decode(self._request(
+            self._session.post, url, raw_size=raw_size,
+            data=data, headers=headers
+        ))
 
     def delete(self, service):
         """Generic DELETE operation for Learning Modules API.
@@ -0,0 +1,436 @@
+"""
+Response cache for read-only requests to the MIT Learning Modules Web service.
+"""
+import contextlib
+import copy
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+#: Returned by :py:meth:`ResponseCache.get` for a key not in the cache
+MISSING = object()
+
+
+class ResponseCache(object):
+    """
+    Size-bounded, time-limited cache of decoded responses.
+
+    Entries are keyed on the requested URL and parameters, and belong to
+    an endpoint family, i.e. ``students`` or ``assignments``, which
+    decides how long they live, and to a gradebook, so that a write to
+    the gradebook can drop everything read from it. When the cache is
+    full the least recently used entry is evicted.
+
+    A client uses the cache when it is passed one, and a cache may be
+    shared by several clients and threads:
+
+    .. code-block:: python
+
+        cache = ResponseCache(maxsize=128, ttl=60, ttls={'students': 600})
+        gradebook = GradeBook(cert, urlbase, gbuuid, response_cache=cache)
+        gradebook.get_students()  # fetched
+        gradebook.get_students()  # from the cache
+        gradebook.multi_grade(grades)  # drops the gradebook's entries
+
+    Cached responses are copied on the way in and out, so callers may
+    modify what they are returned.
+
+    Attributes:
+        maxsize (int): maximum number of entries
+        ttl (float): lifetime of entries, seconds
+        ttls (dict): lifetime by endpoint family, overriding ``ttl``
+        hits (int): lookups answered from the cache
+        misses (int): lookups not in the cache or expired
+        generation (int): number of invalidations so far
+    """
+
+    def __init__(
+            self, maxsize=256, ttl=60.0, ttls=None, clock=time.monotonic
+    ):
+        """Initialize ResponseCache instance.
+
+        Args:
+            maxsize (int): maximum number of entries
+            ttl (float): lifetime of entries, seconds
+            ttls (dict): lifetime by endpoint family, overriding ``ttl``,
+                i.e. ``{'students': 600, 'options': 3600}``. A lifetime
+                of ``0`` disables caching of the family.
+            clock (callable): source of the current time, seconds
+        """
+        # pylint: disable=too-many-arguments
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.ttls = dict(ttls or {})
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> (expires, gradebook_id, value), least recently used first
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def make_key(url, params=None):
+        """Get the key of a request.
+
+        Args:
+            url (str): requested URL
+            params (dict): query parameters of the request
+
+        Returns:
+            tuple: hashable key
+        """
+        return url, tuple(sorted((params or {}).items()))
+
+    def get_ttl(self, endpoint):
+        """Get the lifetime of entries of an endpoint family.
+
+        Args:
+            endpoint (str): endpoint family, i.e. ``students``
+
+        Returns:
+            float: lifetime, seconds
+        """
+        return self.ttls.get(endpoint, self.ttl)
+
+    def get(self, key):
+        """Look up a response.
+
+        Args:
+            key (tuple): key from :py:meth:`make_key`
+
+        Returns:
+            object: a copy of the cached response, or ``MISSING``
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self._clock():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(entry[2])
+
+    def set(self, key, value, endpoint, gradebook_id=None, generation=None):
+        """Store a response.
+
+        Args:
+            key (tuple): key from :py:meth:`make_key`
+            value (object): decoded response
+            endpoint (str): endpoint family, i.e. ``students``
+            gradebook_id (str): gradebook the response was read from
+            generation (int): ``generation`` when the request was made.
+                If the cache was invalidated since, the response may
+                predate a write and isn't stored.
+        """
+        ttl = self.get_ttl(endpoint)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        if gradebook_id is not None:
+            # Ids are given as both numbers and strings
+            gradebook_id = str(gradebook_id)
+        entry = (self._clock() + ttl, gradebook_id, copy.deepcopy(value))
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, gradebook_id=None):
+        """Drop cached responses.
+
+        Args:
+            gradebook_id (str): only drop responses read from this
+                gradebook, default is to drop everything
+        """
+        with self._lock:
+            self.generation += 1
+            if gradebook_id is None:
+                self._entries.clear()
+                return
+            for key in [
+                    key for key, entry in self._entries.items()
+                    if entry[1] == str(gradebook_id)
+            ]:
+                del self._entries[key]
+        log.debug('Invalidated cached responses of gradebook %s',
+                  gradebook_id)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ConditionalCache(object):
+    """
+    Validators and content of GET responses, for conditional requests.
+
+    When a response carries an ``ETag`` or ``Last-Modified`` header, its
+    decoded content is kept along with the validators. The next GET of
+    the same URL and parameters sends them back as ``If-None-Match`` and
+    ``If-Modified-Since``, and if the service answers ``304 Not
+    Modified`` the kept content is returned instead of downloading it
+    again. Unlike :py:class:`ResponseCache` this never returns stale
+    data, but still costs a round trip; the two can be combined.
+
+    .. code-block:: python
+
+        gradebook = GradeBook(
+            cert, urlbase, gbuuid, conditional_cache=ConditionalCache()
+        )
+
+    Attributes:
+        maxsize (int): maximum number of responses kept
+        hits (int): requests answered ``304 Not Modified``
+        misses (int): requests answered with content
+    """
+
+    def __init__(self, maxsize=256):
+        """Initialize ConditionalCache instance.
+
+        Args:
+            maxsize (int): maximum number of responses kept
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # key -> (validator headers, content), least recently used first
+        self._entries = OrderedDict()
+
+    make_key = staticmethod(ResponseCache.make_key)
+
+    def get_headers(self, key):
+        """Get the conditional request headers for a request.
+
+        Args:
+            key (tuple): key from :py:meth:`make_key`
+
+        Returns:
+            dict: ``If-None-Match`` and ``If-Modified-Since`` headers,
+            empty if there are no validators for the request
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return {}
+        return dict(entry[0])
+
+    def get_content(self, key):
+        """Get the content kept for a request answered ``304``.
+
+        Args:
+            key (tuple): key from :py:meth:`make_key`
+
+        Returns:
+            object: a copy of the kept content, or ``MISSING``
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(entry[1])
+
+    def update(self, key, response, content):
+        """Keep the validators and content of a response.
+
+        Args:
+            key (tuple): key from :py:meth:`make_key`
+            response (requests.Response): response with content
+            content (object): decoded content of the response
+        """
+        headers = {}
+        if response.headers.get('ETag'):
+            headers['If-None-Match'] = response.headers['ETag']
+        if response.headers.get('Last-Modified'):
+            headers['If-Modified-Since'] = response.headers['Last-Modified']
+        with self._lock:
+            self.misses += 1
+            if not headers or self.maxsize <= 0:
+                self._entries.pop(key, None)
+                return
+            self._entries[key] = (headers, copy.deepcopy(content))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def default_id_cache_path():
+    """Get the default file of :py:class:`IdCache`.
+
+    Returns:
+        str: ``pylmod/ids.sqlite3`` under ``$XDG_CACHE_HOME``, or
+        ``~/.cache`` if it isn't set
+    """
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(
+        os.path.expanduser('~'), '.cache'
+    )
+    return os.path.join(cache_home, 'pylmod', 'ids.sqlite3')
+
+
+class IdCache(object):
+    """
+    Persistent cache of the ids that uuids resolve to.
+
+    Gradebook, course and group uuids map to ids that practically never
+    change, so resolving them again whenever a process starts is wasted
+    round trips. The ids are kept in an SQLite database, which several
+    processes, i.e. the workers of a pool, may share:
+
+    .. code-block:: python
+
+        ids = IdCache()
+        gradebook = GradeBook(cert, urlbase, gbuuid, id_cache=ids)
+        gradebook.get_students()  # resolves gbuuid, unless cached
+
+    Ids are kept per LMod service, so test and production don't mix,
+    and expire after ``ttl`` seconds. Drop them explicitly with
+    :py:meth:`invalidate`, i.e. if a gradebook was recreated.
+
+    Attributes:
+        path (str): SQLite database file
+        ttl (float): lifetime of ids, seconds
+        hits (int): lookups answered from the cache
+        misses (int): lookups not in the cache or expired
+    """
+
+    #: Default lifetime of ids, seconds
+    TTL = 7 * 24 * 3600
+
+    def __init__(self, path=None, ttl=TTL, clock=time.time):
+        """Initialize IdCache instance.
+
+        Args:
+            path (str): SQLite database file, created if need be.
+                Default is :py:func:`default_id_cache_path`.
+            ttl (float): lifetime of ids, seconds
+            clock (callable): source of the current time, seconds since
+                the epoch, as it is shared between processes
+        """
+        if path is None:
+            path = default_id_cache_path()
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        with self._connect() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS ids ('
+                'service TEXT NOT NULL, kind TEXT NOT NULL, '
+                'uuid TEXT NOT NULL, value TEXT NOT NULL, '
+                'expires REAL NOT NULL, '
+                'PRIMARY KEY (service, kind, uuid))'
+            )
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """Open a connection, committing what was done on success.
+
+        Connections aren't kept, as they can't be shared by threads.
+
+        Yields:
+            sqlite3.Connection: connection to the database
+        """
+        with contextlib.closing(
+                sqlite3.connect(self.path, timeout=30)
+        ) as connection:
+            with connection:
+                yield connection
+
+    def get(self, service, kind, uuid):
+        """Look up an id.
+
+        Args:
+            service (str): URL of the LMod service the id belongs to
+            kind (str): kind of id, i.e. ``gradebook`` or ``group``
+            uuid (str): uuid resolved
+
+        Returns:
+            object: the id, or ``MISSING``
+        """
+        with self._connect() as connection:
+            row = connection.execute(
+                'SELECT value FROM ids WHERE service = ? AND kind = ? '
+                'AND uuid = ? AND expires > ?',
+                (service, kind, uuid, self._clock())
+            ).fetchone()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return MISSING
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, service, kind, uuid, value):
+        """Store an id.
+
+        Args:
+            service (str): URL of the LMod service the id belongs to
+            kind (str): kind of id, i.e. ``gradebook`` or ``group``
+            uuid (str): uuid resolved
+            value (object): the id, a JSON serializable value
+        """
+        if self.ttl <= 0:
+            return
+        with self._connect() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO ids VALUES (?, ?, ?, ?, ?)',
+                (service, kind, uuid, json.dumps(value),
+                 self._clock() + self.ttl)
+            )
+
+    def invalidate(self, service=None, kind=None, uuid=None):
+        """Drop ids, along with any that expired.
+
+        Args:
+            service (str): only drop ids of this LMod service
+            kind (str): only drop ids of this kind, i.e. ``gradebook``
+            uuid (str): only drop the id of this uuid
+
+        Returns:
+            int: number of ids dropped
+        """
+        conditions = []
+        values = []
+        for column, value in (
+                ('service', service), ('kind', kind), ('uuid', uuid)
+        ):
+            if value is not None:
+                conditions.append('{0} = ?'.format(column))
+                values.append(value)
+        query = 'DELETE FROM ids'
+        if conditions:
+            query += ' WHERE ({0}) OR expires <= ?'.format(
+                ' AND '.join(conditions)
+            )
+            values.append(self._clock())
+        with self._connect() as connection:
+            dropped = connection.execute(query, values).rowcount
+        log.debug('Invalidated %d cached ids', dropped)
+        return dropped
+
+    def __len__(self):
+        with self._connect() as connection:
+            return connection.execute(
+                'SELECT COUNT(*) FROM ids WHERE expires > ?', (self._clock(),)
+            ).fetchone()[0]
@@ -0,0 +1,342 @@
+"""
+In-memory indexes over gradebook and membership data returned by LMod
+"""
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+
+class StudentIndex(object):
+    """Constant time lookup of students by email address or student id.
+
+    The index is built once from a roster as returned by
+    :py:meth:`pylmod.gradebook.GradeBook.get_students`, either the full
+    or the ``simple=True`` form, and can then be passed anywhere a list
+    of students is accepted, i.e.
+    :py:meth:`pylmod.gradebook.GradeBook.get_student_by_email`.
+
+    Emails are case-folded before indexing, so ``jdoe@mit.edu``,
+    ``JDoe@mit.edu`` and the certificate form ``jdoe@MIT.EDU`` produced
+    by ``get_students(simple=True)`` all find the same student. When
+    two students share an email the first one in the roster wins, the
+    same as a linear scan would.
+
+    Attributes:
+        students (list): the indexed students, in roster order
+    """
+
+    def __init__(self, students=()):
+        """Build the index.
+
+        Args:
+            students (list): student dictionaries to index
+        """
+        self.students = []
+        self._by_email = {}
+        self._by_id = {}
+        for student in students:
+            self.add(student)
+
+    @staticmethod
+    def normalize_email(email):
+        """Return the key used to index an email address.
+
+        Args:
+            email (str): email address in any case
+
+        Returns:
+            str: case-folded email address
+        """
+        return email.lower()
+
+    @staticmethod
+    def certificate_email(email):
+        """Return an email in the form used by MIT certificates.
+
+        The mit.edu domain for user email must be upper-case,
+        i.e. ``MIT.EDU``.
+
+        Args:
+            email (str): email address
+
+        Returns:
+            str: email with the ``@mit.edu`` domain upper-cased
+        """
+        return email.replace('@mit.edu', '@MIT.EDU')
+
+    @staticmethod
+    def _student_email(student):
+        """Get the email of a full or simple student dictionary."""
+        return student.get('accountEmail', student.get('email'))
+
+    def add(self, student):
+        """Add a student to the index.
+
+        Args:
+            student (dict): student dictionary
+        """
+        self.students.append(student)
+        email = self._student_email(student)
+        if email:
+            self._by_email.setdefault(self.normalize_email(email), student)
+        student_id = student.get('studentId')
+        if student_id is not None:
+            self._by_id.setdefault(student_id, student)
+
+    def get_by_email(self, email):
+        """Get a student by email address.
+
+        Args:
+            email (str): student email, in any case
+
+        Returns:
+            tuple: tuple of student id and student dictionary, or
+            ``(None, None)`` if there is no such student.
+        """
+        student = self._by_email.get(self.normalize_email(email))
+        if student is None:
+            return None, None
+        return student.get('studentId'), student
+
+    def get_by_id(self, student_id):
+        """Get a student by student id.
+
+        Args:
+            student_id (int): numerical ID for student
+
+        Returns:
+            dict: student dictionary or ``None``
+        """
+        return self._by_id.get(student_id)
+
+    def __contains__(self, email):
+        return self.normalize_email(email) in self._by_email
+
+    def __iter__(self):
+        return iter(self.students)
+
+    def __len__(self):
+        return len(self.students)
+
+
+class AssignmentCatalog(object):
+    """Constant time lookup of assignments by name, short name or id.
+
+    The catalog is built from the assignments returned by
+    :py:meth:`pylmod.gradebook.GradeBook.get_assignments` and kept up to
+    date by the :py:class:`pylmod.gradebook.GradeBook` that owns it as
+    assignments are created and deleted. When two assignments share a
+    name the first one wins, the same as a linear scan would. Lookups
+    and updates may be made from several threads.
+
+    Attributes:
+        gradebook_id (str): gradebook the assignments belong to
+        built (float): ``time.monotonic()`` when the catalog was built
+    """
+
+    def __init__(self, assignments=(), gradebook_id=None):
+        """Build the catalog.
+
+        Args:
+            assignments (list): assignment dictionaries to catalog
+            gradebook_id (str): gradebook the assignments belong to
+        """
+        self.gradebook_id = gradebook_id
+        self.built = time.monotonic()
+        self._lock = threading.RLock()
+        self._by_id = {}
+        self._by_name = {}
+        self._by_short_name = {}
+        for assignment in assignments:
+            self.add(assignment)
+
+    @staticmethod
+    def _id_key(assignment_id):
+        """Get the key of an assignment id.
+
+        Ids are given as both numbers and strings, i.e. ``1234`` read
+        from a response or ``'1234'`` passed by a caller.
+
+        Args:
+            assignment_id (int): id of an assignment
+
+        Returns:
+            str: key in the index of ids
+        """
+        return str(assignment_id)
+
+    def add(self, assignment):
+        """Add or replace an assignment in the catalog.
+
+        Args:
+            assignment (dict): assignment dictionary, which must
+                contain an ``assignmentId``
+        """
+        assignment_id = assignment['assignmentId']
+        with self._lock:
+            self.remove(assignment_id)
+            self._by_id[self._id_key(assignment_id)] = assignment
+            if assignment.get('name') is not None:
+                self._by_name.setdefault(assignment['name'], assignment)
+            if assignment.get('shortName') is not None:
+                self._by_short_name.setdefault(
+                    assignment['shortName'], assignment
+                )
+
+    def remove(self, assignment_id):
+        """Remove an assignment from the catalog.
+
+        Args:
+            assignment_id (int): id of the assignment to remove, as a
+                number or a string
+
+        Returns:
+            dict: the removed assignment or ``None`` if it wasn't present
+        """
+        with self._lock:
+            assignment = self._by_id.pop(self._id_key(assignment_id), None)
+            if assignment is None:
+                return None
+            for key, index in (('name', self._by_name),
+                               ('shortName', self._by_short_name)):
+                if index.get(assignment.get(key)) is assignment:
+                    del index[assignment[key]]
+                    # Promote the next assignment sharing the key, if any
+                    for other in self._by_id.values():
+                        if other.get(key) == assignment[key]:
+                            index[assignment[key]] = other
+                            break
+            return assignment
+
+    @staticmethod
+    def _result(assignment):
+        """Convert a lookup to the tuple returned by lookups."""
+        if assignment is None:
+            return None, None
+        return assignment['assignmentId'], assignment
+
+    def by_name(self, name):
+        """Get an assignment by name.
+
+        Args:
+            name (str): name of assignment
+
+        Returns:
+            tuple: tuple of assignment id and assignment dictionary, or
+            ``(None, None)`` if there is no such assignment.
+        """
+        return self._result(self._by_name.get(name))
+
+    def by_short_name(self, short_name):
+        """Get an assignment by short name.
+
+        Args:
+            short_name (str): short name of assignment, i.e. ``HW1``
+
+        Returns:
+            tuple: tuple of assignment id and assignment dictionary, or
+            ``(None, None)`` if there is no such assignment.
+        """
+        return self._result(self._by_short_name.get(short_name))
+
+    def by_id(self, assignment_id):
+        """Get an assignment by id.
+
+        Args:
+            assignment_id (int): id of assignment, as a number or a string
+
+        Returns:
+            tuple: tuple of assignment id, as returned by LMod, and
+            assignment dictionary, or ``(None, None)`` if there is no
+            such assignment.
+        """
+        return self._result(self._by_id.get(self._id_key(assignment_id)))
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._by_id.values()))
+
+    def __len__(self):
+        return len(self._by_id)
+
+
+class MembershipIndex(object):
+    """Constant time role checks against a snapshot of a group's members.
+
+    The index is built from the members returned by
+    :py:meth:`pylmod.membership.Membership.get_membership` and answers
+    which roles an email has without another call to the service.
+    Emails are matched exactly, as LMod returns them. A member may have
+    several roles.
+
+    Attributes:
+        uuid (str): course the members belong to
+        built (float): ``time.monotonic()`` when the index was built
+    """
+
+    def __init__(self, members=(), uuid=None):
+        """Build the index.
+
+        Args:
+            members (list): member dictionaries, with an ``email`` and
+                a ``roleType``
+            uuid (str): course the members belong to
+        """
+        self.uuid = uuid
+        self.built = time.monotonic()
+        self._roles = {}
+        for member in members:
+            email = member.get('email')
+            if email is not None:
+                self._roles.setdefault(email, set()).add(
+                    member.get('roleType')
+                )
+
+    def has_role(self, email, role_name):
+        """Determine if an email is associated with a role.
+
+        Args:
+            email (str): user email
+            role_name (str): user role, i.e. ``student``
+
+        Returns:
+            bool: True or False if email has role_name
+        """
+        return role_name in self._roles.get(email, ())
+
+    def roles(self, email):
+        """Get the roles of an email.
+
+        Args:
+            email (str): user email
+
+        Returns:
+            frozenset: roles of the email, empty if it isn't a member
+        """
+        return frozenset(self._roles.get(email, ()))
+
+    def roles_for_emails(self, emails):
+        """Get the roles of many emails.
+
+        Args:
+            emails (iterable): user emails
+
+        Returns:
+            dict: roles, as a ``frozenset``, by email, empty for emails
+            that aren't members
+        """
+        return dict((email, self.roles(email)) for email in emails)
+
+    def __contains__(self, email):
+        return email in self._roles
+
+    def __iter__(self):
+        return iter(list(self._roles))
+
+    def __len__(self):
+        return len(self._roles)
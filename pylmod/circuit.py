@@ -0,0 +1,171 @@
+"""
+Circuit breaker failing fast while LMod is down.
+"""
+import logging
+import threading
+import time
+
+from pylmod.exceptions import PyLmodCircuitOpen
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+#: Requests are made and their outcomes counted
+CLOSED = 'closed'
+#: Requests fail fast with ``PyLmodCircuitOpen``
+OPEN = 'open'
+#: One request is let through to probe whether LMod has recovered
+HALF_OPEN = 'half-open'
+
+
+class CircuitBreaker(object):
+    """
+    Stops making requests to a failing host until it recovers.
+
+    Every request attempt, retries included, is counted as a failure if
+    it raised a connection error or timeout, was answered with a server
+    error, or took longer than ``latency_threshold``. After
+    ``failure_threshold`` consecutive failures the circuit opens, and
+    requests raise :py:class:`pylmod.exceptions.PyLmodCircuitOpen` at
+    once instead of waiting on timeouts and retries. Once
+    ``reset_timeout`` seconds have passed the circuit is half-open: one
+    request is let through, and closes the circuit if it succeeds or
+    opens it again if it fails.
+
+    A breaker may be shared by the clients talking to the same host:
+
+    .. code-block:: python
+
+        breaker = CircuitBreaker(failure_threshold=5, reset_timeout=60)
+        gradebook = GradeBook(cert, urlbase, circuit_breaker=breaker)
+        gradebook.register_hook('circuit', print)
+
+    Attributes:
+        failure_threshold (int): consecutive failures opening the circuit
+        reset_timeout (float): seconds the circuit stays open before it
+            is half-open
+        latency_threshold (float): seconds after which a successful
+            response counts as a failure, ``None`` to ignore latency
+        failures (int): consecutive failures so far
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0,
+                 latency_threshold=None, clock=time.monotonic):
+        """Initialize CircuitBreaker instance.
+
+        Args:
+            failure_threshold (int): consecutive failures opening the
+                circuit
+            reset_timeout (float): seconds the circuit stays open before
+                a request is let through to probe
+            latency_threshold (float): seconds after which a successful
+                response counts as a failure, default is to ignore
+                latency
+            clock (callable): source of the current time, seconds
+
+        Raises:
+            ValueError: ``failure_threshold`` is less than one
+        """
+        if failure_threshold < 1:
+            raise ValueError('failure_threshold must be at least 1')
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.latency_threshold = latency_threshold
+        self.failures = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened = None
+        self._probing = False
+
+    @property
+    def state(self):
+        """str: ``CLOSED``, ``OPEN`` or ``HALF_OPEN``"""
+        with self._lock:
+            if (
+                    self._state == OPEN and
+                    self._clock() - self._opened >= self.reset_timeout
+            ):
+                return HALF_OPEN
+            return self._state
+
+    def before_request(self):
+        """Check a request may be made.
+
+        Raises:
+            PyLmodCircuitOpen: the circuit is open, or half-open with
+                its probe already in flight
+
+        Returns:
+            tuple: ``(previous, state)`` if the state changed, else
+            ``None``
+        """
+        with self._lock:
+            previous = self._state
+            if self._state == OPEN:
+                remaining = self.reset_timeout - (
+                    self._clock() - self._opened
+                )
+                if remaining > 0:
+                    raise PyLmodCircuitOpen(
+                        'Circuit open after {0} failures, retrying in '
+                        '{1:.1f}s'.format(self.failures, remaining)
+                    )
+                self._state = HALF_OPEN
+                self._probing = False
+            if self._state == HALF_OPEN:
+                if self._probing:
+                    raise PyLmodCircuitOpen(
+                        'Circuit half-open, waiting for the probe'
+                    )
+                self._probing = True
+            return self._transition(previous)
+
+    def record(self, success, duration=None):
+        """Count the outcome of a request.
+
+        Args:
+            success (bool): the request got a response that wasn't a
+                server error
+            duration (float): seconds the request took
+
+        Returns:
+            tuple: ``(previous, state)`` if the state changed, else
+            ``None``
+        """
+        if (
+                success and duration is not None and
+                self.latency_threshold is not None and
+                duration > self.latency_threshold
+        ):
+            success = False
+        with self._lock:
+            previous = self._state
+            self._probing = False
+            if success:
+                self.failures = 0
+                self._state = CLOSED
+            else:
+                self.failures += 1
+                if (
+                        self._state == HALF_OPEN or
+                        self.failures >= self.failure_threshold
+                ):
+                    self._state = OPEN
+                    self._opened = self._clock()
+            return self._transition(previous)
+
+    def _transition(self, previous):
+        """Log a change of state.
+
+        Args:
+            previous (str): state before the change
+
+        Returns:
+            tuple: ``(previous, state)`` if the state changed, else
+            ``None``
+        """
+        if previous == self._state:
+            return None
+        log.warning('[PyLmod] Circuit %s, was %s after %s failures',
+                    self._state, previous, self.failures)
+        return previous, self._state
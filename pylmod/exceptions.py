@@ -23,3 +23,13 @@ class PyLmodFailedAssignmentCreation(PyLmodException):
 class PyLmodNoSuchSection(PyLmodException):
     """Failed to find the specified section"""
     pass
+
+
+class PyLmodCircuitOpen(PyLmodException):
+    """LMod has been failing, so the request wasn't made"""
+    pass
+
+
+class PyLmodDeadlineExceeded(PyLmodException):
+    """The operation ran out of time before the request could be made"""
+    pass
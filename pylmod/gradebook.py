@@ -5,19 +5,98 @@ import csv
 import json
 import logging
 import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
-from pylmod.base import Base
+import requests
+
+from pylmod.base import Base, DEFAULT_MAX_WORKERS
+from pylmod.catalog import AssignmentCatalog, StudentIndex
 from pylmod.exceptions import (
+    PyLmodException,
     PyLmodUnexpectedData,
     PyLmodFailedAssignmentCreation,
     PyLmodNoSuchSection,
 )
+from pylmod.records import Assignment, GradeColumns, Student
 
 log = logging.getLogger(__name__)  # pylint: disable=invalid-name
 
 
 DEFAULT_MAX_POINTS = 1.0
 
+#: Default number of grades sent per request by ``multi_grade_chunked``
+DEFAULT_BATCH_SIZE = 1000
+
+
+#: Outcome of sending one chunk of grades with ``multi_grade_chunked``.
+#: ``start`` and ``stop`` are the slice of the grade array sent,
+#: ``status`` is ``1`` on success and ``-1`` on failure, ``duration`` is
+#: in seconds, ``response`` is the decoded response (``None`` if the
+#: request raised ``error``) and ``failed_rows`` holds the grades of a
+#: failed chunk.
+ChunkResult = namedtuple(
+    'ChunkResult',
+    [
+        'index', 'start', 'stop', 'status', 'duration',
+        'response', 'error', 'failed_rows',
+    ]
+)
+
+
+#: Grades of a gradebook as arrays, from ``GradeBook.get_grade_matrix``.
+#: ``grades`` is a students x assignments ``numpy`` array of numeric
+#: grades, ``NaN`` where a grade is missing or excused, and
+#: ``student_ids`` and ``assignment_ids`` give the ``studentId`` of each
+#: row and the ``assignmentId`` of each column.
+GradeMatrix = namedtuple(
+    'GradeMatrix', ['grades', 'student_ids', 'assignment_ids']
+)
+
+
+class MultiGradeResult(object):
+    """Aggregated outcome of ``GradeBook.multi_grade_chunked``.
+
+    Attributes:
+        chunks (list): :py:class:`ChunkResult` for each chunk, in order
+        duration (float): wall clock time of the whole upload, seconds
+    """
+
+    def __init__(self, chunks, duration):
+        self.chunks = chunks
+        self.duration = duration
+
+    @property
+    def status(self):
+        """int: ``1`` if every chunk succeeded, ``-1`` otherwise"""
+        if all(chunk.status == 1 for chunk in self.chunks):
+            return 1
+        return -1
+
+    @property
+    def failed_chunks(self):
+        """list: :py:class:`ChunkResult` of the chunks that failed"""
+        return [chunk for chunk in self.chunks if chunk.status != 1]
+
+    @property
+    def failed_rows(self):
+        """list: grades of all failed chunks, ready to be sent again,
+        or :py:class:`pylmod.records.GradeColumns` if they were sent as
+        columns"""
+        failed = [chunk.failed_rows for chunk in self.failed_chunks]
+        if any(isinstance(rows, GradeColumns) for rows in failed):
+            joined = GradeColumns()
+        else:
+            joined = []
+        for rows in failed:
+            joined.extend(rows)
+        return joined
+
+    def __repr__(self):
+        return '<MultiGradeResult status={0} chunks={1} failed={2}>'.format(
+            self.status, len(self.chunks), len(self.failed_chunks)
+        )
+
 
 class GradeBook(Base):
     """
@@ -47,18 +126,127 @@ class GradeBook(Base):
     API reference at
     https://learning-modules-dev.mit.edu/service/gradebook/doc.html
     """
+    #: uuid of the gradebook used when a method isn't passed a
+    #: ``gradebook_id``, i.e. ``STELLAR:/project/gbngtest``
+    gbuuid = None
+
+    _gradebook_id = None
+
+    #: Seconds an assignment catalog is used before it is fetched again
+    ASSIGNMENT_CATALOG_TTL = 300
+
+    #: Endpoints whose URLs start with the id of a gradebook, i.e.
+    #: ``students/{gradebookId}``
+    GRADEBOOK_ENDPOINTS = frozenset([
+        'assignments', 'grades', 'multiGrades', 'sections', 'staff',
+        'students',
+    ])
 
     def __init__(
             self,
             cert,
             urlbase='https://learning-modules.mit.edu:8443/',
-            gbuuid=None
+            gbuuid=None,
+            **kwargs
     ):
-        super(GradeBook, self).__init__(cert, urlbase)
+        super(GradeBook, self).__init__(cert, urlbase, **kwargs)
         # Add service base
         self.urlbase += 'service/gradebook/'
-        if gbuuid is not None:
-            self.gradebook_id = self.get_gradebook_id(gbuuid)
+        # Assignment catalogs by gradebook id, see get_assignment_catalog
+        self._assignment_catalogs = {}
+        # Resolved on first use, so making a client is free
+        self.gbuuid = gbuuid
+
+    @property
+    def gradebook_id(self):
+        """str: Gradebook used when a method isn't passed a
+        ``gradebook_id``. Unless set, it is resolved from ``gbuuid``
+        when first used, which may raise the errors of
+        :py:meth:`get_gradebook_id`."""
+        if self._gradebook_id is None and self.gbuuid is not None:
+            return self._resolve_id(
+                'gradebook', self.gbuuid, self.get_gradebook_id
+            )
+        return self._gradebook_id
+
+    @gradebook_id.setter
+    def gradebook_id(self, value):
+        self._gradebook_id = value
+
+    def prefetch_gradebook_ids(self, gbuuids, max_workers=DEFAULT_MAX_WORKERS):
+        """Resolve the ids of many gradebooks concurrently.
+
+        The ids are kept, so that clients bound to the gradebooks with
+        :py:meth:`for_gradebook` don't resolve them again:
+
+        .. code-block:: python
+
+            shared = GradeBook(cert, urlbase)
+            shared.prefetch_gradebook_ids(gbuuids, max_workers=8)
+            for gbuuid in gbuuids:
+                shared.for_gradebook(gbuuid=gbuuid).get_students()
+
+        Args:
+            gbuuids (iterable): gradebook uuids, i.e.
+                ``STELLAR:/project/gbngtest``
+            max_workers (int): maximum number of concurrent requests
+
+        Raises:
+            ValueError: ``max_workers`` is less than 1
+            PyLmodUnexpectedData: No gradebook id returned
+            requests.RequestException: Exception connection error
+
+        Returns:
+            dict: gradebook ids by uuid
+        """
+        return self._prefetch_ids(
+            'gradebook', gbuuids, self.get_gradebook_id, max_workers
+        )
+
+    def for_gradebook(self, gradebook_id=None, gbuuid=None):
+        """Get a copy of this GradeBook bound to another gradebook.
+
+        The copy shares the connection pool, policies, hooks and
+        assignment catalogs of this instance, and only differs in its
+        ``gradebook_id``. It is the way to use one client from many
+        threads, each working on its own gradebook:
+
+        .. code-block:: python
+
+            shared = GradeBook(cert, urlbase, pool_maxsize=32)
+
+            def worker(gbuuid):
+                gradebook = shared.for_gradebook(gbuuid=gbuuid)
+                gradebook.multi_grade(grades_for(gbuuid))
+
+        Args:
+            gradebook_id (str): unique identifier for gradebook, i.e. ``2314``
+            gbuuid (str): gradebook uuid, i.e. ``STELLAR:/project/gbngtest``,
+                resolved on first use when ``gradebook_id`` isn't given
+
+        Returns:
+            GradeBook: copy with ``gradebook_id`` or ``gbuuid`` set
+        """
+        return self._clone(gradebook_id=gradebook_id, gbuuid=gbuuid)
+
+    def _request_gradebook_id(self, segments):
+        """Get the gradebook a request is made to.
+
+        Args:
+            segments (list): path segments of the request URL
+
+        Returns:
+            str: id of the gradebook, or ``None`` if the request isn't
+            made to one
+        """
+        if segments[0] == 'gradebook':
+            # gradebook/options/{gradebookId}
+            segments = segments[1:]
+        elif segments[0] not in self.GRADEBOOK_ENDPOINTS:
+            return None
+        if len(segments) > 1 and segments[1]:
+            return segments[1]
+        return None
 
     @staticmethod
     def unravel_sections(section_data):
@@ -113,6 +301,36 @@ class GradeBook(Base):
             str: value of gradebook id
         """
         gradebook = self.get('gradebook', params={'uuid': gbuuid})
+        return self._gradebook_id_from_response(gradebook)
+
+    @staticmethod
+    def _catalog_key(gradebook_id):
+        """Get the key of a gradebook's assignment catalog.
+
+        Ids are given as both numbers and strings, i.e. ``1234`` read
+        from a response or ``'1234'`` passed by a caller.
+
+        Args:
+            gradebook_id (str): unique identifier for gradebook
+
+        Returns:
+            str: key in ``_assignment_catalogs``
+        """
+        return str(gradebook_id)
+
+    @staticmethod
+    def _gradebook_id_from_response(gradebook):
+        """Extract the gradebook id from a ``gradebook`` response.
+
+        Args:
+            gradebook (dict): response of the ``gradebook`` endpoint
+
+        Raises:
+            PyLmodUnexpectedData: No gradebook id returned
+
+        Returns:
+            str: value of gradebook id
+        """
         if 'data' not in gradebook:
             failure_messsage = ('Error in get_gradebook_id '
                                 'for {0} - no data'.format(
@@ -175,9 +393,12 @@ class GradeBook(Base):
                 }
 
         """
+        gradebook_id = gradebook_id or self.gradebook_id
         end_point = 'gradebook/options/{gradebookId}'.format(
-            gradebookId=gradebook_id or self.gradebook_id)
-        options = self.get(end_point)
+            gradebookId=gradebook_id)
+        options = self._cached_get(
+            'options', end_point, gradebook_id=gradebook_id
+        )
         return options['data']
 
     def get_assignments(
@@ -186,7 +407,8 @@ class GradeBook(Base):
             simple=False,
             max_points=True,
             avg_stats=False,
-            grading_stats=False
+            grading_stats=False,
+            compact=False
     ):
         """Get assignments for a gradebook.
 
@@ -207,6 +429,9 @@ class GradeBook(Base):
             grading_stats (bool):
                 return grading statistics, i.e. number of approved grades,
                 unapproved grades, etc., default= ``False``
+            compact (bool): return :py:class:`pylmod.records.Assignment`
+                records, which keep the common fields in a fraction of
+                the memory, default= ``False``
 
         Raises:
             requests.RequestException: Exception connection error
@@ -268,17 +493,64 @@ class GradeBook(Base):
             includeGradingStats=json.dumps(grading_stats)
         )
 
-        assignments = self.get(
-            'assignments/{gradebookId}'.format(
-                gradebookId=gradebook_id or self.gradebook_id
-            ),
+        gradebook_id = gradebook_id or self.gradebook_id
+        assignments = self._cached_get(
+            'assignments',
+            'assignments/{gradebookId}'.format(gradebookId=gradebook_id),
             params=params,
+            gradebook_id=gradebook_id,
         )
         if simple:
             return [{'AssignmentName': x['name']}
                     for x in assignments['data']]
+        if compact:
+            return [Assignment.from_dict(x) for x in assignments['data']]
         return assignments['data']
 
+    def get_assignment_catalog(self, gradebook_id='', refresh=False):
+        """Get a catalog of assignments for a gradebook.
+
+        The catalog is retrieved from the service on first use and kept
+        for ``ASSIGNMENT_CATALOG_TTL`` seconds. Assignments created or
+        deleted through this instance are added to or removed from it,
+        so repeated lookups don't need another call to the service, but
+        changes made elsewhere are only seen once it is fetched again.
+
+        Args:
+            gradebook_id (str): unique identifier for gradebook, i.e. ``2314``
+            refresh (bool): retrieve the assignments from the service
+                even if a catalog is already held, default= ``False``
+
+        Raises:
+            requests.RequestException: Exception connection error
+            ValueError: Unable to decode response content
+
+        Returns:
+            pylmod.catalog.AssignmentCatalog: assignments of the gradebook
+        """
+        gradebook_id = gradebook_id or self.gradebook_id
+        key = self._catalog_key(gradebook_id)
+        catalog = self._assignment_catalogs.get(key)
+        if catalog is not None and (
+                time.monotonic() - catalog.built >
+                self.ASSIGNMENT_CATALOG_TTL
+        ):
+            refresh = True
+        if catalog is None or refresh:
+            catalog = AssignmentCatalog(
+                self.get_assignments(gradebook_id=gradebook_id),
+                gradebook_id=gradebook_id
+            )
+            with self._lock:
+                if refresh:
+                    self._assignment_catalogs[key] = catalog
+                else:
+                    # Keep a catalog another thread fetched meanwhile
+                    catalog = self._assignment_catalogs.setdefault(
+                        key, catalog
+                    )
+        return catalog
+
     def get_assignment_by_name(self, assignment_name, assignments=None):
         """Get assignment by name.
 
@@ -287,11 +559,23 @@ class GradeBook(Base):
         optional parameter ``assignments`` is provided, it uses this
         collection rather than retrieving all assignments from the service.
 
+        For repeated lookups pass the catalog from
+        ``get_assignment_catalog()``, which looks names up in constant
+        time without a call to the service:
+
+        .. code-block:: python
+
+            catalog = gradebook.get_assignment_catalog()
+            for name in names:
+                gradebook.get_assignment_by_name(name, catalog)
+
         Args:
             assignment_name (str): name of assignment
             assignments (list): assignments to search, default: None
                 When ``assignments`` is unspecified, all assignments
-                are retrieved from the service.
+                are retrieved from the service. A
+                :py:class:`pylmod.catalog.AssignmentCatalog` may also
+                be passed.
 
         Raises:
             requests.RequestException: Exception connection error
@@ -327,6 +611,8 @@ class GradeBook(Base):
         """
         if assignments is None:
             assignments = self.get_assignments()
+        if isinstance(assignments, AssignmentCatalog):
+            return assignments.by_name(assignment_name)
         for assignment in assignments:
             if assignment['name'] == assignment_name:
                 return assignment['assignmentId'], assignment
@@ -420,8 +706,23 @@ class GradeBook(Base):
         }
         data.update(kwargs)
         log.info("Creating assignment %s", name)
-        response = self.post('assignment', data)
+        try:
+            response = self.post('assignment', data)
+        finally:
+            self._invalidate_cached(data['gradebookId'])
         log.debug('Received response data: %s', response)
+        created = response.get('data')
+        catalog = self._assignment_catalogs.get(
+            self._catalog_key(data['gradebookId'])
+        )
+        if (
+                catalog is not None and
+                isinstance(created, dict) and
+                'assignmentId' in created
+        ):
+            assignment = dict(data)
+            assignment.update(created)
+            catalog.add(assignment)
         return response
 
     def delete_assignment(self, assignment_id):
@@ -447,9 +748,19 @@ class GradeBook(Base):
                 }
 
         """
-        return self.delete(
-            'assignment/{assignmentId}'.format(assignmentId=assignment_id),
-        )
+        try:
+            response = self.delete(
+                'assignment/{assignmentId}'.format(assignmentId=assignment_id),
+            )
+        finally:
+            # The gradebook of the assignment isn't known
+            self._invalidate_cached()
+        if response.get('status') != -1:
+            with self._lock:
+                catalogs = list(self._assignment_catalogs.values())
+            for catalog in catalogs:
+                catalog.remove(assignment_id)
+        return response
 
     def set_grade(
             self,
@@ -523,18 +834,22 @@ class GradeBook(Base):
             student_id,
             grade_value,
             assignment_id)
-        return self.post(
-            'grades/{gradebookId}'.format(
-                gradebookId=gradebook_id or self.gradebook_id
-            ),
-            data=grade_info,
-        )
+        gradebook_id = gradebook_id or self.gradebook_id
+        try:
+            return self.post(
+                'grades/{gradebookId}'.format(gradebookId=gradebook_id),
+                data=grade_info,
+            )
+        finally:
+            self._invalidate_cached(gradebook_id)
 
     def multi_grade(self, grade_array, gradebook_id=''):
         """Set multiple grades for students.
 
         Set multiple student grades for a gradebook.  The grades are passed
-        as a list of dictionaries.
+        as a list of dictionaries, or, for large uploads, as
+        :py:class:`pylmod.records.GradeColumns`, which are sent without
+        making a dictionary per grade.
 
         Each grade dictionary in ``grade_array`` must contain a
         ``studentId`` and a ``assignmentId``.
@@ -589,7 +904,8 @@ class GradeBook(Base):
             ]
 
         Args:
-            grade_array (dict): an array of grades to save
+            grade_array (list): an array of grades to save, or
+                :py:class:`pylmod.records.GradeColumns`
             gradebook_id (str): unique identifier for gradebook, i.e. ``2314``
 
         Raises:
@@ -601,12 +917,113 @@ class GradeBook(Base):
 
         """
         log.info('Sending grades: %r', grade_array)
-        return self.post(
-            'multiGrades/{gradebookId}'.format(
-                gradebookId=gradebook_id or self.gradebook_id
-            ),
-            data=grade_array,
+        gradebook_id = gradebook_id or self.gradebook_id
+        data = grade_array
+        if isinstance(grade_array, GradeColumns):
+            data = grade_array.encode()
+        try:
+            return self.post(
+                'multiGrades/{gradebookId}'.format(gradebookId=gradebook_id),
+                data=data,
+            )
+        finally:
+            self._invalidate_cached(gradebook_id)
+
+    def multi_grade_chunked(
+            self,
+            grade_array,
+            gradebook_id='',
+            batch_size=DEFAULT_BATCH_SIZE,
+            max_workers=DEFAULT_MAX_WORKERS
+    ):
+        """Set multiple grades for students in concurrent batches.
+
+        Split ``grade_array`` into chunks of ``batch_size`` grades and
+        send each chunk with ``multi_grade()``, running up to
+        ``max_workers`` requests at a time. A chunk that fails, either
+        because the request raised, including with an open
+        ``circuit_breaker`` or a passed deadline, or because the service
+        returned a ``status`` of ``-1``, doesn't stop the other chunks;
+        its grades are collected in ``failed_rows`` of the result so
+        only those need to be sent again.
+
+        Args:
+            grade_array (list): an array of grades to save, in the
+                format accepted by ``multi_grade()``. Chunks, and the
+                ``failed_rows`` of the result, are slices of it.
+            gradebook_id (str): unique identifier for gradebook, i.e. ``2314``
+            batch_size (int): maximum number of grades per request,
+                default= ``DEFAULT_BATCH_SIZE``
+            max_workers (int): maximum number of concurrent requests,
+                default= ``DEFAULT_MAX_WORKERS``
+
+        Raises:
+            ValueError: ``batch_size`` or ``max_workers`` is less than 1
+
+        Returns:
+            MultiGradeResult: per chunk status, duration and failed rows
+
+            .. code-block:: python
+
+                result = gradebook.multi_grade_chunked(grades, batch_size=500)
+                if result.status != 1:
+                    result = gradebook.multi_grade_chunked(result.failed_rows)
+
+        """
+        # pylint: disable=too-many-arguments
+        if batch_size < 1:
+            raise ValueError('batch_size must be at least 1')
+        if max_workers < 1:
+            raise ValueError('max_workers must be at least 1')
+        gradebook_id = gradebook_id or self.gradebook_id
+
+        def send_chunk(index, start, stop):
+            """Send one chunk of grades and record the outcome."""
+            rows = grade_array[start:stop]
+            tstart = time.time()
+            try:
+                response = self.multi_grade(rows, gradebook_id=gradebook_id)
+            except (
+                    requests.RequestException, ValueError, PyLmodException
+            ) as err:
+                log.exception(
+                    'multiGrades chunk %d (grades %d-%d) failed, err=%s',
+                    index, start, stop, err
+                )
+                return ChunkResult(
+                    index, start, stop, -1, time.time() - tstart,
+                    None, err, rows
+                )
+            duration = time.time() - tstart
+            if isinstance(response, dict) and response.get('status') == -1:
+                log.error(
+                    'multiGrades chunk %d (grades %d-%d) rejected: %s',
+                    index, start, stop, response.get('message')
+                )
+                return ChunkResult(
+                    index, start, stop, -1, duration, response, None, rows
+                )
+            return ChunkResult(
+                index, start, stop, 1, duration, response, None, []
+            )
+
+        bounds = [
+            (index, start, min(start + batch_size, len(grade_array)))
+            for index, start in enumerate(
+                range(0, len(grade_array), batch_size)
+            )
+        ]
+        log.info(
+            'Sending %d grades in %d chunks with %d workers',
+            len(grade_array), len(bounds), max_workers
         )
+        tstart = time.time()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(send_chunk, *bound) for bound in bounds
+            ]
+            chunks = [future.result() for future in futures]
+        return MultiGradeResult(chunks, time.time() - tstart)
 
     def get_sections(self, gradebook_id='', simple=False):
         """Get the sections for a gradebook.
@@ -668,11 +1085,12 @@ class GradeBook(Base):
         """
         params = dict(includeMembers='false')
 
-        section_data = self.get(
-            'sections/{gradebookId}'.format(
-                gradebookId=gradebook_id or self.gradebook_id
-            ),
-            params=params
+        gradebook_id = gradebook_id or self.gradebook_id
+        section_data = self._cached_get(
+            'sections',
+            'sections/{gradebookId}'.format(gradebookId=gradebook_id),
+            params=params,
+            gradebook_id=gradebook_id,
         )
 
         if simple:
@@ -728,7 +1146,8 @@ class GradeBook(Base):
             include_photo=False,
             include_grade_info=False,
             include_grade_history=False,
-            include_makeup_grades=False
+            include_makeup_grades=False,
+            compact=False
     ):
         """Get students for a gradebook.
 
@@ -748,6 +1167,9 @@ class GradeBook(Base):
                 include student's grade history, default= ``False``
             include_makeup_grades (bool):
                 include student's makeup grades, default= ``False``
+            compact (bool): return :py:class:`pylmod.records.Student`
+                records, which keep the common fields in a fraction of
+                the memory, default= ``False``
 
         Raises:
             requests.RequestException: Exception connection error
@@ -778,10 +1200,109 @@ class GradeBook(Base):
 
         """
         # These are parameters required for the remote API call, so
-        # there aren't too many arguments, or too many variables
-        # pylint: disable=too-many-arguments,too-many-locals
+        # there aren't too many arguments
+        # pylint: disable=too-many-arguments
+        service, params, gradebook_id = self._students_request(
+            gradebook_id, section_name, include_photo, include_grade_info,
+            include_grade_history, include_makeup_grades
+        )
+        student_data = self._cached_get(
+            'students', service, params=params, gradebook_id=gradebook_id
+        )
+
+        if simple:
+            return self._simplify_students(student_data['data'])
+        if compact:
+            return [Student.from_dict(x) for x in student_data['data']]
+
+        return student_data['data']
+
+    def iter_students(
+            self,
+            gradebook_id='',
+            simple=False,
+            section_name='',
+            include_photo=False,
+            include_grade_info=False,
+            include_grade_history=False,
+            include_makeup_grades=False
+    ):
+        """Iterate over the students of a gradebook as they are received.
+
+        Takes the same arguments and yields the same student dictionaries
+        as ``get_students()`` returns, but parses the response as it is
+        streamed, so only one student is held in memory at a time. Use
+        it for large rosters with ``include_grade_history`` or
+        ``include_photo``:
+
+        .. code-block:: python
+
+            for student in gradebook.iter_students(
+                    include_grade_history=True
+            ):
+                process(student)
+
+        The request is made when iteration starts, and the response
+        cache isn't used.
+
+        Args:
+            gradebook_id (str): unique identifier for gradebook, i.e. ``2314``
+            simple (bool):
+                if ``True``, yield dictionaries with keys ``email``,
+                ``name``, ``section``, default = ``False``
+            section_name (str): section name
+            include_photo (bool): include student photo, default= ``False``
+            include_grade_info (bool):
+                include student's grade info, default= ``False``
+            include_grade_history (bool):
+                include student's grade history, default= ``False``
+            include_makeup_grades (bool):
+                include student's makeup grades, default= ``False``
+
+        Raises:
+            requests.RequestException: Exception connection error
+            ValueError: Unable to decode response content
+            PyLmodNoSuchSection: No section named ``section_name``
+
+        Yields:
+            dict: student dictionary
+        """
+        # pylint: disable=too-many-arguments
+        service, params, _ = self._students_request(
+            gradebook_id, section_name, include_photo, include_grade_info,
+            include_grade_history, include_makeup_grades
+        )
+        for student in self.iter_get(service, params=params):
+            if simple:
+                student = self._simplify_student(student)
+            yield student
+
+    def _students_request(
+            self,
+            gradebook_id,
+            section_name,
+            include_photo,
+            include_grade_info,
+            include_grade_history,
+            include_makeup_grades
+    ):
+        """Get the service and parameters of a request for students.
+
+        Args:
+            gradebook_id (str): unique identifier for gradebook
+            section_name (str): section name, or ``''`` for all students
+            include_photo (bool): include student photo
+            include_grade_info (bool): include student's grade info
+            include_grade_history (bool): include student's grade history
+            include_makeup_grades (bool): include student's makeup grades
+
+        Raises:
+            PyLmodNoSuchSection: No section named ``section_name``
 
-        # Set params by arguments
+        Returns:
+            tuple: service, parameters and gradebook id of the request
+        """
+        # pylint: disable=too-many-arguments
         params = dict(
             includePhoto=json.dumps(include_photo),
             includeGradeInfo=json.dumps(include_grade_info),
@@ -801,41 +1322,170 @@ class GradeBook(Base):
                 raise PyLmodNoSuchSection(failure_message)
             url += '/section/{0}'.format(group_id)
 
-        student_data = self.get(
-            url.format(
-                gradebookId=gradebook_id or self.gradebook_id
-            ),
-            params=params,
+        gradebook_id = gradebook_id or self.gradebook_id
+        return url.format(gradebookId=gradebook_id), params, gradebook_id
+
+    @staticmethod
+    def _simplify_student(student):
+        """Reduce a student to the ``simple=True`` form of ``get_students``.
+
+        The mit.edu domain for user email must be upper-case,
+        i.e. MIT.EDU.
+
+        Args:
+            student (dict): student dictionary
+
+        Returns:
+            dict: dictionary with keys ``email``, ``name`` and ``section``
+        """
+        return dict(
+            email=StudentIndex.certificate_email(student['accountEmail']),
+            name=student['displayName'],
+            section=student['section'],
         )
 
-        if simple:
-            # just return dict with keys email, name, section
-            student_map = dict(
-                accountEmail='email',
-                displayName='name',
-                section='section'
+    @staticmethod
+    def _simplify_students(students):
+        """Reduce students to the ``simple=True`` form of ``get_students``.
+
+        Args:
+            students (list): list of student dictionaries
+
+        Returns:
+            list: list of dictionaries with keys ``email``, ``name``
+            and ``section``
+        """
+        return [GradeBook._simplify_student(x) for x in students]
+
+    def get_grade_matrix(self, gradebook_id='', section_name=''):
+        """Get the numeric grades of a gradebook as a ``numpy`` array.
+
+        Students, with their grade info, and assignments are retrieved
+        and laid out as a students x assignments matrix, so that
+        statistics are computed with ``numpy`` rather than by looping
+        over dictionaries:
+
+        .. code-block:: python
+
+            matrix = gradebook.get_grade_matrix()
+            averages = numpy.nanmean(matrix.grades, axis=0)
+            for assignment_id, average in zip(
+                    matrix.assignment_ids, averages
+            ):
+                ...
+
+        Rows are in roster order and columns in the order of
+        ``get_assignments()``. Grades that are missing, excused
+        (``specialGradeValue`` of ``x``) or not numeric are ``NaN``.
+
+        ``numpy`` is an optional dependency, installed with
+        ``pip install pylmod[numpy]``.
+
+        Args:
+            gradebook_id (str): unique identifier for gradebook, i.e. ``2314``
+            section_name (str): only include the students of a section
+
+        Raises:
+            ImportError: numpy isn't installed
+            requests.RequestException: Exception connection error
+            ValueError: Unable to decode response content
+            PyLmodNoSuchSection: No section named ``section_name``
+
+        Returns:
+            GradeMatrix: grades with the student and assignment ids of
+            the rows and columns
+        """
+        # pylint: disable=too-many-locals
+        import numpy  # pylint: disable=import-outside-toplevel
+        assignment_ids = [
+            x['assignmentId'] for x in self.get_assignments(
+                gradebook_id=gradebook_id, max_points=False
             )
+        ]
+        students = self.get_students(
+            gradebook_id=gradebook_id, section_name=section_name,
+            include_grade_info=True
+        )
+        # Ids are given as both numbers and strings
+        columns = dict(
+            (str(assignment_id), column)
+            for column, assignment_id in enumerate(assignment_ids)
+        )
+        rows, cols, values = [], [], []
+        for row, student in enumerate(students):
+            for grade in self._student_grades(student):
+                column = columns.get(str(grade.get('assignmentId')))
+                value = grade.get('numericGradeValue')
+                if (column is None or value is None or
+                        grade.get('specialGradeValue') == 'x'):
+                    continue
+                try:
+                    value = float(value)
+                except (TypeError, ValueError):
+                    continue
+                rows.append(row)
+                cols.append(column)
+                values.append(value)
+        grades = numpy.full((len(students), len(assignment_ids)), numpy.nan)
+        grades[
+            numpy.array(rows, dtype=numpy.intp),
+            numpy.array(cols, dtype=numpy.intp)
+        ] = values
+        return GradeMatrix(
+            grades,
+            numpy.array([x['studentId'] for x in students], dtype=numpy.int64),
+            numpy.array(assignment_ids, dtype=numpy.int64),
+        )
+
+    @staticmethod
+    def _student_grades(student):
+        """Get the grades in the grade info of a student.
 
-            def remap(students):
-                """Convert mit.edu domain to upper-case for student emails.
+        Args:
+            student (dict): student dictionary from
+                ``get_students(include_grade_info=True)``
 
-                The mit.edu domain for user email must be upper-case,
-                i.e. MIT.EDU.
+        Returns:
+            list: grade dictionaries, with an ``assignmentId``
+        """
+        info = student.get('studentAssignmentInfo') or []
+        if isinstance(info, dict):
+            # Keyed by assignment id
+            grades = []
+            for assignment_id, grade in info.items():
+                if isinstance(grade, dict):
+                    grade = dict(grade)
+                    grade.setdefault('assignmentId', assignment_id)
+                    grades.append(grade)
+            return grades
+        return [x for x in info if isinstance(x, dict)]
+
+    def get_student_index(self, gradebook_id='', students=None):
+        """Get an index of students by email and student id.
 
-                Args:
-                    students (list): list of students
+        Calls ``self.get_students()`` to get list of all students,
+        if not passed as the ``students`` parameter. The returned
+        index should be reused for repeated lookups against the same
+        roster.
 
-                Returns:
-                    dict: dictionary of updated student email domains
-                """
-                newx = dict((student_map[k], students[k]) for k in student_map)
-                # match certs
-                newx['email'] = newx['email'].replace('@mit.edu', '@MIT.EDU')
-                return newx
+        Args:
+            gradebook_id (str): unique identifier for gradebook, i.e. ``2314``
+            students (list): list of students to index, default: None
+                When ``students`` is unspecified, all students in gradebook
+                are retrieved.
 
-            return [remap(x) for x in student_data['data']]
+        Raises:
+            requests.RequestException: Exception connection error
+            ValueError: Unable to decode response content
 
-        return student_data['data']
+        Returns:
+            pylmod.catalog.StudentIndex: index over the students
+        """
+        if students is None:
+            students = self.get_students(gradebook_id=gradebook_id)
+        if isinstance(students, StudentIndex):
+            return students
+        return StudentIndex(students)
 
     def get_student_by_email(self, email, students=None):
         """Get a student based on an email address.
@@ -847,7 +1497,8 @@ class GradeBook(Base):
             email (str): student email
             students (list): dictionary of students to search, default: None
                 When ``students`` is unspecified, all students in gradebook
-                are retrieved.
+                are retrieved. A :py:class:`pylmod.catalog.StudentIndex`
+                may be passed to avoid scanning the roster on every call.
 
         Raises:
             requests.RequestException: Exception connection error
@@ -856,14 +1507,7 @@ class GradeBook(Base):
         Returns:
             tuple: tuple of student id and student dictionary.
         """
-        if students is None:
-            students = self.get_students()
-
-        email = email.lower()
-        for student in students:
-            if student['accountEmail'].lower() == email:
-                return student['studentId'], student
-        return None, None
+        return self.get_student_index(students=students).get_by_email(email)
 
     def _spreadsheet2gradebook_multi(
             self,
@@ -920,10 +1564,18 @@ class GradeBook(Base):
                     "if use_max_points_column is set"
                 )
 
-        assignments = self.get_assignments()
-        students = self.get_students()
+        # A catalog held from an earlier upload may be missing
+        # assignments created elsewhere since, so it is refreshed once
+        # before creating a missing assignment.
+        held = self._assignment_catalogs.get(
+            self._catalog_key(self.gradebook_id)
+        )
+        assignments = self.get_assignment_catalog()
+        catalog_is_stale = assignments is held
+        students = self.get_student_index()
         assignment2id = {}
-        grade_array = []
+        # Grades are kept in arrays rather than as a dictionary each
+        grade_array = GradeColumns()
         for row in csv_reader:
             email = row[email_field]
             sid, _ = self.get_student_by_email(email, students)
@@ -937,9 +1589,13 @@ class GradeBook(Base):
                 if field in non_assignment_fields:
                     continue
                 if field not in assignment2id:
-                    assignment_id, _ = self.get_assignment_by_name(
-                        field, assignments=assignments
-                    )
+                    assignment_id, _ = assignments.by_name(field)
+                    if assignment_id is None and catalog_is_stale:
+                        assignments = self.get_assignment_catalog(
+                            refresh=True
+                        )
+                        catalog_is_stale = False
+                        assignment_id, _ = assignments.by_name(field)
                     # If no assignment found, try creating it.
                     if assignment_id is None:
                         name = field
@@ -1028,13 +1684,9 @@ class GradeBook(Base):
                     )
                     successful = False
                 if successful:
-                    grade_array.append({
-                        "studentId": sid,
-                        "assignmentId": assignment_id,
-                        "numericGradeValue": gradeval,
-                        "mode": 2,
-                        "isGradeApproved": approve_grades
-                    })
+                    grade_array.append(
+                        sid, assignment_id, gradeval, 2, approve_grades
+                    )
         # Everything is setup to post, do the post and track the time
         # it takes.
         log.info(
@@ -1057,7 +1709,8 @@ class GradeBook(Base):
             approve_grades=False,
             use_max_points_column=False,
             max_points_column=None,
-            normalize_column=None
+            normalize_column=None,
+            deadline=None
     ):
         """Upload grade spreadsheet to gradebook.
 
@@ -1095,9 +1748,12 @@ class GradeBook(Base):
                 the assignment.
             normalize_column (str): The name of the normalize column which
                 indicates whether to use the max points value.
+            deadline (float): seconds the whole upload may take, default
+                is no limit, see :py:meth:`pylmod.base.Base.with_deadline`
 
         Raises:
             PyLmodFailedAssignmentCreation: Failed to create assignment
+            PyLmodDeadlineExceeded: The upload ran out of time
             requests.RequestException: Exception connection error
             ValueError: Unable to decode response content
 
@@ -1125,7 +1781,8 @@ class GradeBook(Base):
             file_pointer = csv_file
         csv_reader = csv.DictReader(file_pointer, dialect='excel')
 
-        response = self._spreadsheet2gradebook_multi(
+        client = self if deadline is None else self.with_deadline(deadline)
+        response = client._spreadsheet2gradebook_multi(
             csv_reader,
             email_field,
             non_assignment_fields,
@@ -1213,20 +1870,33 @@ class GradeBook(Base):
 
 
         """
-        staff_data = self.get(
-            'staff/{gradebookId}'.format(
-                gradebookId=gradebook_id or self.gradebook_id
-            ),
-            params=None,
+        gradebook_id = gradebook_id or self.gradebook_id
+        staff_data = self._cached_get(
+            'staff',
+            'staff/{gradebookId}'.format(gradebookId=gradebook_id),
+            gradebook_id=gradebook_id,
         )
         if simple:
-            simple_list = []
-            unraveled_list = self.unravel_staff(staff_data)
-            for member in unraveled_list.__iter__():
-                simple_list.append({
-                    'accountEmail': member['accountEmail'],
-                    'displayName': member['displayName'],
-                    'role': member['role'],
-                })
-            return simple_list
+            return self._simplify_staff(staff_data)
         return staff_data['data']
+
+    @classmethod
+    def _simplify_staff(cls, staff_data):
+        """Reduce staff to the ``simple=True`` form of ``get_staff``.
+
+        Args:
+            staff_data(dict): Data return from py:method::get_staff
+
+        Returns:
+            list: list of dictionaries with keys ``accountEmail``,
+            ``displayName`` and ``role``
+        """
+        simple_list = []
+        unraveled_list = cls.unravel_staff(staff_data)
+        for member in unraveled_list.__iter__():
+            simple_list.append({
+                'accountEmail': member['accountEmail'],
+                'displayName': member['displayName'],
+                'role': member['role'],
+            })
+        return simple_list
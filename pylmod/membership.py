@@ -2,8 +2,12 @@
 Contains Membership class
 """
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from pylmod.exceptions import PyLmodUnexpectedData
-from pylmod.base import Base
+from pylmod.base import Base, DEFAULT_MAX_WORKERS
+from pylmod.catalog import MembershipIndex
 
 log = logging.getLogger(__name__)  # pylint: disable=invalid-name
 
@@ -15,19 +19,104 @@ class Membership(Base):
     API reference at
     https://learning-modules-dev.mit.edu/service/membership/doc.html
     """
+    #: uuid of the course used when a method isn't passed one, i.e.
+    #: ``/project/mitxdemosite``
+    uuid = None
+
+    _course_id = None
+
+    #: Seconds a membership snapshot is used before it is fetched again
+    MEMBERSHIP_SNAPSHOT_TTL = 300
+
     def __init__(
             self,
             cert,
             urlbase='https://learning-modules.mit.edu:8443/',
-            uuid=None
+            uuid=None,
+            **kwargs
     ):
-        super(Membership, self).__init__(cert, urlbase)
+        super(Membership, self).__init__(cert, urlbase, **kwargs)
         # Add service base
         self.urlbase += 'service/membership/'
-        self.course_id = None
+        # Resolved on first use, so making a client is free
         self.uuid = uuid
-        if uuid is not None:
-            self.course_id = self.get_course_id(uuid)
+        # Membership snapshots by course uuid, see get_membership_snapshot
+        self._membership_snapshots = {}
+
+    @property
+    def course_id(self):
+        """int: Course used when a method isn't passed a ``course_id``.
+        Unless set, it is resolved from ``uuid`` when first used, which
+        may raise the errors of :py:meth:`get_course_id`."""
+        if self._course_id is None and self.uuid is not None:
+            return self._resolve_id(
+                'course', self.uuid, self.get_course_id
+            )
+        return self._course_id
+
+    @course_id.setter
+    def course_id(self, value):
+        self._course_id = value
+
+    def prefetch_course_ids(self, uuids, max_workers=DEFAULT_MAX_WORKERS):
+        """Resolve the ids of many courses concurrently.
+
+        The ids are kept, so that clients bound to the courses with
+        :py:meth:`for_course` don't resolve them again.
+
+        Args:
+            uuids (iterable): course uuids, i.e. ``/project/mitxdemosite``
+            max_workers (int): maximum number of concurrent requests
+
+        Raises:
+            ValueError: ``max_workers`` is less than 1
+            PyLmodUnexpectedData: No course data was returned.
+            requests.RequestException: Exception connection error
+
+        Returns:
+            dict: course ids by uuid
+        """
+        return self._prefetch_ids(
+            'course', uuids, self.get_course_id, max_workers
+        )
+
+    def prefetch_group_ids(self, uuids, max_workers=DEFAULT_MAX_WORKERS):
+        """Resolve the group ids of many courses concurrently.
+
+        The ids are kept, so that :py:meth:`get_membership` and
+        :py:meth:`email_has_role` don't resolve them again.
+
+        Args:
+            uuids (iterable): course uuids, i.e. ``/project/mitxdemosite``
+            max_workers (int): maximum number of concurrent requests
+
+        Raises:
+            ValueError: ``max_workers`` is less than 1
+            PyLmodUnexpectedData: No group data was returned.
+            requests.RequestException: Exception connection error
+
+        Returns:
+            dict: group ids by uuid
+        """
+        return self._prefetch_ids(
+            'group', uuids, self.get_group_id, max_workers
+        )
+
+    def for_course(self, uuid):
+        """Get a copy of this Membership bound to another course.
+
+        The copy shares the connection pool, policies and hooks of this
+        instance, so one client can be used from many threads, each
+        working on its own course.
+
+        Args:
+            uuid (str): course uuid, i.e. /project/mitxdemosite, whose
+                course id is resolved on first use
+
+        Returns:
+            Membership: copy with ``uuid`` set
+        """
+        return self._clone(uuid=uuid, course_id=None)
 
     def get_group(self, uuid=None):
         """Get group data based on uuid.
@@ -63,6 +152,21 @@ class Membership(Base):
 
         """
         group_data = self.get_group(uuid)
+        return self._group_id_from_response(group_data)
+
+    @staticmethod
+    def _group_id_from_response(group_data):
+        """Extract the group id from a ``group`` response.
+
+        Args:
+            group_data (dict): group json
+
+        Raises:
+            PyLmodUnexpectedData: No group data was returned.
+
+        Returns:
+            int: numeric group id
+        """
         try:
             return group_data['response']['docs'][0]['id']
         except (KeyError, IndexError):
@@ -85,45 +189,235 @@ class Membership(Base):
             dict: membership json
 
         """
-        group_id = self.get_group_id(uuid=uuid)
+        if uuid is None:
+            uuid = self.uuid
+        if uuid is None:
+            group_id = self.get_group_id(uuid=uuid)
+        else:
+            group_id = self._resolve_id('group', uuid, self.get_group_id)
         uri = 'group/{group_id}/member'
         mbr_data = self.get(uri.format(group_id=group_id), params=None)
         return mbr_data
 
-    def email_has_role(self, email, role_name, uuid=None):
+    def get_membership_snapshot(self, uuid=None, refresh=False):
+        """Get an index of the members of a course and their roles.
+
+        The members are retrieved from the service on first use and
+        kept for ``MEMBERSHIP_SNAPSHOT_TTL`` seconds, so that role
+        checks don't each cost a call to the service. Changes made to
+        the membership are only seen once it is fetched again:
+
+        .. code-block:: python
+
+            snapshot = membership.get_membership_snapshot()
+            for email in emails:
+                snapshot.has_role(email, 'Instructor')
+
+        Args:
+            uuid (str): optional uuid. defaults to self.cuuid
+            refresh (bool): retrieve the members from the service even
+                if a snapshot is already held, default= ``False``
+
+        Raises:
+            PyLmodUnexpectedData: Unexpected data was returned.
+            requests.RequestException: Exception connection error
+
+        Returns:
+            pylmod.catalog.MembershipIndex: members of the course
+        """
+        if uuid is None:
+            uuid = self.uuid
+        snapshot = self._membership_snapshots.get(uuid)
+        if snapshot is not None and (
+                time.monotonic() - snapshot.built >
+                self.MEMBERSHIP_SNAPSHOT_TTL
+        ):
+            refresh = True
+        if snapshot is None or refresh:
+            snapshot = MembershipIndex(
+                self._membership_docs(self.get_membership(uuid=uuid)),
+                uuid=uuid
+            )
+            with self._lock:
+                if refresh:
+                    self._membership_snapshots[uuid] = snapshot
+                else:
+                    # Keep a snapshot another thread fetched meanwhile
+                    snapshot = self._membership_snapshots.setdefault(
+                        uuid, snapshot
+                    )
+        return snapshot
+
+    def email_has_role(self, email, role_name, uuid=None, deadline=None):
         """Determine if an email is associated with a role.
 
+        The answer comes from the snapshot of the course's members, see
+        :py:meth:`get_membership_snapshot`.
+
         Args:
             email (str): user email
             role_name (str): user role
             uuid (str): optional uuid. defaults to self.cuuid
+            deadline (float): seconds the lookup may take, default is
+                no limit, see :py:meth:`pylmod.base.Base.with_deadline`
 
         Raises:
             PyLmodUnexpectedData: Unexpected data was returned.
+            PyLmodDeadlineExceeded: The lookup ran out of time
             requests.RequestException: Exception connection error
 
         Returns:
             bool: True or False if email has role_name
 
         """
-        mbr_data = self.get_membership(uuid=uuid)
-        docs = []
+        client = self if deadline is None else self.with_deadline(deadline)
+        snapshot = client.get_membership_snapshot(uuid=uuid)
+        return snapshot.has_role(email, role_name)
+
+    def roles_for_emails(self, emails, uuid=None, deadline=None):
+        """Get the roles of many emails in a course.
+
+        The answers come from the snapshot of the course's members, see
+        :py:meth:`get_membership_snapshot`.
+
+        Args:
+            emails (iterable): user emails
+            uuid (str): optional uuid. defaults to self.cuuid
+            deadline (float): seconds the lookup may take, default is
+                no limit, see :py:meth:`pylmod.base.Base.with_deadline`
+
+        Raises:
+            PyLmodUnexpectedData: Unexpected data was returned.
+            PyLmodDeadlineExceeded: The lookup ran out of time
+            requests.RequestException: Exception connection error
+
+        Returns:
+            dict: roles, as a ``frozenset``, by email, empty for emails
+            that aren't members
+
+            An example return value is:
+
+            .. code-block:: python
+
+                {
+                    'huey@example.com': frozenset(['TA']),
+                    'louie@example.com': frozenset(),
+                }
+        """
+        client = self if deadline is None else self.with_deadline(deadline)
+        snapshot = client.get_membership_snapshot(uuid=uuid)
+        return snapshot.roles_for_emails(emails)
+
+    def roles_by_course(
+            self, uuids, emails, role_names=None,
+            max_workers=DEFAULT_MAX_WORKERS, deadline=None
+    ):
+        """Get the roles of many emails in many courses.
+
+        The group ids of the courses are resolved concurrently, then
+        their membership snapshots, see
+        :py:meth:`get_membership_snapshot`, are fetched by up to
+        ``max_workers`` threads, and the emails are looked up in memory:
+
+        .. code-block:: python
+
+            staff = membership.roles_by_course(
+                course_uuids, emails, role_names=('Instructor', 'TA'),
+                max_workers=8
+            )
+            staff.get(email, {})  # roles by course uuid
+
+        Args:
+            uuids (iterable): course uuids, i.e. ``/project/mitxdemosite``
+            emails (iterable): user emails
+            role_names (iterable): only report these roles, i.e.
+                ``('Instructor', 'TA')``, default is every role
+            max_workers (int): maximum number of concurrent requests
+            deadline (float): seconds the lookups may take, default is
+                no limit, see :py:meth:`pylmod.base.Base.with_deadline`
+
+        Raises:
+            ValueError: ``max_workers`` is less than 1
+            PyLmodUnexpectedData: Unexpected data was returned.
+            PyLmodDeadlineExceeded: The lookups ran out of time
+            requests.RequestException: Exception connection error
+
+        Returns:
+            dict: roles, as a ``frozenset``, by course uuid, by email.
+            Only emails with a role in some course are included, and
+            only the courses in which they have one.
+
+            An example return value is:
+
+            .. code-block:: python
+
+                {
+                    'huey@example.com': {
+                        '/project/mitxdemosite': frozenset(['TA']),
+                    },
+                }
+        """
+        # pylint: disable=too-many-arguments
+        client = self if deadline is None else self.with_deadline(deadline)
+        uuids = list(dict.fromkeys(uuids))
+        if role_names is not None:
+            role_names = frozenset(role_names)
+        client.prefetch_group_ids(uuids, max_workers=max_workers)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            snapshots = list(executor.map(
+                lambda uuid: client.get_membership_snapshot(uuid=uuid), uuids
+            ))
+        roles = {}
+        emails = frozenset(emails)
+        for uuid, snapshot in zip(uuids, snapshots):
+            for email in emails.intersection(snapshot):
+                email_roles = snapshot.roles(email)
+                if role_names is not None:
+                    email_roles &= role_names
+                if email_roles:
+                    roles.setdefault(email, {})[uuid] = email_roles
+        return roles
+
+    @staticmethod
+    def _membership_docs(mbr_data):
+        """Get the members from membership data.
+
+        Args:
+            mbr_data (dict): membership json
+
+        Raises:
+            PyLmodUnexpectedData: Unexpected data was returned.
+
+        Returns:
+            list: member dictionaries
+        """
         try:
-            docs = mbr_data['response']['docs']
+            return mbr_data['response']['docs']
         except KeyError:
             failure_message = ('KeyError in membership data - '
                                'got {0}'.format(mbr_data))
             log.exception(failure_message)
             raise PyLmodUnexpectedData(failure_message)
-        if len(docs) == 0:
-            return False
-        has_role = any(
+
+    @classmethod
+    def _membership_has_role(cls, mbr_data, email, role_name):
+        """Determine if membership data associates an email with a role.
+
+        Args:
+            mbr_data (dict): membership json
+            email (str): user email
+            role_name (str): user role
+
+        Raises:
+            PyLmodUnexpectedData: Unexpected data was returned.
+
+        Returns:
+            bool: True or False if email has role_name
+        """
+        return any(
             (x.get('email') == email and x.get('roleType') == role_name)
-            for x in docs
+            for x in cls._membership_docs(mbr_data)
         )
-        if has_role:
-            return True
-        return False
 
     def get_course_id(self, course_uuid):
         """Get course id based on uuid.
@@ -145,6 +439,21 @@ class Membership(Base):
             ),
             params=None
         )
+        return self._course_id_from_response(course_data)
+
+    @staticmethod
+    def _course_id_from_response(course_data):
+        """Extract the course id from a ``courseguide/course`` response.
+
+        Args:
+            course_data (dict): course json
+
+        Raises:
+            PyLmodUnexpectedData: No course data was returned.
+
+        Returns:
+            int: numeric course id
+        """
         try:
             return course_data['response']['docs'][0]['id']
         except KeyError:
@@ -0,0 +1,282 @@
+"""
+Prometheus metrics of the requests made to the MIT Learning Modules Web
+service.
+"""
+import bisect
+import logging
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+#: Upper bounds of the request latency histogram buckets, seconds
+DEFAULT_BUCKETS = (
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0
+)
+
+#: Content type of the Prometheus text exposition format
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _labels(**labels):
+    """Format labels, i.e. ``{endpoint="students/{id}",method="GET"}``.
+
+    Args:
+        labels (dict): label values by name
+
+    Returns:
+        str: the labels in the text format
+    """
+    return '{' + ','.join(
+        '{0}="{1}"'.format(name, str(value).replace('\\', r'\\').replace(
+            '"', r'\"').replace('\n', r'\n'))
+        for name, value in sorted(labels.items())
+    ) + '}'
+
+
+class MetricsCollector(object):
+    """
+    Collects metrics of requests from the hooks of clients.
+
+    Attach the collector to the clients to watch, and export the
+    metrics in the Prometheus text format, either from a local HTTP
+    endpoint or to a file for the node exporter's textfile collector:
+
+    .. code-block:: python
+
+        metrics = MetricsCollector()
+        metrics.attach(gradebook)
+        metrics.attach(membership)
+        server = metrics.serve(port=9464)
+        # or, i.e. after each batch
+        metrics.write('/var/lib/node_exporter/pylmod.prom')
+
+    Requests are labelled with their HTTP method and endpoint template,
+    i.e. ``students/{id}`` or ``group/{id}/member``. The metrics are:
+
+    - ``pylmod_request_duration_seconds`` - histogram of the time taken
+      by requests, retries included
+    - ``pylmod_requests_total`` - requests by response status, ``none``
+      for those that failed
+    - ``pylmod_request_errors_total`` - failed requests by exception type
+    - ``pylmod_request_retries_total`` - retries made
+    - ``pylmod_requests_in_flight`` - requests being made
+    - ``pylmod_cache_lookups_total`` - response cache lookups by result
+
+    Attributes:
+        buckets (tuple): upper bounds of the latency histogram buckets
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """Initialize MetricsCollector instance.
+
+        Args:
+            buckets (tuple): upper bounds of the latency histogram
+                buckets, seconds
+        """
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # (method, endpoint) -> [bucket counts..., count, sum]
+        self._durations = {}
+        # (method, endpoint, status) -> count
+        self._requests = {}
+        # (method, endpoint, exception) -> count
+        self._errors = {}
+        # (method, endpoint) -> count
+        self._retries = {}
+        self._in_flight = {}
+        # (endpoint, result) -> count
+        self._cache = {}
+
+    def attach(self, client):
+        """Collect the metrics of a client's requests.
+
+        Args:
+            client (pylmod.base.Base): client to watch. Copies made
+                after it is attached, i.e. by ``for_gradebook``, share
+                its hooks and are watched too.
+        """
+        client.register_hook('before_request', self.before_request)
+        client.register_hook('request', self.request)
+        client.register_hook('cache', self.cache)
+
+    def detach(self, client):
+        """Stop collecting the metrics of a client's requests.
+
+        Args:
+            client (pylmod.base.Base): client watched
+        """
+        client.deregister_hook('before_request', self.before_request)
+        client.deregister_hook('request', self.request)
+        client.deregister_hook('cache', self.cache)
+
+    def before_request(self, info):
+        """Count a request in flight, from a ``before_request`` event.
+
+        Args:
+            info (dict): details of the event
+        """
+        key = (info['method'], info['endpoint'])
+        with self._lock:
+            self._in_flight[key] = self._in_flight.get(key, 0) + 1
+
+    def request(self, info):
+        """Record a completed request, from a ``request`` event.
+
+        Args:
+            info (dict): details of the event
+        """
+        key = (info['method'], info['endpoint'])
+        status = info['status']
+        error = info.get('error')
+        with self._lock:
+            self._in_flight[key] = self._in_flight.get(key, 0) - 1
+            durations = self._durations.get(key)
+            if durations is None:
+                durations = self._durations[key] = (
+                    [0] * (len(self.buckets) + 2)
+                )
+            durations[bisect.bisect_left(self.buckets, info['duration'])] += 1
+            durations[-1] += info['duration']
+            status_key = key + ('none' if status is None else str(status),)
+            self._requests[status_key] = self._requests.get(status_key, 0) + 1
+            if info['retries']:
+                self._retries[key] = (
+                    self._retries.get(key, 0) + info['retries']
+                )
+            if error is not None:
+                error_key = key + (type(error).__name__,)
+                self._errors[error_key] = self._errors.get(error_key, 0) + 1
+
+    def cache(self, info):
+        """Count a response cache lookup, from a ``cache`` event.
+
+        Args:
+            info (dict): details of the event
+        """
+        key = (info['endpoint'], 'hit' if info['hit'] else 'miss')
+        with self._lock:
+            self._cache[key] = self._cache.get(key, 0) + 1
+
+    def render(self):
+        """Get the metrics in the Prometheus text format.
+
+        Returns:
+            str: the metrics
+        """
+        # pylint: disable=too-many-locals
+        with self._lock:
+            durations = dict(
+                (key, list(value)) for key, value in self._durations.items()
+            )
+            requests = dict(self._requests)
+            errors = dict(self._errors)
+            retries = dict(self._retries)
+            in_flight = dict(self._in_flight)
+            cache = dict(self._cache)
+        lines = [
+            '# HELP pylmod_request_duration_seconds Time taken by '
+            'requests to LMod, retries included.',
+            '# TYPE pylmod_request_duration_seconds histogram',
+        ]
+        for (method, endpoint), counts in sorted(durations.items()):
+            cumulative = 0
+            bounds = [repr(float(bound)) for bound in self.buckets]
+            for bound, count in zip(bounds + ['+Inf'], counts[:-1]):
+                cumulative += count
+                lines.append('pylmod_request_duration_seconds_bucket{0} '
+                             '{1}'.format(_labels(method=method,
+                                                  endpoint=endpoint,
+                                                  le=bound), cumulative))
+            labels = _labels(method=method, endpoint=endpoint)
+            lines.append('pylmod_request_duration_seconds_count{0} '
+                         '{1}'.format(labels, cumulative))
+            lines.append('pylmod_request_duration_seconds_sum{0} '
+                         '{1!r}'.format(labels, counts[-1]))
+        for name, kind, text, samples, label_names in [
+                ('pylmod_requests_total', 'counter',
+                 'Requests to LMod by response status.', requests,
+                 ('method', 'endpoint', 'status')),
+                ('pylmod_request_errors_total', 'counter',
+                 'Failed requests to LMod by exception type.', errors,
+                 ('method', 'endpoint', 'exception')),
+                ('pylmod_request_retries_total', 'counter',
+                 'Retries of requests to LMod.', retries,
+                 ('method', 'endpoint')),
+                ('pylmod_requests_in_flight', 'gauge',
+                 'Requests to LMod being made.', in_flight,
+                 ('method', 'endpoint')),
+                ('pylmod_cache_lookups_total', 'counter',
+                 'Response cache lookups by result.', cache,
+                 ('endpoint', 'result')),
+        ]:
+            lines.append('# HELP {0} {1}'.format(name, text))
+            lines.append('# TYPE {0} {1}'.format(name, kind))
+            for key, value in sorted(samples.items()):
+                lines.append('{0}{1} {2}'.format(
+                    name, _labels(**dict(zip(label_names, key))), value
+                ))
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """Write the metrics to a file, replacing it atomically.
+
+        Args:
+            path (str): file to write, i.e. ``pylmod.prom`` in the
+                directory of the node exporter's textfile collector
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        handle, temp_path = tempfile.mkstemp(
+            dir=directory, prefix='.pylmod', suffix='.tmp'
+        )
+        try:
+            with os.fdopen(handle, 'w') as temp_file:
+                temp_file.write(self.render())
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def serve(self, port=9464, host='127.0.0.1'):
+        """Serve the metrics over HTTP from a background thread.
+
+        Args:
+            port (int): port to listen on, ``0`` for any free port
+            host (str): address to listen on, default is only locally
+
+        Returns:
+            http.server.ThreadingHTTPServer: the server, whose
+            ``server_address`` is where it listens. Stop it with
+            ``shutdown()`` and ``server_close()``.
+        """
+        collector = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """Answer GET requests with the metrics"""
+
+            def do_GET(self):  # pylint: disable=invalid-name
+                """Send the metrics"""
+                if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = collector.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):  # pylint: disable=arguments-differ
+                log.debug('Metrics request %s', args)
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        thread = threading.Thread(
+            target=server.serve_forever, name='pylmod-metrics'
+        )
+        thread.daemon = True
+        thread.start()
+        log.info('Serving PyLmod metrics on %s:%s', *server.server_address)
+        return server
@@ -0,0 +1,248 @@
+"""
+Client-side rate limiting of requests to the MIT Learning Modules Web service.
+"""
+import logging
+import os
+import threading
+import time
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+
+class TokenBucket(object):
+    """
+    Token bucket pacing requests to ``rate`` per second on average.
+
+    The bucket holds up to ``burst`` tokens and refills at ``rate``
+    tokens a second. Every request takes a token, and waits for one when
+    the bucket is empty, so requests may burst up to ``burst`` at once
+    but are otherwise spread out. Waiting requests reserve their tokens
+    in turn, so they are let through in the order they asked.
+
+    A bucket paces every client and thread it is shared by; see
+    :py:class:`FileTokenBucket` to share one between processes.
+
+    Attributes:
+        rate (float): tokens added per second
+        burst (float): maximum number of tokens held
+        waits (int): number of requests that had to wait
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic,
+                 sleep=time.sleep):
+        """Initialize TokenBucket instance.
+
+        Args:
+            rate (float): tokens added per second, i.e. requests per
+                second in the long run
+            burst (float): maximum number of tokens held, i.e. requests
+                let through at once after a quiet period, default is
+                ``rate`` but at least one
+            clock (callable): source of the current time, seconds
+            sleep (callable): sleeps for a number of seconds
+
+        Raises:
+            ValueError: ``rate`` or ``burst`` isn't positive
+        """
+        # pylint: disable=too-many-arguments
+        if burst is None:
+            burst = max(rate, 1)
+        if rate <= 0 or burst <= 0:
+            raise ValueError('rate and burst must be positive')
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.waits = 0
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._stamp = clock()
+
+    def _refill(self, tokens, stamp, now):
+        """Get the tokens held now, from those held at ``stamp``.
+
+        Args:
+            tokens (float): tokens held at ``stamp``, negative when
+                reserved by waiting requests
+            stamp (float): time the tokens were counted
+            now (float): current time
+
+        Returns:
+            float: tokens held at ``now``
+        """
+        return min(self.burst, tokens + max(0.0, now - stamp) * self.rate)
+
+    def reserve(self, tokens=1):
+        """Take tokens, going into debt if there aren't enough.
+
+        Args:
+            tokens (float): tokens to take
+
+        Returns:
+            float: seconds to wait before the tokens are actually
+            available, ``0`` if they are now
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = self._refill(self._tokens, self._stamp, now)
+            self._stamp = now
+            self._tokens -= tokens
+            level = self._tokens
+        return max(0.0, -level / self.rate)
+
+    def acquire(self, tokens=1):
+        """Take tokens, waiting until they are available.
+
+        Args:
+            tokens (float): tokens to take
+
+        Returns:
+            float: seconds waited
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            self.waits += 1
+            self._sleep(wait)
+        return wait
+
+
+class FileTokenBucket(TokenBucket):
+    """
+    Token bucket shared between processes through a file.
+
+    The state of the bucket is kept in ``path`` and updated under an
+    exclusive lock of the file, so that every process opening a bucket
+    with the same path, i.e. parallel grading jobs on one host, is paced
+    by the one rate. The file is created when missing. The wall clock is
+    used, as it is the clock processes share.
+
+    .. code-block:: python
+
+        bucket = FileTokenBucket('/tmp/lmod-writes.bucket', rate=2)
+
+    File locks are only available on POSIX systems.
+    """
+
+    def __init__(self, path, rate, burst=None, clock=time.time,
+                 sleep=time.sleep):
+        """Initialize FileTokenBucket instance.
+
+        Args:
+            path (str): file holding the state of the bucket
+            rate (float): tokens added per second
+            burst (float): maximum number of tokens held
+            clock (callable): source of the current time, seconds,
+                which must be the same for every process
+            sleep (callable): sleeps for a number of seconds
+
+        Raises:
+            ValueError: ``rate`` or ``burst`` isn't positive
+            ImportError: file locks aren't supported on this platform
+        """
+        # pylint: disable=too-many-arguments
+        import fcntl  # pylint: disable=import-outside-toplevel
+        self._fcntl = fcntl
+        super(FileTokenBucket, self).__init__(rate, burst, clock, sleep)
+        self.path = path
+
+    def reserve(self, tokens=1):
+        fcntl = self._fcntl
+        with self._lock:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                now = self._clock()
+                try:
+                    level, stamp = (
+                        float(value)
+                        for value in os.read(fd, 64).decode().split()
+                    )
+                except ValueError:
+                    # A new or corrupt file holds a full bucket
+                    level, stamp = self.burst, now
+                level = self._refill(level, stamp, now) - tokens
+                state = '{0!r} {1!r}'.format(level, now).encode()
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.ftruncate(fd, 0)
+                os.write(fd, state)
+            finally:
+                # Closing the file releases the lock
+                os.close(fd)
+        return max(0.0, -level / self.rate)
+
+
+class RateLimiter(object):
+    """
+    Token buckets by endpoint family.
+
+    Each request takes a token from the bucket of its endpoint, i.e.
+    ``multiGrades``, if there is one, else from the ``read`` bucket for
+    ``GET`` requests or the ``write`` bucket for others. Requests
+    without a bucket aren't limited. Clients sharing a limiter, i.e.
+    several ``GradeBook`` and ``Membership`` instances, are paced
+    together:
+
+    .. code-block:: python
+
+        limiter = RateLimiter(
+            read=TokenBucket(rate=20, burst=40),
+            endpoints={'multiGrades': FileTokenBucket(path, rate=2)},
+        )
+        gradebook = GradeBook(cert, urlbase, rate_limiter=limiter)
+        membership = Membership(cert, urlbase, rate_limiter=limiter)
+
+    Attributes:
+        read (TokenBucket): bucket of ``GET`` requests
+        write (TokenBucket): bucket of other requests
+        endpoints (dict): buckets by endpoint, overriding ``read`` and
+            ``write``
+    """
+
+    def __init__(self, read=None, write=None, endpoints=None):
+        """Initialize RateLimiter instance.
+
+        Args:
+            read (TokenBucket): bucket of ``GET`` requests
+            write (TokenBucket): bucket of other requests
+            endpoints (dict): buckets by endpoint, i.e.
+                ``{'multiGrades': TokenBucket(rate=2)}``
+        """
+        self.read = read
+        self.write = write
+        self.endpoints = dict(endpoints or {})
+
+    def bucket_for(self, method, endpoint):
+        """Get the bucket pacing a request.
+
+        Args:
+            method (str): HTTP method of the request, i.e. ``GET``
+            endpoint (str): endpoint of the request, i.e. ``students``
+
+        Returns:
+            TokenBucket: the bucket, or ``None`` if not limited
+        """
+        bucket = self.endpoints.get(endpoint)
+        if bucket is not None:
+            return bucket
+        if method == 'GET':
+            return self.read
+        return self.write
+
+    def acquire(self, method, endpoint):
+        """Wait for a request to be let through.
+
+        Args:
+            method (str): HTTP method of the request, i.e. ``GET``
+            endpoint (str): endpoint of the request, i.e. ``students``
+
+        Returns:
+            float: seconds waited
+        """
+        bucket = self.bucket_for(method, endpoint)
+        if bucket is None:
+            return 0.0
+        wait = bucket.acquire()
+        if wait:
+            log.debug('Waited %.3fs for a %s %s token', wait, method,
+                      endpoint)
+        return wait
@@ -0,0 +1,351 @@
+"""
+Memory-compact records of gradebook data.
+
+LMod sends students, assignments and grades as JSON objects, which
+Python holds as dictionaries of several hundred bytes each. The records
+here keep only the fields commonly used, in ``__slots__``, and
+:py:class:`GradeColumns` keeps grades in typed arrays, a few dozen
+bytes per grade, for uploads of hundreds of thousands of grades.
+"""
+import logging
+import math
+import numbers
+import operator
+from array import array
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+
+class Record(object):
+    """
+    Base of the compact records.
+
+    Subclasses list their fields in ``FIELDS``, as pairs of attribute
+    name and LMod JSON key, and the same attribute names in
+    ``__slots__``.
+    """
+    __slots__ = ()
+
+    #: Pairs of attribute name and LMod JSON key
+    FIELDS = ()
+
+    def __init__(self, *args, **kwargs):
+        """Initialize a record from its field values, in order or by name.
+
+        Args:
+            args (tuple): field values, in the order of ``FIELDS``
+            kwargs (dict): field values by attribute name, fields not
+                given are ``None``
+
+        Raises:
+            TypeError: too many or unknown fields were given
+        """
+        if len(args) > len(self.FIELDS):
+            raise TypeError('{0} takes at most {1} fields'.format(
+                type(self).__name__, len(self.FIELDS)
+            ))
+        for (name, _), value in zip(self.FIELDS, args):
+            setattr(self, name, value)
+        for name, _ in self.FIELDS[len(args):]:
+            setattr(self, name, kwargs.pop(name, None))
+        if kwargs:
+            raise TypeError('Unknown fields {0}'.format(sorted(kwargs)))
+
+    @classmethod
+    def from_dict(cls, data):
+        """Make a record from an LMod dictionary, dropping other keys.
+
+        Args:
+            data (dict): dictionary as returned by LMod
+
+        Returns:
+            Record: the record
+        """
+        return cls(*[data.get(key) for _, key in cls.FIELDS])
+
+    def to_dict(self):
+        """Get the record as an LMod dictionary.
+
+        Returns:
+            dict: the fields of the record by LMod JSON key
+        """
+        return dict(
+            (key, getattr(self, name)) for name, key in self.FIELDS
+        )
+
+    def _values(self):
+        """Get the values of the fields, in order."""
+        return tuple(getattr(self, name) for name, _ in self.FIELDS)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self._values() == other._values()
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        if equal is NotImplemented:
+            return equal
+        return not equal
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '{0}({1})'.format(type(self).__name__, ', '.join(
+            '{0}={1!r}'.format(name, getattr(self, name))
+            for name, _ in self.FIELDS
+        ))
+
+
+class Student(Record):
+    """A student of a gradebook, see ``get_students(compact=True)``."""
+    __slots__ = (
+        'student_id', 'email', 'display_name', 'section', 'section_id'
+    )
+    FIELDS = (
+        ('student_id', 'studentId'),
+        ('email', 'accountEmail'),
+        ('display_name', 'displayName'),
+        ('section', 'section'),
+        ('section_id', 'sectionId'),
+    )
+
+
+class Assignment(Record):
+    """An assignment of a gradebook, see ``get_assignments(compact=True)``.
+    """
+    __slots__ = (
+        'assignment_id', 'name', 'short_name', 'max_points_total',
+        'weight', 'due_date'
+    )
+    FIELDS = (
+        ('assignment_id', 'assignmentId'),
+        ('name', 'name'),
+        ('short_name', 'shortName'),
+        ('max_points_total', 'maxPointsTotal'),
+        ('weight', 'weight'),
+        ('due_date', 'dueDate'),
+    )
+
+
+class GradeEntry(Record):
+    """A numeric grade, in the form sent by ``multi_grade``."""
+    __slots__ = (
+        'student_id', 'assignment_id', 'numeric_grade_value', 'mode',
+        'is_grade_approved'
+    )
+    FIELDS = (
+        ('student_id', 'studentId'),
+        ('assignment_id', 'assignmentId'),
+        ('numeric_grade_value', 'numericGradeValue'),
+        ('mode', 'mode'),
+        ('is_grade_approved', 'isGradeApproved'),
+    )
+
+
+def _check_integer(name, value, bits):
+    """Check that a value fits a signed integer array of ``bits`` bits.
+
+    Raises:
+        TypeError: the value isn't an integer
+        OverflowError: the value is out of range
+
+    Returns:
+        int: the value
+    """
+    try:
+        value = operator.index(value)
+    except TypeError:
+        raise TypeError(
+            '{0} must be an integer, not {1!r}'.format(name, value)
+        )
+    limit = 1 << (bits - 1)
+    if not -limit <= value < limit:
+        raise OverflowError('{0} {1} is out of range'.format(name, value))
+    return value
+
+
+def _encode_float(value):
+    """Encode a float the way the ``json`` module does."""
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return 'Infinity' if value > 0 else '-Infinity'
+    return repr(value)
+
+
+class GradeColumns(object):
+    """
+    Numeric grades held column by column in typed arrays.
+
+    Takes the place of a ``grade_array`` list of dictionaries in
+    :py:meth:`pylmod.gradebook.GradeBook.multi_grade` and
+    :py:meth:`pylmod.gradebook.GradeBook.multi_grade_chunked`, and is
+    what spreadsheet uploads build:
+
+    .. code-block:: python
+
+        grades = GradeColumns()
+        for student_id, value in scores:
+            grades.append(student_id, assignment_id, value)
+        gradebook.multi_grade_chunked(grades)
+
+    Indexing gives a :py:class:`GradeEntry` and slicing another
+    ``GradeColumns``. Student and assignment ids must be integers.
+    Grades with a comment or a special, letter or boolean value, such as
+    excused grades, can't be held and are refused with ``ValueError``;
+    send those as dictionaries.
+    """
+
+    #: Keys of a grade dictionary that the columns can't hold, and
+    #: which must be ``None`` or ``False`` if given
+    UNSUPPORTED_KEYS = (
+        'comment', 'specialGradeValue', 'letterGradeValue',
+        'booleanGradeValue', 'returnAffectedValues',
+    )
+
+    def __init__(self, grades=()):
+        """Initialize GradeColumns instance.
+
+        Args:
+            grades (iterable): grade dictionaries, in the form sent by
+                ``multi_grade``, or :py:class:`GradeEntry` records
+
+        Raises:
+            TypeError: an id isn't an integer or a grade isn't a number
+            ValueError: a grade dictionary has a field the columns can't
+                hold, i.e. an excused grade or a comment
+        """
+        self.student_ids = array('q')
+        self.assignment_ids = array('q')
+        self.values = array('d')
+        self.modes = array('b')
+        self.approved = array('b')
+        for grade in grades:
+            if isinstance(grade, dict):
+                grade = self._entry_from_dict(grade)
+            self.append(
+                grade.student_id, grade.assignment_id,
+                grade.numeric_grade_value,
+                2 if grade.mode is None else grade.mode,
+                bool(grade.is_grade_approved)
+            )
+
+    @classmethod
+    def _entry_from_dict(cls, grade):
+        """Make a record of a grade dictionary, refusing other fields.
+
+        Raises:
+            ValueError: the grade has a field the columns can't hold
+        """
+        known = set(key for _, key in GradeEntry.FIELDS)
+        unsupported = sorted(
+            key for key, value in grade.items()
+            if key not in known and value is not None and value is not False
+        )
+        if unsupported:
+            raise ValueError(
+                'GradeColumns only hold numeric grades, '
+                'send grades with {0} as dictionaries'.format(
+                    ', '.join(unsupported)
+                )
+            )
+        return GradeEntry.from_dict(grade)
+
+    def append(self, student_id, assignment_id, value, mode=2,
+               approved=False):
+        """Add a grade.
+
+        Every value is checked before any is stored, so a grade that is
+        refused leaves the columns as they were.
+
+        Args:
+            student_id (int): student graded
+            assignment_id (int): assignment graded
+            value (float): numeric grade
+            mode (int): grade mode, ``2`` for numeric grades
+            approved (bool): is the grade approved
+
+        Raises:
+            TypeError: an id isn't an integer or the grade isn't a number
+            OverflowError: an id or the mode is out of range
+        """
+        # pylint: disable=too-many-arguments
+        student_id = _check_integer('studentId', student_id, 64)
+        assignment_id = _check_integer('assignmentId', assignment_id, 64)
+        if not isinstance(value, numbers.Real):
+            raise TypeError(
+                'numericGradeValue must be a number, not {0!r}'.format(value)
+            )
+        mode = _check_integer('mode', mode, 8)
+        self.student_ids.append(student_id)
+        self.assignment_ids.append(assignment_id)
+        self.values.append(value)
+        self.modes.append(mode)
+        self.approved.append(bool(approved))
+
+    def extend(self, grades):
+        """Add the grades of another ``GradeColumns``.
+
+        Args:
+            grades (GradeColumns): grades to add
+        """
+        for column, source in zip(self._columns(), grades._columns()):
+            column.extend(source)
+
+    def _columns(self):
+        """Get the arrays, in the order of ``GradeEntry.FIELDS``."""
+        return (self.student_ids, self.assignment_ids, self.values,
+                self.modes, self.approved)
+
+    def __len__(self):
+        return len(self.student_ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            sliced = GradeColumns()
+            for column, source in zip(sliced._columns(), self._columns()):
+                column.extend(source[index])
+            return sliced
+        return GradeEntry(
+            self.student_ids[index], self.assignment_ids[index],
+            self.values[index], self.modes[index],
+            bool(self.approved[index])
+        )
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __repr__(self):
+        return '<GradeColumns of {0} grades>'.format(len(self))
+
+    def to_dicts(self):
+        """Get the grades in the form sent by ``multi_grade``.
+
+        Returns:
+            list: grade dictionaries
+        """
+        return [grade.to_dict() for grade in self]
+
+    def encode(self):
+        """Encode the grades as a ``multiGrades`` request body.
+
+        The body is written straight from the arrays, without making a
+        dictionary per grade.
+
+        Returns:
+            bytes: UTF-8 encoded JSON array of grades
+        """
+        template = (
+            '{{"studentId":{0},"assignmentId":{1},'
+            '"numericGradeValue":{2},"mode":{3},"isGradeApproved":{4}}}'
+        )
+        return ('[' + ','.join(
+            template.format(
+                student_id, assignment_id, _encode_float(value), mode,
+                'true' if approved else 'false'
+            )
+            for student_id, assignment_id, value, mode, approved
+            in zip(*self._columns())
+        ) + ']').encode('utf-8')
@@ -0,0 +1,230 @@
+"""
+Retry policy for requests made to the MIT Learning Modules Web service.
+"""
+import email.utils
+import logging
+import random
+import time
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+
+class RetryPolicy(object):
+    """
+    Decides whether and how long to wait before retrying a failed request.
+
+    Requests are retried on connection errors and timeouts, and on
+    responses with a status in ``status_forcelist``. The wait before
+    retry ``n`` is ``backoff_factor * 2 ** (n - 1)`` seconds, capped at
+    ``backoff_max``, plus up to ``jitter`` random seconds so that many
+    clients failing together don't retry together. A ``Retry-After``
+    header on the response takes precedence over the backoff when
+    ``respect_retry_after`` is set, though no wait is longer than
+    ``max_retry_after``, so that a server can't stall the client for
+    hours.
+
+    A request that may have reached the server, i.e. one that timed out
+    waiting for the response or was answered ``502`` or ``504`` by a
+    proxy, is only retried for the idempotent ``allowed_methods``.
+    Failures to connect, and the ``REJECTED_STATUSES`` a server answers
+    without processing the request, are retried for any method.
+
+    Retrying stops after ``total`` retries, or when the next wait would
+    take the request past ``max_elapsed`` seconds since it was first
+    tried.
+
+    .. code-block:: python
+
+        policy = RetryPolicy(total=5, backoff_factor=1, max_elapsed=120)
+        gradebook = GradeBook(cert, urlbase, retry_policy=policy)
+
+    Attributes:
+        total (int): maximum number of retries
+        backoff_factor (float): base of the exponential backoff, seconds
+        backoff_max (float): longest wait between two tries, seconds
+        jitter (float): maximum random seconds added to each wait
+        status_forcelist (frozenset): response statuses to retry
+        respect_retry_after (bool): wait as long as ``Retry-After`` asks
+        max_retry_after (float): longest wait ``Retry-After`` may ask
+            for, seconds, default is ``backoff_max``
+        max_elapsed (float): time budget for all tries, seconds, or
+            ``None`` for no budget
+        allowed_methods (frozenset): methods retried after a read error
+    """
+    # pylint: disable=too-many-instance-attributes
+
+    #: Statuses LMod and its proxies answer with when overloaded
+    RETRY_STATUSES = frozenset([429, 502, 503, 504])
+
+    #: Statuses meaning the request was turned away without being
+    #: processed, so that it is safe to repeat whatever the method
+    REJECTED_STATUSES = frozenset([429, 503])
+
+    #: Methods that are safe to repeat
+    IDEMPOTENT_METHODS = frozenset(['DELETE', 'GET', 'HEAD', 'OPTIONS', 'PUT'])
+
+    def __init__(
+            self,
+            total=10,
+            backoff_factor=0.5,
+            backoff_max=60.0,
+            jitter=0.5,
+            status_forcelist=RETRY_STATUSES,
+            respect_retry_after=True,
+            max_elapsed=None,
+            allowed_methods=IDEMPOTENT_METHODS,
+            max_retry_after=None
+    ):
+        # pylint: disable=too-many-arguments
+        self.total = total
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.status_forcelist = frozenset(status_forcelist)
+        self.respect_retry_after = respect_retry_after
+        self.max_elapsed = max_elapsed
+        self.allowed_methods = frozenset(allowed_methods)
+        if max_retry_after is None:
+            max_retry_after = backoff_max
+        self.max_retry_after = max_retry_after
+
+    @staticmethod
+    def is_connect_error(err):
+        """Determine if an error happened before the request was sent.
+
+        Args:
+            err (requests.RequestException): error raised by requests
+
+        Returns:
+            bool: True if no connection to the server was made
+        """
+        if isinstance(err, requests.ConnectTimeout):
+            return True
+        reason = err.args[0] if err.args else None
+        # requests wraps urllib3's MaxRetryError, which holds the cause
+        reason = getattr(reason, 'reason', reason)
+        return isinstance(reason, NewConnectionError)
+
+    def should_retry_error(self, method, err):
+        """Determine if a request that raised should be retried.
+
+        Args:
+            method (str): HTTP method of the request, i.e. ``GET``
+            err (requests.RequestException): error raised by requests
+
+        Returns:
+            bool: True if the request can be tried again
+        """
+        if not isinstance(err, (requests.ConnectionError, requests.Timeout)):
+            return False
+        return method in self.allowed_methods or self.is_connect_error(err)
+
+    def should_retry_status(self, method, status_code):
+        """Determine if a response status should be retried.
+
+        Args:
+            method (str): HTTP method of the request, i.e. ``GET``
+            status_code (int): HTTP status of the response
+
+        Returns:
+            bool: True if the request can be tried again
+        """
+        if status_code not in self.status_forcelist:
+            return False
+        return (
+            method in self.allowed_methods or
+            status_code in self.REJECTED_STATUSES
+        )
+
+    def get_backoff(self, retry_number):
+        """Get the exponential backoff before a retry.
+
+        Args:
+            retry_number (int): number of the retry, starting at ``1``
+
+        Returns:
+            float: seconds to wait
+        """
+        backoff = self.backoff_factor * (2 ** (retry_number - 1))
+        backoff = min(backoff, self.backoff_max)
+        if self.jitter:
+            backoff += random.uniform(0, self.jitter)
+        return backoff
+
+    @staticmethod
+    def parse_retry_after(response):
+        """Get the wait a response asks for in its ``Retry-After`` header.
+
+        Args:
+            response (requests.Response): response to inspect
+
+        Returns:
+            float: seconds to wait, or ``None`` if there is no valid header
+        """
+        value = response.headers.get('Retry-After')
+        if value is None:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            retry_at = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            log.warning('Ignoring invalid Retry-After header %r', value)
+            return None
+        if retry_at is None:
+            return None
+        return max(0.0, retry_at.timestamp() - time.time())
+
+    def get_sleep(self, retry_number, response=None):
+        """Get how long to wait before a retry.
+
+        Args:
+            retry_number (int): number of the retry, starting at ``1``
+            response (requests.Response): response being retried, if any
+
+        Returns:
+            float: seconds to wait
+        """
+        if self.respect_retry_after and response is not None:
+            retry_after = self.parse_retry_after(response)
+            if retry_after is not None:
+                if retry_after > self.max_retry_after:
+                    log.warning(
+                        'Waiting %s seconds instead of the %s seconds '
+                        'asked by Retry-After',
+                        self.max_retry_after, retry_after
+                    )
+                    return self.max_retry_after
+                return retry_after
+        return self.get_backoff(retry_number)
+
+    def allows(self, retry_number, elapsed, sleep):
+        """Determine if another retry fits in the retry limits.
+
+        Args:
+            retry_number (int): number of the retry, starting at ``1``
+            elapsed (float): seconds since the request was first tried
+            sleep (float): seconds to wait before the retry
+
+        Returns:
+            bool: True if the retry may be made
+        """
+        if retry_number > self.total:
+            return False
+        if self.max_elapsed is not None and elapsed + sleep > self.max_elapsed:
+            return False
+        return True
+
+    @staticmethod
+    def sleep(seconds):
+        """Wait before a retry.
+
+        Args:
+            seconds (float): time to wait
+        """
+        if seconds > 0:
+            time.sleep(seconds)
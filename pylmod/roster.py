@@ -0,0 +1,307 @@
+"""
+Staff roster of a course, merged from the gradebook and course guide.
+"""
+import logging
+import threading
+import time
+
+from pylmod.catalog import StudentIndex
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+
+class StaffRoster(object):
+    """
+    Cached staff of a course, from both of the services that list them.
+
+    :py:meth:`pylmod.gradebook.GradeBook.get_staff` and
+    :py:meth:`pylmod.membership.Membership.get_course_guide_staff` each
+    list the staff of a course, with different role names. The roster
+    fetches either or both, merges them and keeps the result for
+    ``ttl`` seconds, so that permission checks are answered from
+    memory:
+
+    .. code-block:: python
+
+        roster = StaffRoster(gradebook=gradebook, membership=membership)
+        if roster.has_role(email, 'Instructor'):
+            ...
+
+    Roles of the gradebook are renamed after those of the course guide
+    according to ``ROLE_NAMES``, i.e. ``COURSE_TA`` becomes ``TA``.
+    Gradebook staff are merged by email, matched in any case. The course
+    guide lists staff by display name only, so they are merged with the
+    gradebook staff of the same display name, ignoring case and spacing,
+    and take their email. Course guide staff whose name matches no
+    gradebook staff, or several, can only be looked up with
+    :py:meth:`get_by_name`. The roster may be shared by several threads;
+    when it expires, one of them fetches it again while the others wait.
+
+    Attributes:
+        ttl (float): seconds the staff are used before they are fetched
+            again
+        built (float): clock time when the staff were last fetched, or
+            ``None``
+    """
+
+    #: Gradebook role names and the course guide names they map to
+    ROLE_NAMES = {
+        'COURSE_ADMIN': 'CourseAdmin',
+        'COURSE_PROF': 'Instructor',
+        'COURSE_TA': 'TA',
+    }
+
+    def __init__(
+            self, gradebook=None, membership=None, gradebook_id=None,
+            course_id=None, ttl=300, clock=time.monotonic
+    ):
+        """Initialize StaffRoster instance.
+
+        Args:
+            gradebook (pylmod.gradebook.GradeBook): client to get the
+                gradebook staff with, if any
+            membership (pylmod.membership.Membership): client to get the
+                course guide staff with, if any
+            gradebook_id (str): gradebook of the course, default is
+                that of ``gradebook``
+            course_id (int): course guide id of the course, default is
+                that of ``membership``
+            ttl (float): seconds the staff are used before they are
+                fetched again
+            clock (callable): source of the current time, seconds
+
+        Raises:
+            ValueError: neither client was given
+        """
+        # pylint: disable=too-many-arguments
+        if gradebook is None and membership is None:
+            raise ValueError('A gradebook or membership client is needed')
+        self.gradebook = gradebook
+        self.membership = membership
+        self.gradebook_id = gradebook_id
+        self.course_id = course_id
+        self.ttl = ttl
+        self.built = None
+        self._clock = clock
+        self._lock = threading.Lock()
+        # Held while fetching, so that only one thread fetches
+        self._refresh_lock = threading.Lock()
+        self._members = []
+        self._by_email = {}
+        self._by_name = {}
+
+    @classmethod
+    def role_name(cls, role):
+        """Get the unified name of a role.
+
+        Args:
+            role (str): role from either service, i.e. ``COURSE_TA``
+
+        Returns:
+            str: role name in the course guide's terms, i.e. ``TA``
+        """
+        return cls.ROLE_NAMES.get(role, role)
+
+    @staticmethod
+    def normalize_name(display_name):
+        """Get the key a display name is matched by.
+
+        Args:
+            display_name (str): name of a staff member
+
+        Returns:
+            str: the name in lower case with single spaces
+        """
+        return ' '.join(display_name.split()).lower()
+
+    @staticmethod
+    def _copy(member):
+        """Copy a member so that callers can't change the roster."""
+        if member is None:
+            return None
+        return dict(
+            member, roles=set(member['roles']),
+            sources=set(member['sources'])
+        )
+
+    def _fetch(self):
+        """Get the staff from the services.
+
+        Returns:
+            list: tuples of source, email, display name and role
+        """
+        staff = []
+        if self.gradebook is not None:
+            staff_data = self.gradebook.get_staff(
+                self.gradebook_id or self.gradebook.gradebook_id
+            )
+            for member in self.gradebook.unravel_staff({'data': staff_data}):
+                staff.append((
+                    'gradebook',
+                    member.get('accountEmail') or member.get('email'),
+                    member.get('displayName'),
+                    member['role'],
+                ))
+        if self.membership is not None:
+            for member in self.membership.get_course_guide_staff(
+                    self.course_id or ''
+            ):
+                staff.append((
+                    'courseguide', member.get('email'),
+                    member.get('displayName'), member.get('role'),
+                ))
+        return staff
+
+    def refresh(self):
+        """Fetch the staff from the services again.
+
+        Raises:
+            requests.RequestException: Exception connection error
+            ValueError: Unable to decode response content
+        """
+        members = []
+        by_email = {}
+        # Members by normalized display name, None for a name shared by
+        # several members. Gradebook staff come first, so course guide
+        # staff find them here.
+        by_name = {}
+        for source, email, display_name, role in self._fetch():
+            if email:
+                member = by_email.get(StudentIndex.normalize_email(email))
+            elif display_name:
+                member = by_name.get(self.normalize_name(display_name))
+            else:
+                member = None
+            if member is None:
+                member = {
+                    'email': email, 'displayName': display_name,
+                    'roles': set(), 'sources': set(),
+                }
+                members.append(member)
+                if email:
+                    by_email[StudentIndex.normalize_email(email)] = member
+            elif member['displayName'] is None:
+                member['displayName'] = display_name
+            if display_name:
+                name = self.normalize_name(display_name)
+                if by_name.get(name, member) is member:
+                    by_name[name] = member
+                else:
+                    by_name[name] = None
+            if role is not None:
+                member['roles'].add(self.role_name(role))
+            member['sources'].add(source)
+        with self._lock:
+            self._members = members
+            self._by_email = by_email
+            self._by_name = by_name
+            self.built = self._clock()
+        log.debug('Fetched %d staff members', len(members))
+
+    def _stale(self):
+        """Determine if the staff need to be fetched."""
+        built = self.built
+        return built is None or self._clock() - built >= self.ttl
+
+    def _current(self):
+        """Fetch the staff if they expired."""
+        if self._stale():
+            with self._refresh_lock:
+                # Another thread may have refreshed the roster meanwhile
+                if self._stale():
+                    self.refresh()
+
+    def get(self, email):
+        """Get a staff member by email.
+
+        Args:
+            email (str): staff email, in any case
+
+        Raises:
+            requests.RequestException: Exception connection error
+            ValueError: Unable to decode response content
+
+        Returns:
+            dict: a copy of the member's ``email``, ``displayName``,
+            ``roles`` and the ``sources`` listing them, or ``None``
+        """
+        self._current()
+        with self._lock:
+            member = self._by_email.get(StudentIndex.normalize_email(email))
+            return self._copy(member)
+
+    def get_by_name(self, display_name):
+        """Get a staff member by display name.
+
+        Args:
+            display_name (str): name of the member, in any case
+
+        Raises:
+            requests.RequestException: Exception connection error
+            ValueError: Unable to decode response content
+
+        Returns:
+            dict: the member, see :py:meth:`get`, or ``None`` if no
+            member or several have the name
+        """
+        self._current()
+        with self._lock:
+            member = self._by_name.get(self.normalize_name(display_name))
+            return self._copy(member)
+
+    def roles(self, email):
+        """Get the roles of a staff member.
+
+        Args:
+            email (str): staff email, in any case
+
+        Raises:
+            requests.RequestException: Exception connection error
+            ValueError: Unable to decode response content
+
+        Returns:
+            frozenset: unified role names, empty if not on the staff
+        """
+        member = self.get(email)
+        if member is None:
+            return frozenset()
+        return frozenset(member['roles'])
+
+    def has_role(self, email, role_name):
+        """Determine if a staff member has a role.
+
+        Args:
+            email (str): staff email, in any case
+            role_name (str): role in either service's terms, i.e.
+                ``TA`` or ``COURSE_TA``
+
+        Raises:
+            requests.RequestException: Exception connection error
+            ValueError: Unable to decode response content
+
+        Returns:
+            bool: True or False if email has role_name
+        """
+        return self.role_name(role_name) in self.roles(email)
+
+    def members(self):
+        """Get the staff members.
+
+        Raises:
+            requests.RequestException: Exception connection error
+            ValueError: Unable to decode response content
+
+        Returns:
+            list: copies of the merged staff members, see :py:meth:`get`
+        """
+        self._current()
+        with self._lock:
+            return [self._copy(member) for member in self._members]
+
+    def __contains__(self, email):
+        return self.get(email) is not None
+
+    def __len__(self):
+        self._current()
+        with self._lock:
+            return len(self._members)
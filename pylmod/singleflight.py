@@ -0,0 +1,151 @@
+"""
+Coalescing of identical concurrent requests.
+"""
+import asyncio
+import copy
+import logging
+import threading
+import time
+
+from pylmod.cache import ResponseCache
+from pylmod.exceptions import PyLmodDeadlineExceeded
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+
+class _Call(object):
+    """A request in flight and its outcome."""
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Share one in-flight call among threads asking for the same thing.
+
+    The first thread to ask for a key makes the call; threads asking for
+    the same key before it completes wait for it and receive a copy of
+    its result, or have its exception raised. Nothing is kept once the
+    call completes, so unlike a cache it never returns stale data.
+
+    .. code-block:: python
+
+        flight = SingleFlight()
+        gradebooks = [
+            GradeBook(cert, urlbase, single_flight=flight)
+            for _ in range(10)
+        ]
+
+    Attributes:
+        shared (int): calls answered by another thread's call
+    """
+
+    def __init__(self):
+        self.shared = 0
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    make_key = staticmethod(ResponseCache.make_key)
+
+    def do(self, key, func, deadline=None):
+        """Call ``func``, unless a call for ``key`` is already in flight.
+
+        Args:
+            key (tuple): hashable identity of the call
+            func (callable): makes the call, without arguments
+            deadline (float): ``time.monotonic()`` time after which a
+                caller stops waiting for another's call, if any
+
+        Raises:
+            PyLmodDeadlineExceeded: ``deadline`` passed while waiting
+                for another's call
+            Exception: whatever ``func`` raised
+
+        Returns:
+            object: the result of ``func``
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+        if leader:
+            try:
+                call.result = func()
+            except Exception as err:
+                call.error = err
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+            return call.result
+        log.debug('Waiting for the call in flight for %s', key)
+        timeout = None
+        if deadline is not None:
+            timeout = max(0.0, deadline - time.monotonic())
+        if not call.done.wait(timeout):
+            raise PyLmodDeadlineExceeded(
+                'Deadline passed waiting for the call in flight for '
+                '{0}'.format(key)
+            )
+        if call.error is not None:
+            raise call.error
+        # Callers may modify what they are returned
+        return copy.deepcopy(call.result)
+
+    def __len__(self):
+        return len(self._calls)
+
+
+class AsyncSingleFlight(object):
+    """
+    Share one in-flight call among coroutines asking for the same thing.
+
+    The asyncio counterpart of :py:class:`SingleFlight`, for use by the
+    clients of :py:mod:`pylmod.aio` on one event loop.
+
+    Attributes:
+        shared (int): calls answered by another coroutine's call
+    """
+
+    def __init__(self):
+        self.shared = 0
+        self._calls = {}
+
+    make_key = staticmethod(ResponseCache.make_key)
+
+    async def do(self, key, func):
+        """Await ``func()``, unless a call for ``key`` is already in flight.
+
+        Args:
+            key (tuple): hashable identity of the call
+            func (callable): returns the awaitable making the call
+
+        Raises:
+            Exception: whatever the call raised
+
+        Returns:
+            object: the result of the call
+        """
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._calls[key] = future
+            future.add_done_callback(
+                lambda done: self._calls.pop(key, None)
+            )
+            # Cancelling one caller mustn't cancel the call for others
+            return await asyncio.shield(future)
+        self.shared += 1
+        log.debug('Waiting for the call in flight for %s', key)
+        return copy.deepcopy(await asyncio.shield(future))
+
+    def __len__(self):
+        return len(self._calls)
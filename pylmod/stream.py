@@ -0,0 +1,169 @@
+"""
+Incremental parsing of large JSON responses from LMod.
+"""
+import codecs
+import json
+import logging
+
+from pylmod.exceptions import PyLmodUnexpectedData
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+WHITESPACE = ' \t\n\r'
+NUMBER = '0123456789+-.eE'
+
+
+class _Buffer(object):
+    """Text decoded from a stream of byte chunks, read on demand."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def read(self):
+        """Append the next chunk to the text.
+
+        Returns:
+            bool: False if the stream is exhausted
+        """
+        if self.eof:
+            return False
+        # Drop text already parsed so the buffer doesn't grow with
+        # the size of the response
+        self.text = self.text[self.pos:]
+        self.pos = 0
+        for chunk in self._chunks:
+            text = self._decoder.decode(chunk)
+            if text:
+                self.text += text
+                return True
+        self.text += self._decoder.decode(b'', final=True)
+        self.eof = True
+        return False
+
+    def skip_whitespace(self):
+        """Move past whitespace, reading more as needed.
+
+        Returns:
+            str: the next character, or ``''`` at the end of the stream
+        """
+        while True:
+            while (
+                    self.pos < len(self.text) and
+                    self.text[self.pos] in WHITESPACE
+            ):
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.read():
+                return ''
+
+    def expect(self, characters):
+        """Consume one of ``characters`` after optional whitespace.
+
+        Args:
+            characters (str): characters allowed next
+
+        Raises:
+            ValueError: the next character isn't allowed
+
+        Returns:
+            str: the character consumed
+        """
+        character = self.skip_whitespace()
+        if not character or character not in characters:
+            raise ValueError(
+                'Expected one of {0!r} at {1!r}'.format(
+                    characters, self.text[self.pos:self.pos + 20]
+                )
+            )
+        self.pos += 1
+        return character
+
+    def value(self, decoder):
+        """Decode the next JSON value, reading more as needed.
+
+        Args:
+            decoder (json.JSONDecoder): decoder to use
+
+        Raises:
+            ValueError: the stream doesn't hold a valid value
+
+        Returns:
+            object: the decoded value
+        """
+        self.skip_whitespace()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.text, self.pos)
+            except ValueError:
+                # The value may be cut by the end of the chunk
+                if self.read():
+                    continue
+                raise
+            # A value ending the text, or a number followed only by what
+            # could be more of it, i.e. ``-500`` of ``-500.0``, may be cut
+            # short by the end of the chunk
+            if (
+                    end == len(self.text) or (
+                        isinstance(value, (int, float)) and
+                        not self.text[end:].strip(NUMBER)
+                    )
+            ) and self.read():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_array(chunks, key='data'):
+    """Yield the items of an array in a JSON object as they arrive.
+
+    LMod responses are objects such as ``{"status": 1, "data": [...]}``.
+    Only one item of the ``key`` array is held in memory at a time, so
+    memory stays flat however large the array is. Other members of the
+    object are parsed and discarded.
+
+    .. code-block:: python
+
+        response = session.get(url, stream=True)
+        for student in iter_json_array(response.iter_content(65536)):
+            ...
+
+    Args:
+        chunks (iterable): ``bytes`` chunks of a UTF-8 encoded response
+        key (str): member of the top level object holding the array
+
+    Raises:
+        ValueError: the response isn't valid JSON
+        PyLmodUnexpectedData: the object has no ``key`` array
+
+    Yields:
+        object: each item of the array, in order
+    """
+    decoder = json.JSONDecoder()
+    buf = _Buffer(chunks)
+    buf.expect('{')
+    if buf.skip_whitespace() == '}':
+        raise PyLmodUnexpectedData('No {0} in response'.format(key))
+    while True:
+        name = buf.value(decoder)
+        buf.expect(':')
+        if name == key:
+            break
+        buf.value(decoder)
+        if buf.expect(',}') == '}':
+            raise PyLmodUnexpectedData('No {0} in response'.format(key))
+    if buf.skip_whitespace() != '[':
+        raise PyLmodUnexpectedData(
+            'Response {0} is not an array'.format(key)
+        )
+    buf.pos += 1
+    if buf.skip_whitespace() == ']':
+        return
+    while True:
+        yield buf.value(decoder)
+        if buf.expect(',]') == ']':
+            return
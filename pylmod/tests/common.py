@@ -1,8 +1,12 @@
 """
 Base class and common constants needed for pylmod tests
 """
+import json
 import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest import TestCase
+from urllib.parse import urlsplit
 
 
 class BaseTest(TestCase):
@@ -25,3 +29,85 @@ class BaseTest(TestCase):
 
     GBUUID = 'STELLAR:/project/testingstuff'
     CUUID = '/project/testingstuff'
+
+
+class LocalService(object):
+    """
+    Minimal stand-in for the LMod gradebook service on a local port.
+
+    Unlike httpretty, which patches sockets for the whole process, it
+    serves real connections, so it can be used from many threads at once.
+    Responses echo the gradebook id from the URL so callers can check they
+    got the answer to their own request:
+
+    * ``GET .../students/<id>`` returns one student whose ``studentId``
+      is the gradebook id.
+    * ``POST .../multiGrades/<id>`` returns the gradebook id and the
+      number of grades posted.
+
+    Attributes:
+        urlbase (str): base URL to pass to the client
+        requests (list): ``(method, path)`` of every request served
+    """
+
+    def __init__(self):
+        self.requests = []
+        self._lock = threading.Lock()
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """Echo the gradebook id of each request"""
+            protocol_version = 'HTTP/1.1'
+
+            def _respond(self, data):
+                """Send data as a JSON response"""
+                body = json.dumps(data).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):  # pylint: disable=invalid-name
+                """Answer students/<id>"""
+                service.record('GET', self.path)
+                gradebook_id = int(urlsplit(self.path).path.split('/')[-1])
+                self._respond({'data': [{
+                    'studentId': gradebook_id,
+                    'accountEmail': '{0}@example.com'.format(gradebook_id),
+                }]})
+
+            def do_POST(self):  # pylint: disable=invalid-name
+                """Answer multiGrades/<id>"""
+                service.record('POST', self.path)
+                length = int(self.headers.get('Content-Length', 0))
+                grades = json.loads(self.rfile.read(length).decode('utf-8'))
+                gradebook_id = int(self.path.split('/')[-1])
+                self._respond({'status': 1, 'data': {
+                    'gradebookId': gradebook_id,
+                    'count': len(grades),
+                }})
+
+            def log_message(self, *args):  # pylint: disable=arguments-differ
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self.urlbase = 'http://127.0.0.1:{0}/'.format(
+            self._server.server_address[1]
+        )
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+
+    def record(self, method, path):
+        """Record a request served"""
+        with self._lock:
+            self.requests.append((method, path))
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,376 @@
+"""
+Verify the asyncio clients against a mocked transport
+"""
+import asyncio
+import json
+
+import httpx
+
+from pylmod.aio import AsyncGradeBook, AsyncMembership
+from pylmod.aio.base import AsyncBase
+from pylmod.exceptions import PyLmodNoSuchSection, PyLmodUnexpectedData
+from pylmod.tests.common import BaseTest
+from pylmod.tests import test_gradebook, test_membership
+
+
+class GradebookFixtures(object):
+    """Canned gradebook responses shared with the synchronous tests"""
+    # pylint: disable=too-few-public-methods
+    _tests = test_gradebook.TestGradebook
+    GRADEBOOK_ID = _tests.GRADEBOOK_ID
+    ASSIGNMENT_BODY = _tests.ASSIGNMENT_BODY
+    SECTION_BODY = _tests.SECTION_BODY
+    STUDENT_BODY = _tests.STUDENT_BODY
+    STAFF_BODY = _tests.STAFF_BODY
+    SIMPLE_STAFF_BODY = _tests.SIMPLE_STAFF_BODY
+
+
+class MembershipFixtures(object):
+    """Canned membership responses shared with the synchronous tests"""
+    # pylint: disable=too-few-public-methods
+    _tests = test_membership.TestMembership
+    COURSE_ID = _tests.COURSE_ID
+    COURSE_DATA = _tests.COURSE_DATA
+    MEMBERSHIP_DATA = _tests.MEMBERSHIP_DATA
+    STAFF_BODY = _tests.STAFF_BODY
+    EMAIL = _tests.EMAIL
+    ROLE = _tests.ROLE
+
+
+def run(coroutine):
+    """Run a coroutine to completion on a new event loop."""
+    return asyncio.run(coroutine)
+
+
+class MockService(object):
+    """Route requests to canned responses and record what was asked."""
+
+    def __init__(self, routes, delay=0):
+        self.routes = routes
+        self.delay = delay
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, request):
+        self.requests.append(request)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        body = self.routes.get((request.method, request.url.path))
+        if body is None:
+            return httpx.Response(404, text='not json')
+        if callable(body):
+            body = body(request)
+        return httpx.Response(200, text=json.dumps(body))
+
+    def transport(self):
+        """Get an httpx transport serving the routes."""
+        return httpx.MockTransport(self)
+
+
+class TestAsyncBase(BaseTest):
+    """Verify the asyncio transport"""
+    # pylint: disable=protected-access
+
+    def test_constructor(self):
+        """Verify the constructor normalizes the url and is lazy"""
+        base = AsyncBase(self.CERT, self.URLBASE[:-1])
+        self.assertEqual(base.urlbase, self.URLBASE)
+        self.assertIsNone(base._client)
+        with self.assertRaises(ValueError):
+            AsyncBase(self.CERT, self.URLBASE, max_concurrency=0)
+
+    def test_ssl_context(self):
+        """Verify the client certificate is loaded into the context"""
+        base = AsyncBase(self.CERT, self.URLBASE)
+        self.assertIsNotNone(base._ssl_context())
+
+    def test_verbs(self):
+        """Verify get, post and delete round trip JSON"""
+        service = MockService({
+            ('GET', '/thing'): {'a': 'b'},
+            ('POST', '/thing'): lambda request: json.loads(request.content),
+            ('DELETE', '/thing'): {'deleted': True},
+        })
+
+        async def exercise():
+            async with AsyncBase(
+                    self.CERT, self.URLBASE, transport=service.transport()
+            ) as base:
+                got = await base.get('thing', params={'c': 'd'})
+                posted = await base.post('thing', {'e': 'f'})
+                deleted = await base.delete('thing')
+                with self.assertRaises(ValueError):
+                    await base.get('missing')
+            self.assertIsNone(base._client)
+            return got, posted, deleted
+
+        self.assertEqual(
+            ({'a': 'b'}, {'e': 'f'}, {'deleted': True}), run(exercise())
+        )
+        self.assertEqual(service.requests[0].url.params['c'], 'd')
+        self.assertEqual(
+            service.requests[1].headers['content-type'], 'application/json'
+        )
+
+    def test_connection_error(self):
+        """Verify transport errors are raised"""
+        def fail(request):
+            raise httpx.ConnectError('down', request=request)
+
+        async def exercise():
+            base = AsyncBase(
+                self.CERT, self.URLBASE, transport=httpx.MockTransport(fail)
+            )
+            await base.get('thing')
+
+        with self.assertRaises(httpx.ConnectError):
+            run(exercise())
+
+    def test_max_concurrency(self):
+        """Verify no more than max_concurrency requests are in flight"""
+        service = MockService({('GET', '/thing'): {}}, delay=0.01)
+
+        async def exercise():
+            async with AsyncBase(
+                    self.CERT, self.URLBASE, max_concurrency=3,
+                    transport=service.transport()
+            ) as base:
+                await asyncio.gather(*[base.get('thing') for _ in range(20)])
+
+        run(exercise())
+        self.assertEqual(len(service.requests), 20)
+        self.assertEqual(service.max_in_flight, 3)
+
+
+class TestAsyncGradeBook(BaseTest):
+    """Verify AsyncGradeBook returns the same data as GradeBook"""
+    GRADEBOOK_ID = GradebookFixtures.GRADEBOOK_ID
+    BASE_PATH = '/service/gradebook/'
+
+    def _service(self):
+        """Build a mock gradebook service"""
+        base = self.BASE_PATH
+        gradebook_id = self.GRADEBOOK_ID
+        return MockService({
+            ('GET', base + 'gradebook'): {
+                'data': {'gradebookId': gradebook_id}
+            },
+            ('GET', '{0}gradebook/options/{1}'.format(base, gradebook_id)): {
+                'data': {'membershipQualifier': '/project/mitxdemosite'}
+            },
+            ('GET', '{0}assignments/{1}'.format(base, gradebook_id)):
+                GradebookFixtures.ASSIGNMENT_BODY,
+            ('GET', '{0}sections/{1}'.format(base, gradebook_id)):
+                GradebookFixtures.SECTION_BODY,
+            ('GET', '{0}students/{1}'.format(base, gradebook_id)):
+                GradebookFixtures.STUDENT_BODY,
+            ('GET', '{0}students/{1}/section/1293925'.format(
+                base, gradebook_id
+            )): {'data': GradebookFixtures.STUDENT_BODY['data'][:1]},
+            ('GET', '{0}staff/{1}'.format(base, gradebook_id)):
+                GradebookFixtures.STAFF_BODY,
+            ('POST', base + 'assignment'): {'data': {'assignmentId': 3}},
+            ('DELETE', base + 'assignment/3'): {'status': 1},
+            ('POST', '{0}grades/{1}'.format(base, gradebook_id)):
+                {'status': 1},
+            ('POST', '{0}multiGrades/{1}'.format(base, gradebook_id)):
+                lambda request: {'data': len(json.loads(request.content))},
+        })
+
+    def test_gradebook(self):
+        """Verify the gradebook API methods"""
+        service = self._service()
+
+        async def exercise():
+            async with AsyncGradeBook(
+                    self.CERT, self.URLBASE, self.GBUUID,
+                    transport=service.transport()
+            ) as gradebook:
+                self.assertIsNone(gradebook.gradebook_id)
+                assignments, students, staff = await asyncio.gather(
+                    gradebook.get_assignments(),
+                    gradebook.get_students(),
+                    gradebook.get_staff(simple=True),
+                )
+                self.assertEqual(gradebook.gradebook_id, self.GRADEBOOK_ID)
+                self.assertEqual(
+                    assignments, GradebookFixtures.ASSIGNMENT_BODY['data']
+                )
+                self.assertEqual(
+                    students, GradebookFixtures.STUDENT_BODY['data']
+                )
+                self.assertEqual(
+                    staff, GradebookFixtures.SIMPLE_STAFF_BODY
+                )
+                self.assertEqual(
+                    (await gradebook.get_students(simple=True))[1]['email'],
+                    'b@MIT.EDU'
+                )
+                self.assertEqual(
+                    len(await gradebook.get_students(
+                        section_name='Unassigned'
+                    )), 1
+                )
+                with self.assertRaises(PyLmodNoSuchSection):
+                    await gradebook.get_students(section_name='nope')
+                self.assertEqual(
+                    (await gradebook.get_assignment_by_name('midterm1'))[0],
+                    2
+                )
+                self.assertEqual(
+                    (None, None),
+                    await gradebook.get_assignment_by_name('nope')
+                )
+                self.assertEqual(
+                    (await gradebook.get_student_by_email('A@example.com'))[0],
+                    1
+                )
+                self.assertIn(
+                    'membershipQualifier', await gradebook.get_options()
+                )
+                self.assertEqual(
+                    await gradebook.get_assignments(simple=True),
+                    [{'AssignmentName': 'Homework 1'},
+                     {'AssignmentName': 'midterm1'}]
+                )
+                self.assertEqual(
+                    await gradebook.get_sections(simple=True),
+                    [{'SectionName': 'Unassigned'},
+                     {'SectionName': 'Section 1'}]
+                )
+                created = await gradebook.create_assignment(
+                    'Test', 'tst', 1.0, 100.0, '11-04-2999'
+                )
+                self.assertEqual(created['data']['assignmentId'], 3)
+                self.assertEqual(
+                    (await gradebook.delete_assignment(3))['status'], 1
+                )
+                self.assertEqual(
+                    (await gradebook.set_grade(1, 1, 1.0))['status'], 1
+                )
+                self.assertEqual(
+                    (await gradebook.multi_grade([{}, {}]))['data'], 2
+                )
+
+        run(exercise())
+        # The gradebook id is resolved once per client
+        resolutions = [
+            x for x in service.requests
+            if x.url.path == self.BASE_PATH + 'gradebook'
+        ]
+        self.assertEqual(1, len(resolutions))
+        self.assertEqual(
+            resolutions[0].url.params['uuid'], self.GBUUID
+        )
+
+    def test_gradebook_id_resolved_once(self):
+        """Verify concurrent first calls share one gradebook id lookup"""
+        service = self._service()
+        service.delay = 0.01
+
+        async def exercise():
+            async with AsyncGradeBook(
+                    self.CERT, self.URLBASE, self.GBUUID,
+                    transport=service.transport()
+            ) as gradebook:
+                await asyncio.gather(
+                    *[gradebook.get_students() for _ in range(20)]
+                )
+
+        run(exercise())
+        resolutions = [
+            x for x in service.requests
+            if x.url.path == self.BASE_PATH + 'gradebook'
+        ]
+        self.assertEqual(1, len(resolutions))
+        self.assertEqual(21, len(service.requests))
+
+
+class TestAsyncMembership(BaseTest):
+    """Verify AsyncMembership returns the same data as Membership"""
+    BASE_PATH = '/service/membership/'
+
+    def test_membership(self):
+        """Verify the membership API methods"""
+        course_id = MembershipFixtures.COURSE_ID
+        group_id = MembershipFixtures.COURSE_DATA['response']['docs'][0]['id']
+        service = MockService({
+            ('GET', self.BASE_PATH + 'courseguide/course'):
+                MembershipFixtures.COURSE_DATA,
+            ('GET', self.BASE_PATH + 'group'): MembershipFixtures.COURSE_DATA,
+            ('GET', '{0}group/{1}/member'.format(self.BASE_PATH, group_id)):
+                MembershipFixtures.MEMBERSHIP_DATA,
+            ('GET', '{0}courseguide/course/{1}/staff'.format(
+                self.BASE_PATH, course_id
+            )): MembershipFixtures.STAFF_BODY,
+        })
+
+        async def exercise():
+            async with AsyncMembership(
+                    self.CERT, self.URLBASE, self.CUUID,
+                    transport=service.transport()
+            ) as membership:
+                self.assertTrue(await membership.email_has_role(
+                    MembershipFixtures.EMAIL, MembershipFixtures.ROLE
+                ))
+                self.assertFalse(await membership.email_has_role(
+                    MembershipFixtures.EMAIL, 'hacker'
+                ))
+                self.assertEqual(
+                    await membership.get_course_guide_staff(),
+                    MembershipFixtures.STAFF_BODY['response']['docs']
+                )
+                self.assertEqual(membership.course_id, course_id)
+
+        run(exercise())
+        self.assertEqual(
+            service.requests[-2].url.params['uuid'], self.CUUID
+        )
+
+    def test_course_id_resolved_once(self):
+        """Verify concurrent first calls share one course id lookup"""
+        course_id = MembershipFixtures.COURSE_ID
+        service = MockService({
+            ('GET', self.BASE_PATH + 'courseguide/course'):
+                MembershipFixtures.COURSE_DATA,
+            ('GET', '{0}courseguide/course/{1}/staff'.format(
+                self.BASE_PATH, course_id
+            )): MembershipFixtures.STAFF_BODY,
+        }, delay=0.01)
+
+        async def exercise():
+            async with AsyncMembership(
+                    self.CERT, self.URLBASE, self.CUUID,
+                    transport=service.transport()
+            ) as membership:
+                await asyncio.gather(
+                    *[membership.get_course_guide_staff() for _ in range(20)]
+                )
+
+        run(exercise())
+        resolutions = [
+            x for x in service.requests
+            if x.url.path == self.BASE_PATH + 'courseguide/course'
+        ]
+        self.assertEqual(1, len(resolutions))
+
+    def test_unexpected_data(self):
+        """Verify malformed responses raise PyLmodUnexpectedData"""
+        service = MockService({
+            ('GET', self.BASE_PATH + 'group'): {'response': {'docs': []}},
+        })
+
+        async def exercise():
+            async with AsyncMembership(
+                    self.CERT, self.URLBASE, self.CUUID,
+                    transport=service.transport()
+            ) as membership:
+                await membership.get_membership()
+
+        with self.assertRaises(PyLmodUnexpectedData):
+            run(exercise())
@@ -1,13 +1,19 @@
 """
 Test out the pylmod base class to verify authentication and RESTful verbs work.
 """
+import gzip
 import json
 import socket
 
 import httpretty
+import mock
 import requests
 
-from pylmod.base import Base
+from pylmod.base import Base, PoolAdapter
+from pylmod.cache import MISSING, ConditionalCache
+from pylmod.codec import JSONCodec
+from pylmod.exceptions import PyLmodDeadlineExceeded
+from pylmod.retry import RetryPolicy
 from pylmod.tests.common import BaseTest
 
 
@@ -24,6 +30,12 @@ class TestBase(BaseTest):
     """
     # Unit tests generally should do protected-accesses
     # pylint: disable=protected-access
+    def setUp(self):
+        """Don't actually sleep between retries"""
+        patcher = mock.patch('pylmod.retry.time.sleep')
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
     def _register_uri(self, body=None, responses=None, timeout=False):
         """Register base URI with responses and/or body"""
 
@@ -49,6 +61,37 @@ class TestBase(BaseTest):
         self.assertEqual(test_base._session.cert, self.CERT)
         self.assertIsNone(test_base.gradebookid)
 
+    def test_connection_pool(self):
+        """Verify the pool settings and that one adapter covers the host"""
+        test_base = Base(
+            self.CERT, self.URLBASE + 'service/gradebook',
+            pool_maxsize=32, pool_block=True
+        )
+        adapter = test_base._session.get_adapter(
+            self.URLBASE + 'service/membership/group'
+        )
+        self.assertIsInstance(adapter, PoolAdapter)
+        self.assertIs(adapter, test_base._session.get_adapter(
+            test_base._url_format('students/1')
+        ))
+        self.assertEqual(adapter._pool_maxsize, 32)
+        self.assertTrue(adapter._pool_block)
+        self.assertIn(
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+            adapter.poolmanager.connection_pool_kw['socket_options']
+        )
+        self.assertEqual(
+            test_base._session.headers['Connection'], 'keep-alive'
+        )
+
+        # Without keep alive
+        test_base = Base(self.CERT, self.URLBASE, keep_alive=False)
+        adapter = test_base._session.get_adapter(self.URLBASE)
+        self.assertNotIn(
+            'socket_options', adapter.poolmanager.connection_pool_kw
+        )
+        self.assertEqual(test_base._session.headers['Connection'], 'close')
+
     def test_data_to_json(self):
         """Verify that we convert python data to json"""
         data = dict(a='b')
@@ -106,6 +149,315 @@ class TestBase(BaseTest):
         ):
             test_base.rest_action(rest_function, self.URLBASE)
 
+    @httpretty.activate
+    def test_rest_action_retry_status(self):
+        """Verify retryable statuses are retried, honoring Retry-After"""
+        payload = {'a': 'b'}
+        self._register_uri(
+            responses=[
+                httpretty.Response(
+                    body='busy', status=503, adding_headers={
+                        'Retry-After': '3'
+                    }
+                ),
+                httpretty.Response(body='slow down', status=429),
+                httpretty.Response(body=json.dumps(payload)),
+            ]
+        )
+        retries = []
+        test_base = Base(
+            self.CERT, self.URLBASE,
+            retry_policy=RetryPolicy(backoff_factor=1, jitter=0)
+        )
+        test_base.register_hook('retry', retries.append)
+        response = test_base.get('')
+        self.assertEqual(payload, response)
+        self.assertEqual(
+            [(x['attempt'], x['sleep'], x['reason']) for x in retries],
+            [(1, 3, 503), (2, 2, 429)]
+        )
+        self.assertEqual(retries[0]['event'], 'retry')
+        self.assertEqual(retries[0]['method'], 'GET')
+        self.assertEqual(
+            [mock.call(3), mock.call(2)], self.sleep.call_args_list
+        )
+
+    @httpretty.activate
+    def test_rest_action_retry_exhausted(self):
+        """Verify the last response is returned when retries run out"""
+        self._register_uri(body=json.dumps({'status': -1}), responses=[
+            httpretty.Response(body=json.dumps({'status': -1}), status=502)
+        ])
+        test_base = Base(self.CERT, self.URLBASE, retry_policy=RetryPolicy(
+            total=10, backoff_factor=10, jitter=0, max_elapsed=100
+        ))
+        # Sleeping advances a fake clock
+        clock = [1000.0]
+        self.sleep.side_effect = lambda seconds: clock.append(
+            clock.pop() + seconds
+        )
+        with mock.patch('pylmod.base.time.time', lambda: clock[0]):
+            self.assertEqual({'status': -1}, test_base.get(''))
+        # 10 + 20 + 40 fits in the budget, the next 80 doesn't
+        self.assertEqual(3, self.sleep.call_count)
+
+        # Without a budget the retry count is the limit
+        test_base.retry_policy = RetryPolicy(total=4)
+        self.sleep.reset_mock()
+        self.assertEqual({'status': -1}, test_base.get(''))
+        self.assertEqual(4, self.sleep.call_count)
+
+    @httpretty.activate
+    def test_rest_action_post_not_retried(self):
+        """Verify a POST that may have been sent isn't repeated"""
+        self._register_uri(body=raise_timeout)
+        httpretty.register_uri(
+            httpretty.POST,
+            self.URLBASE,
+            body=raise_timeout
+        )
+        test_base = Base(self.CERT, self.URLBASE)
+        with self.assertRaises(requests.ConnectionError):
+            test_base.post('', {'a': 'b'})
+        self.assertFalse(self.sleep.called)
+
+    @httpretty.activate
+    def test_rest_action_post_status(self):
+        """Verify a POST answered by a failing proxy isn't repeated"""
+        httpretty.register_uri(
+            httpretty.POST,
+            self.URLBASE,
+            responses=[
+                httpretty.Response(body=json.dumps({'status': -1}),
+                                   status=504),
+                httpretty.Response(body=json.dumps({'status': 1})),
+            ]
+        )
+        test_base = Base(self.CERT, self.URLBASE)
+        self.assertEqual({'status': -1}, test_base.post('', {'a': 'b'}))
+        self.assertFalse(self.sleep.called)
+
+        # A server turning the request away didn't apply it
+        httpretty.register_uri(
+            httpretty.POST,
+            self.URLBASE,
+            responses=[
+                httpretty.Response(body='busy', status=503),
+                httpretty.Response(body=json.dumps({'status': 1})),
+            ]
+        )
+        self.assertEqual({'status': 1}, test_base.post('', {'a': 'b'}))
+        self.assertEqual(1, self.sleep.call_count)
+
+    @httpretty.activate
+    def test_conditional_get(self):
+        """Verify validators are sent and 304 serves the kept content"""
+        payload = {'data': [1, 2, 3]}
+        versions = {'etag': '"v1"'}
+
+        def respond(request, uri, headers):
+            """Answer 304 while the client holds the current version"""
+            # pylint: disable=unused-argument
+            headers = {'ETag': versions['etag'],
+                       'Last-Modified': 'Sat, 17 Oct 2026 00:00:00 GMT'}
+            if request.headers.get('If-None-Match') == versions['etag']:
+                return 304, headers, ''
+            return 200, headers, json.dumps(payload)
+
+        httpretty.register_uri(httpretty.GET, self.URLBASE, body=respond)
+        cache = ConditionalCache()
+        test_base = Base(self.CERT, self.URLBASE, conditional_cache=cache)
+        self.assertEqual(payload, test_base.get('', params={'a': 1}))
+        self.assertIsNone(
+            httpretty.last_request().headers.get('If-None-Match')
+        )
+        response = test_base.get('', params={'a': 1})
+        self.assertEqual(payload, response)
+        self.assertEqual(
+            '"v1"', httpretty.last_request().headers['If-None-Match']
+        )
+        self.assertEqual(
+            'Sat, 17 Oct 2026 00:00:00 GMT',
+            httpretty.last_request().headers['If-Modified-Since']
+        )
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+        # Callers may modify what they are returned
+        response['data'].append(4)
+        self.assertEqual(payload, test_base.get('', params={'a': 1}))
+
+        # Changed content is downloaded and kept
+        versions['etag'] = '"v2"'
+        payload = {'data': []}
+        self.assertEqual(payload, test_base.get('', params={'a': 1}))
+        self.assertEqual(payload, test_base.get('', params={'a': 1}))
+        self.assertEqual((3, 2), (cache.hits, cache.misses))
+        self.assertEqual(1, len(cache))
+
+    @httpretty.activate
+    def test_conditional_get_evicted(self):
+        """Verify a 304 for content evicted meanwhile gets it again"""
+        payload = {'data': [1]}
+
+        def respond(request, uri, headers):
+            """Answer 304 to any conditional request"""
+            # pylint: disable=unused-argument
+            headers = {'ETag': '"v1"'}
+            if request.headers.get('If-None-Match'):
+                return 304, headers, ''
+            return 200, headers, json.dumps(payload)
+
+        httpretty.register_uri(httpretty.GET, self.URLBASE, body=respond)
+        cache = ConditionalCache()
+        test_base = Base(self.CERT, self.URLBASE, conditional_cache=cache)
+        test_base.get('')
+        with mock.patch.object(cache, 'get_content', return_value=MISSING):
+            self.assertEqual(payload, test_base.get(''))
+        requests_made = httpretty.latest_requests()
+        self.assertEqual(
+            '"v1"', requests_made[-2].headers.get('If-None-Match')
+        )
+        self.assertIsNone(requests_made[-1].headers.get('If-None-Match'))
+        self.assertIsNone(
+            requests_made[-1].headers.get('If-Modified-Since')
+        )
+        self.assertEqual(payload, test_base.get(''))
+
+    @httpretty.activate
+    def test_codec(self):
+        """Verify bodies are encoded and decoded with the codec"""
+        httpretty.register_uri(
+            httpretty.POST, self.URLBASE, body=json.dumps({'a': 1})
+        )
+        codec = mock.Mock(wraps=JSONCodec())
+        test_base = Base(self.CERT, self.URLBASE, codec=codec)
+        self.assertEqual({'a': 1}, test_base.post('', [1, 2]))
+        codec.dumps.assert_called_once_with([1, 2])
+        codec.loads.assert_called_once_with(b'{"a": 1}')
+        self.assertEqual(b'[1,2]', httpretty.last_request().body)
+        # Bodies already encoded are sent as they are
+        test_base.post('', '[3]')
+        self.assertEqual(b'[3]', httpretty.last_request().body)
+        self.assertEqual(1, codec.dumps.call_count)
+
+    @httpretty.activate
+    def test_compress(self):
+        """Verify request bodies are gzipped and sizes are reported"""
+        payload = {'status': 1, 'data': ['success'] * 100}
+        httpretty.register_uri(
+            httpretty.POST, self.URLBASE,
+            body=gzip.compress(json.dumps(payload).encode('utf-8')),
+            adding_headers={'Content-Encoding': 'gzip'}
+        )
+        grades = [{'studentId': x, 'mode': 2, 'isGradeApproved': False}
+                  for x in range(100)]
+        reports = []
+        test_base = Base(self.CERT, self.URLBASE, compress=True)
+        test_base.register_hook('request', reports.append)
+        self.assertEqual(payload, test_base.post('', grades))
+        request = httpretty.last_request()
+        self.assertEqual('gzip', request.headers['Content-Encoding'])
+        self.assertEqual('gzip, deflate', request.headers['Accept-Encoding'])
+        self.assertEqual(grades, json.loads(gzip.decompress(request.body)))
+
+        report = reports[0]
+        self.assertEqual(
+            (report['method'], report['status'], report['retries']),
+            ('POST', 200, 0)
+        )
+        self.assertEqual(len(request.body), report['bytes_sent'])
+        self.assertEqual(len(test_base.codec.dumps(grades)),
+                         report['bytes_sent_raw'])
+        self.assertLess(report['bytes_sent'] * 5, report['bytes_sent_raw'])
+        self.assertEqual(len(json.dumps(payload)),
+                         report['bytes_received_raw'])
+        self.assertLess(report['bytes_received'],
+                        report['bytes_received_raw'])
+
+        # Small bodies aren't worth compressing
+        test_base.post('', [1])
+        self.assertNotIn('Content-Encoding', httpretty.last_request().headers)
+        self.assertEqual(
+            reports[1]['bytes_sent'], reports[1]['bytes_sent_raw']
+        )
+
+        # Nor are bodies compressed unless asked for
+        test_base = Base(self.CERT, self.URLBASE)
+        test_base.post('', grades)
+        self.assertNotIn('Content-Encoding', httpretty.last_request().headers)
+
+    def test_timeouts(self):
+        """Verify connect and read timeouts by method and endpoint"""
+        test_base = Base(self.CERT, self.URLBASE)
+        # requests ignores a session timeout, so none is set
+        self.assertFalse(hasattr(test_base._session, 'timeout'))
+        self.assertEqual(
+            (Base.CONNECT_TIMEOUT, Base.READ_TIMEOUT),
+            test_base._timeout('GET', self.URLBASE + 'students/1')
+        )
+        test_base = Base(
+            self.CERT, self.URLBASE, timeout=30,
+            timeouts={'GET': (2, 5), 'multiGrades': (2, None)}
+        )
+        self.assertEqual(
+            (2, 5), test_base._timeout('GET', self.URLBASE + 'students/1')
+        )
+        self.assertEqual(
+            (2, None),
+            test_base._timeout('POST', self.URLBASE + 'multiGrades/1')
+        )
+        self.assertEqual(
+            (30, 30), test_base._timeout('DELETE', self.URLBASE + 'x/1')
+        )
+
+    @httpretty.activate
+    def test_deadline(self):
+        """Verify requests and retries stop at the deadline"""
+        self._register_uri(responses=[
+            httpretty.Response(body='{}', status=503),
+            httpretty.Response(body='{"a": 1}', status=200),
+        ])
+        test_base = Base(
+            self.CERT, self.URLBASE, timeout=(5, 60),
+            retry_policy=RetryPolicy(total=3, backoff_factor=60)
+        )
+        bound = test_base.with_deadline(30)
+        self.assertIsNone(test_base.deadline)
+        connect, read = bound._timeout('GET', self.URLBASE)
+        self.assertEqual(5, connect)
+        self.assertTrue(29 < read <= 30)
+        # A copy can't extend the deadline of the original
+        self.assertEqual(bound.deadline, bound.with_deadline(60).deadline)
+
+        # A retry that would end past the deadline isn't made
+        self.assertEqual({}, bound.get(''))
+        self.assertEqual(1, len(httpretty.latest_requests()))
+        self.assertFalse(self.sleep.called)
+
+        with self.assertRaises(PyLmodDeadlineExceeded):
+            test_base.with_deadline(-1).get('')
+        self.assertEqual(1, len(httpretty.latest_requests()))
+
+    def test_hooks(self):
+        """Verify hook registration and error isolation"""
+        test_base = Base(self.CERT, self.URLBASE)
+        with self.assertRaises(ValueError):
+            test_base.register_hook('nope', print)
+        calls = []
+
+        def broken(info):
+            """Fail after recording the call"""
+            calls.append(info)
+            raise RuntimeError('broken hook')
+
+        test_base.register_hook('retry', broken)
+        test_base._dispatch_hook('retry', attempt=1)
+        self.assertEqual([{'event': 'retry', 'attempt': 1}], calls)
+        self.assertTrue(test_base.deregister_hook('retry', broken))
+        self.assertFalse(test_base.deregister_hook('retry', broken))
+        self.assertFalse(test_base.deregister_hook('nope', broken))
+        test_base._dispatch_hook('retry', attempt=2)
+        self.assertEqual(1, len(calls))
+
     @httpretty.activate
     def test_rest_action_not_json(self):
         """Test the rest timeout indefinitely"""
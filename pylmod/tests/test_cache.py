@@ -0,0 +1,193 @@
+"""
+Verify the response cache
+"""
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import mock
+import requests
+
+from pylmod.cache import (
+    MISSING, ConditionalCache, IdCache, ResponseCache,
+    default_id_cache_path,
+)
+
+
+class FakeClock(object):
+    """Clock advanced by hand"""
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestResponseCache(TestCase):
+    """Validate expiry, eviction and invalidation of ResponseCache"""
+
+    def setUp(self):
+        super(TestResponseCache, self).setUp()
+        self.clock = FakeClock()
+
+    def test_get_set(self):
+        """Verify responses are stored by URL and params, as copies"""
+        cache = ResponseCache(clock=self.clock)
+        key = cache.make_key('https://x/students/1', {'b': 2, 'a': 1})
+        self.assertEqual(
+            key, cache.make_key('https://x/students/1', {'a': 1, 'b': 2})
+        )
+        self.assertIs(MISSING, cache.get(key))
+        value = {'data': [1]}
+        cache.set(key, value, 'students', 1)
+        value['data'].append(2)
+        cached = cache.get(key)
+        self.assertEqual({'data': [1]}, cached)
+        cached['data'].append(3)
+        self.assertEqual({'data': [1]}, cache.get(key))
+        other = cache.make_key('https://x/students/1')
+        self.assertIs(MISSING, cache.get(other))
+        self.assertEqual((2, 2), (cache.hits, cache.misses))
+
+    def test_ttl(self):
+        """Verify entries expire after their endpoint's lifetime"""
+        cache = ResponseCache(ttl=10, ttls={'options': 100, 'staff': 0},
+                              clock=self.clock)
+        cache.set('students', 's', 'students')
+        cache.set('options', 'o', 'options')
+        cache.set('staff', 'x', 'staff')
+        self.assertEqual(2, len(cache))
+        self.clock.now = 9.9
+        self.assertEqual('s', cache.get('students'))
+        self.clock.now = 10
+        self.assertIs(MISSING, cache.get('students'))
+        self.assertEqual('o', cache.get('options'))
+        self.clock.now = 100
+        self.assertIs(MISSING, cache.get('options'))
+        self.assertEqual(0, len(cache))
+
+    def test_lru(self):
+        """Verify the least recently used entry is evicted"""
+        cache = ResponseCache(maxsize=2, clock=self.clock)
+        cache.set('a', 1, 'students')
+        cache.set('b', 2, 'students')
+        cache.get('a')
+        cache.set('c', 3, 'students')
+        self.assertEqual(1, cache.get('a'))
+        self.assertIs(MISSING, cache.get('b'))
+        self.assertEqual(3, cache.get('c'))
+
+    def test_invalidate(self):
+        """Verify invalidation by gradebook and of everything"""
+        cache = ResponseCache(clock=self.clock)
+        cache.set('a', 1, 'students', gradebook_id=1)
+        cache.set('b', 2, 'students', gradebook_id='2')
+        cache.invalidate('1')
+        self.assertIs(MISSING, cache.get('a'))
+        self.assertEqual(2, cache.get('b'))
+        cache.invalidate()
+        self.assertEqual(0, len(cache))
+
+        # A response fetched across an invalidation isn't stored
+        generation = cache.generation
+        cache.invalidate(2)
+        cache.set('b', 2, 'students', gradebook_id=2, generation=generation)
+        self.assertIs(MISSING, cache.get('b'))
+
+
+class TestConditionalCache(TestCase):
+    """Validate validator storage and eviction of ConditionalCache"""
+
+    @staticmethod
+    def _response(**headers):
+        """Build a response with headers"""
+        response = requests.Response()
+        response.headers.update(headers)
+        return response
+
+    def test_validators(self):
+        """Verify only responses with validators are kept"""
+        cache = ConditionalCache(maxsize=1)
+        self.assertEqual({}, cache.get_headers('a'))
+        self.assertIs(MISSING, cache.get_content('a'))
+
+        cache.update('a', self._response(), {'data': 1})
+        self.assertEqual({}, cache.get_headers('a'))
+        cache.update('a', self._response(ETag='"x"'), {'data': 1})
+        self.assertEqual({'If-None-Match': '"x"'}, cache.get_headers('a'))
+        self.assertEqual({'data': 1}, cache.get_content('a'))
+
+        # Content without validators replaces the kept one
+        cache.update('a', self._response(), {'data': 2})
+        self.assertEqual(0, len(cache))
+
+        cache.update('a', self._response(ETag='"x"'), 1)
+        cache.update('b', self._response(**{'Last-Modified': 'now'}), 2)
+        self.assertEqual({}, cache.get_headers('a'))
+        self.assertEqual(
+            {'If-Modified-Since': 'now'}, cache.get_headers('b')
+        )
+        self.assertEqual((1, 5), (cache.hits, cache.misses))
+
+
+class TestIdCache(TestCase):
+    """Validate persistence, expiry and invalidation of IdCache"""
+
+    SERVICE = 'https://lmod/service/gradebook/'
+
+    def setUp(self):
+        super(TestIdCache, self).setUp()
+        self.clock = FakeClock()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'cache', 'ids.sqlite3')
+
+    def test_persistence(self):
+        """Verify ids outlive the instance that stored them"""
+        ids = IdCache(self.path, clock=self.clock)
+        self.assertIs(MISSING, ids.get(self.SERVICE, 'gradebook', 'a'))
+        ids.set(self.SERVICE, 'gradebook', 'a', 1234)
+        ids.set(self.SERVICE, 'group', 'a', '5')
+        reopened = IdCache(self.path, clock=self.clock)
+        self.assertEqual(1234, reopened.get(self.SERVICE, 'gradebook', 'a'))
+        self.assertEqual('5', reopened.get(self.SERVICE, 'group', 'a'))
+        self.assertIs(MISSING, reopened.get('other', 'gradebook', 'a'))
+        self.assertEqual((2, 1), (reopened.hits, reopened.misses))
+        self.assertEqual(2, len(reopened))
+
+    def test_ttl(self):
+        """Verify ids expire"""
+        ids = IdCache(self.path, ttl=10, clock=self.clock)
+        ids.set(self.SERVICE, 'gradebook', 'a', 1)
+        self.clock.now = 9
+        self.assertEqual(1, ids.get(self.SERVICE, 'gradebook', 'a'))
+        self.clock.now = 10
+        self.assertIs(MISSING, ids.get(self.SERVICE, 'gradebook', 'a'))
+        self.assertEqual(0, len(ids))
+        ids.ttl = 0
+        ids.set(self.SERVICE, 'gradebook', 'a', 1)
+        self.assertIs(MISSING, ids.get(self.SERVICE, 'gradebook', 'a'))
+
+    def test_invalidate(self):
+        """Verify ids are dropped selectively"""
+        ids = IdCache(self.path, clock=self.clock)
+        for kind, uuid in [('gradebook', 'a'), ('gradebook', 'b'),
+                           ('group', 'a')]:
+            ids.set(self.SERVICE, kind, uuid, 1)
+        self.assertEqual(1, ids.invalidate(self.SERVICE, 'gradebook', 'a'))
+        self.assertIs(MISSING, ids.get(self.SERVICE, 'gradebook', 'a'))
+        self.assertEqual(1, ids.get(self.SERVICE, 'group', 'a'))
+        self.assertEqual(0, ids.invalidate('other'))
+        self.assertEqual(2, ids.invalidate())
+        self.assertEqual(0, len(ids))
+
+    def test_default_path(self):
+        """Verify the cache goes under the user's cache directory"""
+        with mock.patch.dict(os.environ, {'XDG_CACHE_HOME': '/var/cache'}):
+            self.assertEqual(
+                os.path.join('/var/cache', 'pylmod', 'ids.sqlite3'),
+                default_id_cache_path()
+            )
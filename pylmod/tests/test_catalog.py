@@ -0,0 +1,145 @@
+"""
+Verify the in-memory gradebook indexes
+"""
+from unittest import TestCase
+
+from pylmod.catalog import AssignmentCatalog, MembershipIndex, StudentIndex
+
+
+class TestStudentIndex(TestCase):
+    """Validate lookups in StudentIndex"""
+
+    STUDENTS = [
+        {'accountEmail': 'a@example.com', 'studentId': 1},
+        {'accountEmail': 'B@mit.edu', 'studentId': 2},
+        {'accountEmail': 'a@EXAMPLE.com', 'studentId': 3},
+    ]
+
+    def test_get_by_email(self):
+        """Verify case-insensitive email lookup and first match wins"""
+        index = StudentIndex(self.STUDENTS)
+        self.assertEqual(
+            (1, self.STUDENTS[0]), index.get_by_email('A@example.com')
+        )
+        self.assertEqual(
+            (2, self.STUDENTS[1]), index.get_by_email('b@MIT.EDU')
+        )
+        self.assertEqual((None, None), index.get_by_email('cheese'))
+        self.assertIn('b@mit.edu', index)
+        self.assertNotIn('cheese', index)
+
+    def test_get_by_id(self):
+        """Verify student id lookup"""
+        index = StudentIndex(self.STUDENTS)
+        self.assertEqual(self.STUDENTS[2], index.get_by_id(3))
+        self.assertIsNone(index.get_by_id(4))
+
+    def test_simple_students(self):
+        """Verify simple student dictionaries are indexed by email"""
+        simple = [{'email': 'b@MIT.EDU', 'name': 'Bob', 'section': 's'}]
+        index = StudentIndex(simple)
+        self.assertEqual((None, simple[0]), index.get_by_email('b@mit.edu'))
+
+    def test_container(self):
+        """Verify the index behaves as the roster it was built from"""
+        index = StudentIndex(self.STUDENTS)
+        self.assertEqual(3, len(index))
+        self.assertEqual(self.STUDENTS, list(index))
+        index.add({'accountEmail': 'c@example.com', 'studentId': 4})
+        self.assertEqual(4, index.get_by_email('c@example.com')[0])
+
+    def test_certificate_email(self):
+        """Verify mit.edu domains are upper-cased"""
+        self.assertEqual(
+            'b@MIT.EDU', StudentIndex.certificate_email('b@mit.edu')
+        )
+        self.assertEqual(
+            'a@example.com', StudentIndex.certificate_email('a@example.com')
+        )
+
+
+class TestAssignmentCatalog(TestCase):
+    """Validate lookups and updates in AssignmentCatalog"""
+
+    ASSIGNMENTS = [
+        {'assignmentId': 1, 'name': 'Homework 1', 'shortName': 'HW1'},
+        {'assignmentId': 2, 'name': 'midterm1', 'shortName': 'mid1'},
+        {'assignmentId': 3, 'name': 'Homework 1', 'shortName': 'HW1b'},
+    ]
+
+    def test_lookups(self):
+        """Verify lookups by name, short name and id"""
+        catalog = AssignmentCatalog(self.ASSIGNMENTS, gradebook_id=1234)
+        self.assertEqual(1234, catalog.gradebook_id)
+        self.assertEqual(
+            (1, self.ASSIGNMENTS[0]), catalog.by_name('Homework 1')
+        )
+        self.assertEqual(
+            (2, self.ASSIGNMENTS[1]), catalog.by_short_name('mid1')
+        )
+        self.assertEqual((3, self.ASSIGNMENTS[2]), catalog.by_id(3))
+        self.assertEqual((None, None), catalog.by_name('nope'))
+        self.assertEqual((None, None), catalog.by_short_name('nope'))
+        self.assertEqual((None, None), catalog.by_id(4))
+        self.assertIn('midterm1', catalog)
+        self.assertEqual(3, len(catalog))
+        self.assertEqual(self.ASSIGNMENTS, list(catalog))
+
+    def test_add_remove(self):
+        """Verify the catalog tracks created and deleted assignments"""
+        catalog = AssignmentCatalog(self.ASSIGNMENTS)
+        self.assertEqual(self.ASSIGNMENTS[0], catalog.remove(1))
+        self.assertIsNone(catalog.remove(1))
+        # The duplicate name takes over
+        self.assertEqual(3, catalog.by_name('Homework 1')[0])
+        self.assertEqual((None, None), catalog.by_short_name('HW1'))
+
+        catalog.add({'assignmentId': 4, 'name': 'final', 'shortName': 'fin'})
+        self.assertEqual(4, catalog.by_name('final')[0])
+        # Replacing an assignment re-indexes it
+        catalog.add({'assignmentId': 4, 'name': 'final exam'})
+        self.assertEqual((None, None), catalog.by_name('final'))
+        self.assertEqual(4, catalog.by_name('final exam')[0])
+        self.assertEqual((None, None), catalog.by_short_name('fin'))
+
+    def test_string_ids(self):
+        """Verify ids match whether given as numbers or strings"""
+        catalog = AssignmentCatalog(self.ASSIGNMENTS)
+        self.assertEqual((3, self.ASSIGNMENTS[2]), catalog.by_id('3'))
+        self.assertEqual(self.ASSIGNMENTS[0], catalog.remove('1'))
+        self.assertEqual(3, catalog.by_name('Homework 1')[0])
+        catalog.add({'assignmentId': '3', 'name': 'renamed'})
+        self.assertEqual(2, len(catalog))
+        self.assertEqual((None, None), catalog.by_name('Homework 1'))
+
+
+class TestMembershipIndex(TestCase):
+    """Validate role checks in MembershipIndex"""
+
+    MEMBERS = [
+        {'email': 'a@example.com', 'roleType': 'student'},
+        {'email': 'b@example.com', 'roleType': 'TA'},
+        {'email': 'b@example.com', 'roleType': 'Instructor'},
+        {'roleType': 'student'},
+    ]
+
+    def test_roles(self):
+        """Verify roles are looked up by exact email"""
+        index = MembershipIndex(self.MEMBERS, uuid='/project/x')
+        self.assertEqual('/project/x', index.uuid)
+        self.assertTrue(index.has_role('a@example.com', 'student'))
+        self.assertFalse(index.has_role('a@example.com', 'TA'))
+        self.assertFalse(index.has_role('A@example.com', 'student'))
+        self.assertEqual(
+            frozenset(['TA', 'Instructor']), index.roles('b@example.com')
+        )
+        self.assertEqual(
+            {'a@example.com': frozenset(['student']),
+             'c@example.com': frozenset()},
+            index.roles_for_emails(['a@example.com', 'c@example.com'])
+        )
+        self.assertIn('b@example.com', index)
+        self.assertEqual(2, len(index))
+        self.assertEqual(
+            ['a@example.com', 'b@example.com'], sorted(index)
+        )
@@ -0,0 +1,128 @@
+"""
+Verify the circuit breaker stops requests to a failing host
+"""
+import httpretty
+import mock
+import requests
+
+from pylmod.base import Base
+from pylmod.circuit import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from pylmod.exceptions import PyLmodCircuitOpen
+from pylmod.retry import RetryPolicy
+from pylmod.tests.common import BaseTest
+from pylmod.tests.test_base import raise_timeout
+
+
+class TestCircuitBreaker(BaseTest):
+    """Verify the states of the circuit and its use by Base"""
+
+    def setUp(self):
+        patcher = mock.patch('pylmod.retry.time.sleep')
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.now = 1000.0
+
+    def breaker(self, **kwargs):
+        """Make a breaker on a clock controlled by the test"""
+        return CircuitBreaker(clock=lambda: self.now, **kwargs)
+
+    def test_trips_and_recovers(self):
+        """Verify the circuit opens, half-opens and closes"""
+        breaker = self.breaker(failure_threshold=2, reset_timeout=30)
+        self.assertIsNone(breaker.before_request())
+        self.assertIsNone(breaker.record(False))
+        self.assertEqual(CLOSED, breaker.state)
+        self.assertEqual((CLOSED, OPEN), breaker.record(False))
+        with self.assertRaises(PyLmodCircuitOpen):
+            breaker.before_request()
+        self.now += 30
+        self.assertEqual(HALF_OPEN, breaker.state)
+        self.assertEqual((OPEN, HALF_OPEN), breaker.before_request())
+        # Only one probe at a time
+        with self.assertRaises(PyLmodCircuitOpen):
+            breaker.before_request()
+        self.assertEqual((HALF_OPEN, CLOSED), breaker.record(True))
+        self.assertEqual(0, breaker.failures)
+
+    def test_failed_probe(self):
+        """Verify a failed probe opens the circuit again"""
+        breaker = self.breaker(failure_threshold=1, reset_timeout=10)
+        breaker.record(False)
+        self.now += 10
+        breaker.before_request()
+        self.assertEqual((HALF_OPEN, OPEN), breaker.record(False))
+        self.now += 9
+        with self.assertRaises(PyLmodCircuitOpen):
+            breaker.before_request()
+
+    def test_success_resets_failures(self):
+        """Verify only consecutive failures count"""
+        breaker = self.breaker(failure_threshold=2)
+        breaker.record(False)
+        breaker.record(True)
+        breaker.record(False)
+        self.assertEqual(CLOSED, breaker.state)
+
+    def test_latency_threshold(self):
+        """Verify slow responses count as failures"""
+        breaker = self.breaker(failure_threshold=1, latency_threshold=5)
+        self.assertIsNone(breaker.record(True, 4.9))
+        self.assertEqual((CLOSED, OPEN), breaker.record(True, 5.1))
+
+    def test_validation(self):
+        """Verify the threshold must be positive"""
+        with self.assertRaises(ValueError):
+            CircuitBreaker(failure_threshold=0)
+
+    @httpretty.activate
+    def test_fails_fast(self):
+        """Verify retries stop once the circuit opens"""
+        httpretty.register_uri(httpretty.GET, self.URLBASE, status=503)
+        breaker = self.breaker(failure_threshold=3)
+        test_base = Base(
+            self.CERT, self.URLBASE, retry_policy=RetryPolicy(total=10),
+            circuit_breaker=breaker
+        )
+        changes = []
+        test_base.register_hook('circuit', changes.append)
+        with self.assertRaises(PyLmodCircuitOpen):
+            test_base.get('')
+        self.assertEqual(3, len(httpretty.latest_requests()))
+        self.assertEqual(
+            [(CLOSED, OPEN, 3)],
+            [(x['previous'], x['state'], x['failures']) for x in changes]
+        )
+        # Later calls don't reach the network at all
+        with self.assertRaises(PyLmodCircuitOpen):
+            test_base.get('')
+        self.assertEqual(3, len(httpretty.latest_requests()))
+
+        # A successful probe closes the circuit
+        httpretty.reset()
+        httpretty.register_uri(httpretty.GET, self.URLBASE, body='{}')
+        self.now += breaker.reset_timeout
+        self.assertEqual({}, test_base.get(''))
+        self.assertEqual(
+            [(OPEN, HALF_OPEN), (HALF_OPEN, CLOSED)],
+            [(x['previous'], x['state']) for x in changes[1:]]
+        )
+
+    @httpretty.activate
+    def test_connection_errors(self):
+        """Verify timeouts count as failures and client errors don't"""
+        httpretty.register_uri(
+            httpretty.GET, self.URLBASE + 'slow', body=raise_timeout
+        )
+        httpretty.register_uri(
+            httpretty.GET, self.URLBASE + 'missing', status=404, body='{}'
+        )
+        breaker = self.breaker(failure_threshold=2)
+        test_base = Base(
+            self.CERT, self.URLBASE, retry_policy=RetryPolicy(total=0),
+            circuit_breaker=breaker
+        )
+        with self.assertRaises(requests.RequestException):
+            test_base.get('slow')
+        self.assertEqual(1, breaker.failures)
+        test_base.get('missing')
+        self.assertEqual(0, breaker.failures)
@@ -0,0 +1,47 @@
+"""
+Verify the JSON codecs
+"""
+import importlib.util
+import sys
+from unittest import TestCase, skipIf
+
+import mock
+
+from pylmod.codec import JSONCodec, OrjsonCodec, get_default_codec
+
+HAS_ORJSON = importlib.util.find_spec('orjson') is not None
+
+PAYLOAD = [
+    {'studentId': 1, 'assignmentId': 2, 'numericGradeValue': 9.5,
+     'mode': 2, 'isGradeApproved': False, 'comment': u'résumé'},
+]
+
+
+class TestCodecs(TestCase):
+    """Validate encoding, decoding and codec selection"""
+
+    def _round_trip(self, codec):
+        """Verify a codec encodes to bytes and decodes what it encodes"""
+        encoded = codec.dumps(PAYLOAD)
+        self.assertIsInstance(encoded, bytes)
+        self.assertEqual(PAYLOAD, codec.loads(encoded))
+        self.assertEqual(PAYLOAD, JSONCodec.loads(encoded))
+        with self.assertRaises(ValueError):
+            codec.loads(b'not json')
+
+    def test_json(self):
+        """Verify the standard library codec"""
+        self._round_trip(JSONCodec())
+
+    @skipIf(not HAS_ORJSON, 'orjson is not installed')
+    def test_orjson(self):
+        """Verify the orjson codec"""
+        self._round_trip(OrjsonCodec())
+        self.assertIsInstance(get_default_codec(), OrjsonCodec)
+
+    def test_default_fallback(self):
+        """Verify the standard library is used without orjson"""
+        with mock.patch.dict(sys.modules, {'orjson': None}):
+            with self.assertRaises(ImportError):
+                OrjsonCodec()
+            self.assertIs(type(get_default_codec()), JSONCodec)
@@ -1,9 +1,14 @@
 """
 Verify gradebook API calls with unit tests
 """
+import io
 import json
+import os
+import shutil
 import tempfile
+import sys
 import time
+import unittest
 
 from ddt import (
     data,
@@ -13,14 +18,28 @@ from ddt import (
 import httpretty
 import mock
 
+import requests
+
 from pylmod import GradeBook
+from pylmod.cache import IdCache, ResponseCache
+from pylmod.circuit import CircuitBreaker
+from pylmod.records import Assignment, GradeColumns, Student
+from pylmod.retry import RetryPolicy
+from pylmod.gradebook import MultiGradeResult
 from pylmod.exceptions import (
+    PyLmodCircuitOpen,
+    PyLmodDeadlineExceeded,
     PyLmodUnexpectedData,
     PyLmodNoSuchSection,
     PyLmodFailedAssignmentCreation,
 )
 from pylmod.tests.common import BaseTest
 
+try:
+    import numpy
+except ImportError:  # optional, see the numpy extra
+    numpy = None
+
 
 @ddt
 class TestGradebook(BaseTest):
@@ -332,6 +351,68 @@ class TestGradebook(BaseTest):
         last_request = httpretty.last_request()
         self.assertEqual(last_request.querystring, dict(uuid=[self.GBUUID]))
 
+    @httpretty.activate
+    def test_lazy_gradebook_id(self):
+        """Verify the gradebook id is resolved once, on first use"""
+        self._register_get_gradebook()
+        gradebook = GradeBook(self.CERT, self.URLBASE, self.GBUUID)
+        self.assertEqual([], httpretty.latest_requests())
+        bound = gradebook.for_gradebook(gbuuid=self.GBUUID)
+        self.assertEqual([], httpretty.latest_requests())
+        self.assertEqual(self.GRADEBOOK_ID, gradebook.gradebook_id)
+        self.assertEqual(self.GRADEBOOK_ID, gradebook.gradebook_id)
+        # Bound copies share the resolved ids
+        self.assertEqual(self.GRADEBOOK_ID, bound.gradebook_id)
+        self.assertEqual(1, len(httpretty.latest_requests()))
+        # An id given takes precedence
+        self.assertEqual(
+            7, gradebook.for_gradebook(gradebook_id=7).gradebook_id
+        )
+
+    @httpretty.activate
+    def test_prefetch_gradebook_ids(self):
+        """Verify many gradebook ids are resolved up front"""
+        self._register_get_gradebook()
+        gradebook = GradeBook(self.CERT, self.URLBASE)
+        self.assertEqual(
+            {self.GBUUID: self.GRADEBOOK_ID},
+            gradebook.prefetch_gradebook_ids([self.GBUUID] * 3)
+        )
+        self.assertEqual(
+            self.GRADEBOOK_ID,
+            gradebook.for_gradebook(gbuuid=self.GBUUID).gradebook_id
+        )
+        self.assertLessEqual(len(httpretty.latest_requests()), 3)
+        requests_made = len(httpretty.latest_requests())
+        gradebook.prefetch_gradebook_ids([self.GBUUID])
+        self.assertEqual(requests_made, len(httpretty.latest_requests()))
+        with self.assertRaises(ValueError):
+            gradebook.prefetch_gradebook_ids([self.GBUUID], max_workers=0)
+
+    @httpretty.activate
+    def test_id_cache(self):
+        """Verify a new client resolves nothing the id cache knows"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'ids.sqlite3')
+        self._register_get_gradebook()
+        gradebook = GradeBook(
+            self.CERT, self.URLBASE, self.GBUUID, id_cache=IdCache(path)
+        )
+        self.assertEqual(self.GRADEBOOK_ID, gradebook.gradebook_id)
+        self.assertEqual(1, len(httpretty.latest_requests()))
+
+        # As if the process was restarted
+        restarted = GradeBook(
+            self.CERT, self.URLBASE, self.GBUUID, id_cache=IdCache(path)
+        )
+        self.assertEqual(self.GRADEBOOK_ID, restarted.gradebook_id)
+        self.assertEqual(1, len(httpretty.latest_requests()))
+
+        restarted.invalidate_ids('gradebook', self.GBUUID)
+        self.assertEqual(self.GRADEBOOK_ID, restarted.gradebook_id)
+        self.assertEqual(2, len(httpretty.latest_requests()))
+
     @httpretty.activate
     def test_get_gradebook_id(self):
         """Verify get_gradebook_id works and sets the property as expected."""
@@ -445,8 +526,8 @@ class TestGradebook(BaseTest):
 
         last_request = httpretty.last_request()
         self.assertEqual(
-            str(last_request.body, encoding='utf-8'),
-            json.dumps({
+            json.loads(last_request.body),
+            {
                 'name': 'Test Assign',
                 'shortName': 'test-assign',
                 'weight': 1.0,
@@ -455,7 +536,7 @@ class TestGradebook(BaseTest):
                 'gradebookId': self.GRADEBOOK_ID,
                 'maxPointsTotal': 100.0,
                 'dueDateString': '11-04-2999',
-            })
+            }
         )
 
     @httpretty.activate
@@ -473,6 +554,23 @@ class TestGradebook(BaseTest):
         response = gradebook.delete_assignment(1)
         self.assertEqual(response_data, response)
 
+    @httpretty.activate
+    def test_delete_assignment_string_id(self):
+        """Verify deleting by a string id updates the assignment catalog"""
+        httpretty.register_uri(
+            httpretty.DELETE,
+            '{0}assignment/1'.format(self.GRADEBOOK_REGISTER_BASE),
+            body=json.dumps({'status': 1})
+        )
+        self._register_get_assignments()
+        gradebook = GradeBook(self.CERT, self.URLBASE)
+        gradebook.gradebook_id = self.GRADEBOOK_ID
+        catalog = gradebook.get_assignment_catalog()
+        self.assertEqual(1, catalog.by_name('Homework 1')[0])
+        gradebook.delete_assignment('1')
+        self.assertEqual((None, None), catalog.by_id(1))
+        self.assertEqual((None, None), catalog.by_name('Homework 1'))
+
     @httpretty.activate
     def test_set_grade(self):
         """Verify the setting of grades is as we expect.
@@ -499,8 +597,8 @@ class TestGradebook(BaseTest):
         self.assertEqual(response_data, response)
         last_request = httpretty.last_request()
         self.assertEqual(
-            str(last_request.body, encoding='utf-8'),
-            json.dumps(grade)
+            json.loads(last_request.body),
+            grade
         )
 
     @httpretty.activate
@@ -517,10 +615,268 @@ class TestGradebook(BaseTest):
         self.assertEqual(response_data, response)
         last_request = httpretty.last_request()
         self.assertEqual(
-            str(last_request.body, encoding='utf-8'),
-            json.dumps(grades)
+            json.loads(last_request.body),
+            grades
+        )
+
+    @httpretty.activate
+    def test_multi_grade_columns(self):
+        """Verify grade columns are sent as the same body as dictionaries
+        """
+        sent = []
+
+        def handle_multi_grade(request, uri, headers):
+            """Record the grades sent"""
+            sent.append(json.loads(request.body))
+            return 200, headers, json.dumps({'status': 1})
+
+        httpretty.register_uri(
+            httpretty.POST, '{0}multiGrades/{1}'.format(
+                self.GRADEBOOK_REGISTER_BASE, self.GRADEBOOK_ID
+            ), body=handle_multi_grade
+        )
+        gradebook = GradeBook(self.CERT, self.URLBASE)
+        gradebook.gradebook_id = self.GRADEBOOK_ID
+        grades = [
+            {'studentId': 1, 'assignmentId': 2, 'numericGradeValue': 1.5,
+             'mode': 2, 'isGradeApproved': False},
+            {'studentId': 3, 'assignmentId': 2, 'numericGradeValue': 0.0,
+             'mode': 2, 'isGradeApproved': True},
+        ]
+        gradebook.multi_grade(GradeColumns(grades))
+        result = gradebook.multi_grade_chunked(
+            GradeColumns(grades), batch_size=1, max_workers=1
+        )
+        self.assertEqual(1, result.status)
+        self.assertEqual([grades, grades[:1], grades[1:]], sent)
+
+    @httpretty.activate
+    def test_multi_grade_columns_retry(self):
+        """Verify the failed rows of a columnar upload can be sent again
+        """
+        sent = []
+        rejected = set([1, 4])
+
+        def handle_multi_grade(request, uri, headers):
+            """Reject chunks with a rejected student, and record the rest
+            """
+            grades = json.loads(request.body)
+            if any(x['studentId'] in rejected for x in grades):
+                return 200, headers, json.dumps({'status': -1})
+            sent.extend(grades)
+            return 200, headers, json.dumps({'status': 1})
+
+        httpretty.register_uri(
+            httpretty.POST, '{0}multiGrades/{1}'.format(
+                self.GRADEBOOK_REGISTER_BASE, self.GRADEBOOK_ID
+            ), body=handle_multi_grade
+        )
+        gradebook = GradeBook(self.CERT, self.URLBASE)
+        gradebook.gradebook_id = self.GRADEBOOK_ID
+        grades = GradeColumns()
+        for student_id in range(6):
+            grades.append(student_id, 2, float(student_id))
+        result = gradebook.multi_grade_chunked(
+            grades, batch_size=2, max_workers=1
+        )
+        self.assertEqual(-1, result.status)
+        failed_rows = result.failed_rows
+        self.assertIsInstance(failed_rows, GradeColumns)
+        self.assertEqual(list(grades[:2]) + list(grades[4:]),
+                         list(failed_rows))
+        rejected.clear()
+        result = gradebook.multi_grade_chunked(
+            failed_rows, batch_size=2, max_workers=1
+        )
+        self.assertEqual(1, result.status)
+        self.assertEqual(
+            sorted(grades.to_dicts(), key=lambda x: x['studentId']),
+            sorted(sent, key=lambda x: x['studentId'])
         )
 
+    def _register_grade_info(self):
+        """Respond to roster requests with grade info"""
+        students = [
+            dict(self.STUDENT_BODY['data'][0], studentAssignmentInfo=[
+                {'assignmentId': 1, 'numericGradeValue': 7.5},
+                {'assignmentId': 2, 'numericGradeValue': 3.0,
+                 'specialGradeValue': 'x'},
+                {'assignmentId': 99, 'numericGradeValue': 1.0},
+            ]),
+            dict(self.STUDENT_BODY['data'][1], studentAssignmentInfo={
+                '2': {'numericGradeValue': '4.25'},
+                '1': {'numericGradeValue': None},
+            }),
+        ]
+        httpretty.register_uri(
+            httpretty.GET, '{0}students/{1}'.format(
+                self.GRADEBOOK_REGISTER_BASE, self.GRADEBOOK_ID
+            ), body=json.dumps({'data': students})
+        )
+        self._register_get_assignments()
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    @httpretty.activate
+    def test_get_grade_matrix(self):
+        """Verify grades are laid out by student and assignment"""
+        self._register_grade_info()
+        gradebook = GradeBook(self.CERT, self.URLBASE)
+        matrix = gradebook.get_grade_matrix(gradebook_id=self.GRADEBOOK_ID)
+        self.assertEqual(
+            httpretty.last_request().querystring['includeGradeInfo'],
+            ['true']
+        )
+        self.assertEqual([1, 2], matrix.student_ids.tolist())
+        self.assertEqual([1, 2], matrix.assignment_ids.tolist())
+        # Missing, excused and unknown grades
+        numpy.testing.assert_array_equal(
+            numpy.array([[7.5, numpy.nan], [numpy.nan, 4.25]]),
+            matrix.grades
+        )
+
+    @httpretty.activate
+    def test_get_grade_matrix_numpy(self):
+        """Verify a missing numpy is reported before any request"""
+        gradebook = GradeBook(self.CERT, self.URLBASE)
+        with mock.patch.dict(sys.modules, {'numpy': None}):
+            with self.assertRaises(ImportError):
+                gradebook.get_grade_matrix(gradebook_id=self.GRADEBOOK_ID)
+        self.assertEqual([], httpretty.latest_requests())
+
+    @httpretty.activate
+    def test_compact_records(self):
+        """Verify students and assignments can be returned as records"""
+        self._register_get_students()
+        self._register_get_assignments()
+        gradebook = GradeBook(self.CERT, self.URLBASE)
+        gradebook.gradebook_id = self.GRADEBOOK_ID
+        students = gradebook.get_students(compact=True)
+        self.assertEqual(
+            [Student.from_dict(x) for x in self.STUDENT_BODY['data']],
+            students
+        )
+        self.assertEqual('Bob', students[1].display_name)
+        assignments = gradebook.get_assignments(compact=True)
+        self.assertEqual(
+            [x['assignmentId'] for x in self.ASSIGNMENT_BODY['data']],
+            [x.assignment_id for x in assignments]
+        )
+        self.assertIsInstance(assignments[0], Assignment)
+
+    @httpretty.activate
+    def test_multi_grade_chunked(self):
+        """Verify grades are sent in chunks and failures are isolated"""
+        def handle_multi_grade(request, uri, headers):
+            """Reject any chunk containing student 3"""
+            grades = json.loads(request.body)
+            if any(x['studentId'] == 3 for x in grades):
+                body = {'status': -1, 'message': 'bad student'}
+            else:
+                body = {'status': 1, 'message': 'success'}
+            return 200, headers, json.dumps(body)
+
+        httpretty.register_uri(
+            httpretty.POST,
+            '{0}multiGrades/{1}'.format(
+                self.GRADEBOOK_REGISTER_BASE, self.GRADEBOOK_ID
+            ),
+            body=handle_multi_grade
+        )
+        self._register_get_gradebook()
+        gradebook = GradeBook(self.CERT, self.URLBASE, self.GBUUID)
+        grades = [
+            {'studentId': x, 'assignmentId': 1, 'numericGradeValue': 1.0}
+            for x in range(5)
+        ]
+        result = gradebook.multi_grade_chunked(
+            grades, batch_size=2, max_workers=1
+        )
+        self.assertIsInstance(result, MultiGradeResult)
+        self.assertEqual(result.status, -1)
+        self.assertEqual(
+            [(x.start, x.stop, x.status) for x in result.chunks],
+            [(0, 2, 1), (2, 4, -1), (4, 5, 1)]
+        )
+        self.assertEqual(result.failed_rows, grades[2:4])
+        self.assertEqual(result.chunks[1].response['message'], 'bad student')
+        self.assertTrue(all(x.duration >= 0 for x in result.chunks))
+        self.assertIn('failed=1', repr(result))
+
+        # Resending only the good rows succeeds
+        result = gradebook.multi_grade_chunked(
+            grades[:2] + grades[4:], batch_size=2
+        )
+        self.assertEqual(result.status, 1)
+        self.assertEqual(result.failed_rows, [])
+
+        with self.assertRaises(ValueError):
+            gradebook.multi_grade_chunked(grades, batch_size=0)
+        with self.assertRaises(ValueError):
+            gradebook.multi_grade_chunked(grades, max_workers=0)
+
+    @mock.patch.object(GradeBook, 'multi_grade', autospec=True)
+    def test_multi_grade_chunked_errors(self, multi_grade_patch):
+        """Verify a raising chunk is reported without stopping the rest"""
+        def multi_grade(self, grade_array, gradebook_id=''):
+            """Fail the first chunk"""
+            # pylint: disable=unused-argument
+            if grade_array[0]['studentId'] == 0:
+                raise requests.ConnectionError('down')
+            return {'status': 1}
+
+        multi_grade_patch.side_effect = multi_grade
+        gradebook = GradeBook(self.CERT, self.URLBASE)
+        gradebook.gradebook_id = self.GRADEBOOK_ID
+        grades = [{'studentId': x} for x in range(10)]
+        result = gradebook.multi_grade_chunked(
+            grades, batch_size=3, max_workers=4
+        )
+        self.assertEqual(multi_grade_patch.call_count, 4)
+        for call in multi_grade_patch.call_args_list:
+            self.assertEqual(call[1]['gradebook_id'], self.GRADEBOOK_ID)
+        self.assertEqual(len(result.failed_chunks), 1)
+        self.assertIsInstance(
+            result.failed_chunks[0].error, requests.ConnectionError
+        )
+        self.assertEqual(result.failed_rows, grades[:3])
+
+    @httpretty.activate
+    def test_multi_grade_chunked_circuit(self):
+        """Verify a circuit opening mid-upload fails only later chunks"""
+        def handle_multi_grade(request, uri, headers):
+            """Fail every chunk after the first"""
+            if json.loads(request.body)[0]['studentId'] == 0:
+                return 200, headers, json.dumps({'status': 1})
+            return 503, headers, ''
+
+        httpretty.register_uri(
+            httpretty.POST, '{0}multiGrades/{1}'.format(
+                self.GRADEBOOK_REGISTER_BASE, self.GRADEBOOK_ID
+            ), body=handle_multi_grade
+        )
+        gradebook = GradeBook(
+            self.CERT, self.URLBASE, retry_policy=RetryPolicy(total=0),
+            circuit_breaker=CircuitBreaker(failure_threshold=2)
+        )
+        gradebook.gradebook_id = self.GRADEBOOK_ID
+        grades = [
+            {'studentId': x, 'assignmentId': 1, 'numericGradeValue': 1.0}
+            for x in range(5)
+        ]
+        result = gradebook.multi_grade_chunked(
+            grades, batch_size=1, max_workers=1
+        )
+        self.assertEqual(
+            [1, -1, -1, -1, -1], [x.status for x in result.chunks]
+        )
+        self.assertEqual({'status': 1}, result.chunks[0].response)
+        # The failing responses open the circuit, later chunks fail fast
+        for chunk in result.chunks[1:3]:
+            self.assertIsInstance(chunk.error, ValueError)
+        for chunk in result.chunks[3:]:
+            self.assertIsInstance(chunk.error, PyLmodCircuitOpen)
+        self.assertEqual(grades[1:], result.failed_rows)
+
     @httpretty.activate
     def test_get_sections(self):
         """Verify we can get sections for a course."""
@@ -637,6 +993,85 @@ class TestGradebook(BaseTest):
         with self.assertRaises(PyLmodNoSuchSection):
             students = gradebook.get_students(section_name='nope')
 
+    @httpretty.activate
+    def test_iter_students(self):
+        """Verify streamed students match get_students."""
+        self._register_get_gradebook()
+        gradebook = GradeBook(self.CERT, self.URLBASE, self.GBUUID)
+        self._register_get_students()
+        students = gradebook.iter_students(include_grade_history=True)
+        # Nothing is requested, not even the gradebook id, until
+        # iteration starts
+        self.assertEqual([], httpretty.latest_requests())
+        self.assertEqual(self.STUDENT_BODY['data'], list(students))
+        self.assertEqual(
+            httpretty.last_request().querystring['includeGradeHistory'],
+            ['true']
+        )
+        self.assertEqual(
+            gradebook.get_students(simple=True),
+            list(gradebook.iter_students(simple=True))
+        )
+
+        self._register_get_sections()
+        self._register_get_students_in_section()
+        section_name = self.SECTION_BODY['data']['recitation'][0]['name']
+        self.assertEqual(
+            gradebook.get_students(section_name=section_name),
+            list(gradebook.iter_students(section_name=section_name))
+        )
+        with self.assertRaises(PyLmodNoSuchSection):
+            list(gradebook.iter_students(section_name='nope'))
+
+    @httpretty.activate
+    def test_response_cache(self):
+        """Verify reads are cached until a write to the gradebook"""
+        self._register_get_gradebook()
+        cache = ResponseCache()
+        gradebook = GradeBook(
+            self.CERT, self.URLBASE, self.GBUUID, response_cache=cache,
+            retry_policy=RetryPolicy(total=0)
+        )
+        self._register_get_students()
+        self._register_get_sections()
+        self._register_get_assignments()
+        self.assertEqual(self.STUDENT_BODY['data'], gradebook.get_students())
+        gradebook.get_sections()
+        gradebook.get_assignments()
+
+        # Changes on the server aren't seen until a write
+        httpretty.reset()
+        self.assertEqual(self.STUDENT_BODY['data'], gradebook.get_students())
+        self.assertEqual(
+            self.SECTION_BODY['data'], gradebook.get_sections()
+        )
+        self.assertEqual(
+            self.ASSIGNMENT_BODY['data'], gradebook.get_assignments()
+        )
+        self.assertEqual(3, cache.hits)
+        # Different parameters are a different response, not cached
+        httpretty.register_uri(
+            httpretty.GET,
+            '{0}assignments/{1}'.format(
+                self.GRADEBOOK_REGISTER_BASE, self.GRADEBOOK_ID
+            ),
+            body=json.dumps({'data': []})
+        )
+        self.assertEqual([], gradebook.get_assignments(max_points=False))
+        self.assertEqual(4, cache.misses)
+
+        self._register_multi_grade({'status': 1})
+        httpretty.register_uri(
+            httpretty.GET,
+            '{0}students/{1}'.format(
+                self.GRADEBOOK_REGISTER_BASE, self.GRADEBOOK_ID
+            ),
+            body=json.dumps({'data': []})
+        )
+        gradebook.multi_grade([])
+        self.assertEqual(0, len(cache))
+        self.assertEqual([], gradebook.get_students())
+
     @httpretty.activate
     def test_get_students_by_email(self):
         """Verify being able to get students by e-mail"""
@@ -667,6 +1102,17 @@ class TestGradebook(BaseTest):
             gradebook.get_student_by_email('cheese')
         )
 
+        # Match against a prebuilt index, regardless of case
+        index = gradebook.get_student_index()
+        self.assertIs(index, gradebook.get_student_index(students=index))
+        self.assertEqual(
+            gradebook.get_student_by_email(
+                real_student['accountEmail'].upper(),
+                students=index
+            ),
+            (real_student['studentId'], real_student)
+        )
+
     @httpretty.activate
     def test_spreadsheet2gradebook_multi(self):
         """Verify that we can use a spreadsheet to set grades
@@ -774,8 +1220,12 @@ class TestGradebook(BaseTest):
             [expected_response]
         )
 
-        # Now with assignment failing to be created
+        # Now with assignment failing to be created. Homework 8 is now
+        # in the assignment catalog, so use a new assignment.
         self._register_create_assignment({})
+        spreadsheet = [
+            {'External email': 'a@example.com', 'Homework 9': 2.2},
+        ]
         with self.assertRaises(PyLmodFailedAssignmentCreation):
             gradebook._spreadsheet2gradebook_multi(
                 csv_reader=spreadsheet,
@@ -807,6 +1257,86 @@ class TestGradebook(BaseTest):
             ]
         )
 
+    @httpretty.activate
+    def test_spreadsheet2gradebook_multi_catalog(self):
+        """Verify repeated uploads reuse the assignment catalog"""
+        self._register_get_gradebook()
+        self._register_get_assignments()
+        self._register_get_students()
+        self._register_multi_grade({'message': 'success'})
+        self._register_create_assignment(
+            dict(data=dict(assignmentId=3, shortName='Homew8'))
+        )
+        gradebook = GradeBook(self.CERT, self.URLBASE, self.GBUUID)
+        spreadsheet = [
+            {'External email': 'a@example.com', 'Homework 8': 2.2},
+        ]
+
+        def assignment_requests():
+            """Count requests for the assignment list"""
+            return len([
+                x for x in httpretty.latest_requests()
+                if x.path.startswith('/service/gradebook/assignments/')
+            ])
+
+        kwargs = dict(
+            csv_reader=spreadsheet,
+            email_field='External email',
+            non_assignment_fields=['External email'],
+        )
+        gradebook._spreadsheet2gradebook_multi(**kwargs)
+        self.assertEqual(assignment_requests(), 1)
+        catalog = gradebook.get_assignment_catalog()
+        self.assertEqual(catalog.by_name('Homework 8')[0], 3)
+        self.assertEqual(catalog.by_short_name('Homew8')[0], 3)
+
+        # The created assignment is found without another round trip
+        gradebook._spreadsheet2gradebook_multi(**kwargs)
+        self.assertEqual(assignment_requests(), 1)
+        self.assertEqual(
+            json.loads(httpretty.last_request().body)[0]['assignmentId'], 3
+        )
+
+        # Deleting it removes it from the catalog
+        httpretty.register_uri(
+            httpretty.DELETE,
+            '{0}assignment/3'.format(self.GRADEBOOK_REGISTER_BASE),
+            body=json.dumps({'status': 1})
+        )
+        gradebook.delete_assignment(3)
+        self.assertEqual((None, None), catalog.by_name('Homework 8'))
+        self.assertEqual(
+            gradebook.get_assignment_by_name('Homework 1', catalog)[0], 1
+        )
+        self.assertEqual(assignment_requests(), 1)
+
+        # A miss in a catalog from an earlier upload refreshes it once
+        # before creating the assignment again
+        gradebook._spreadsheet2gradebook_multi(**kwargs)
+        self.assertEqual(assignment_requests(), 2)
+
+        # Without a catalog the assignments are fetched fresh
+        gradebook.get_assignment_by_name('Homework 1')
+        self.assertEqual(assignment_requests(), 3)
+
+        # Ids passed as strings find the same catalog
+        self.assertIs(
+            gradebook.get_assignment_catalog(),
+            gradebook.get_assignment_catalog(str(self.GRADEBOOK_ID))
+        )
+        gradebook.create_assignment(
+            'Homework 10', 'HW10', 1, 10, '11-04-2999',
+            gradebook_id=str(self.GRADEBOOK_ID)
+        )
+        self.assertEqual(
+            3, gradebook.get_assignment_catalog().by_name('Homework 10')[0]
+        )
+
+        # An expired catalog is fetched again
+        with mock.patch.object(gradebook, 'ASSIGNMENT_CATALOG_TTL', -1):
+            gradebook.get_assignment_catalog()
+        self.assertEqual(assignment_requests(), 4)
+
     @data(
         (50, 0, True, 50),  # happy case
         ('50', '0', True, 50),  # happy case with strings
@@ -1039,6 +1569,34 @@ class TestGradebook(BaseTest):
         self.assertEqual(called_with[0][2], alternate_email_field)
         self.assertEqual(called_with[0][3], non_assignment_fields)
 
+    @mock.patch.object(
+        GradeBook,
+        '_spreadsheet2gradebook_multi',
+        autospec=True,
+    )
+    @mock.patch('csv.DictReader')
+    def test_spreadsheet2gradebook_deadline(self, csv_patch, multi_patch):
+        """Verify the upload is made by a copy bound to the deadline"""
+        gradebook = GradeBook(self.CERT, self.URLBASE)
+        gradebook.spreadsheet2gradebook(csv_patch, deadline=60)
+        client = multi_patch.call_args[0][0]
+        self.assertIsNot(gradebook, client)
+        self.assertTrue(time.monotonic() < client.deadline)
+        self.assertIsNone(gradebook.deadline)
+        gradebook.spreadsheet2gradebook(csv_patch)
+        self.assertIs(gradebook, multi_patch.call_args[0][0])
+
+    @httpretty.activate
+    def test_spreadsheet2gradebook_deadline_exceeded(self):
+        """Verify an upload out of time stops before the next request"""
+        gradebook = GradeBook(self.CERT, self.URLBASE)
+        gradebook.gradebook_id = 1234
+        with self.assertRaises(PyLmodDeadlineExceeded):
+            gradebook.spreadsheet2gradebook(
+                io.StringIO('External email,A\na@b.c,1\n'), deadline=0
+            )
+        self.assertEqual([], httpretty.latest_requests())
+
     @mock.patch.object(
         GradeBook,
         '_spreadsheet2gradebook_multi',
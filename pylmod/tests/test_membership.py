@@ -7,6 +7,7 @@ import json
 from mock import patch
 from pylmod import Membership
 from pylmod.exceptions import (
+    PyLmodDeadlineExceeded,
     PyLmodUnexpectedData,
 )
 
@@ -147,6 +148,37 @@ class TestMembership(BaseTest):
         last_request = httpretty.last_request()
         self.assertEqual(last_request.querystring, dict(uuid=[self.CUUID]))
 
+    @httpretty.activate
+    def test_lazy_course_id(self):
+        """Verify the course id is resolved once, on first use"""
+        self._register_get_course_id(body=self.COURSE_DATA)
+        test_membership = Membership(self.CERT, self.URLBASE, self.CUUID)
+        bound = test_membership.for_course(self.CUUID)
+        self.assertEqual([], httpretty.latest_requests())
+        self.assertEqual(self.COURSE_ID, bound.course_id)
+        self.assertEqual(self.COURSE_ID, test_membership.course_id)
+        self.assertEqual(1, len(httpretty.latest_requests()))
+
+    @httpretty.activate
+    def test_prefetch_group_ids(self):
+        """Verify group ids are resolved up front and reused"""
+        self._register_get_group(body=self.COURSE_DATA)
+        self._register_get_membership(body=self.MEMBERSHIP_DATA)
+        test_membership = Membership(self.CERT, self.URLBASE)
+        group_id = self.COURSE_DATA['response']['docs'][0]['id']
+        self.assertEqual(
+            {self.CUUID: group_id},
+            test_membership.prefetch_group_ids([self.CUUID])
+        )
+        test_membership.get_membership(self.CUUID)
+        test_membership.get_membership(self.CUUID)
+        self.assertEqual(
+            ['/service/membership/group',
+             '/service/membership/group/{0}/member'.format(group_id),
+             '/service/membership/group/{0}/member'.format(group_id)],
+            [x.path.split('?')[0] for x in httpretty.latest_requests()]
+        )
+
     @httpretty.activate
     def test_get_course_guide_staff(self):
         """Verify that we can get staff roster as expected."""
@@ -232,6 +264,134 @@ class TestMembership(BaseTest):
             self.EMAIL, 'hacker', uuid=self.CUUID
         )
         assert has_role is False
+        has_role = test_membership.email_has_role(
+            self.EMAIL, self.ROLE, uuid=self.CUUID, deadline=60
+        )
+        assert has_role is True
+        assert test_membership.deadline is None
+        # Only the snapshot fetched first needs the service
+        test_membership = Membership(self.CERT, self.URLBASE)
+        requests_made = len(httpretty.latest_requests())
+        with self.assertRaises(PyLmodDeadlineExceeded):
+            test_membership.email_has_role(
+                self.EMAIL, self.ROLE, uuid=self.CUUID, deadline=0
+            )
+        assert len(httpretty.latest_requests()) == requests_made
+
+    @httpretty.activate
+    def test_membership_snapshot(self):
+        """Verify role checks are answered from one snapshot"""
+        self._register_get_group(body=self.COURSE_DATA)
+        self._register_get_membership(body={u'response': {u'docs': [
+            {u'email': self.EMAIL, u'roleType': self.ROLE},
+            {u'email': u'ta@example.com', u'roleType': u'TA'},
+            {u'email': u'ta@example.com', u'roleType': u'Instructor'},
+        ]}})
+        test_membership = Membership(self.CERT, self.URLBASE, self.CUUID)
+        self.assertEqual(
+            {
+                self.EMAIL: frozenset([self.ROLE]),
+                u'ta@example.com': frozenset([u'TA', u'Instructor']),
+                u'nobody@example.com': frozenset(),
+            },
+            test_membership.roles_for_emails(
+                [self.EMAIL, u'ta@example.com', u'nobody@example.com']
+            )
+        )
+        self.assertTrue(test_membership.email_has_role(
+            u'ta@example.com', u'TA'
+        ))
+        self.assertFalse(test_membership.email_has_role(
+            u'TA@example.com', u'TA'
+        ))
+        # One group lookup and one membership download
+        self.assertEqual(2, len(httpretty.latest_requests()))
+
+        snapshot = test_membership.get_membership_snapshot()
+        self.assertEqual(self.CUUID, snapshot.uuid)
+        self.assertIs(
+            snapshot,
+            test_membership.for_course(self.CUUID).get_membership_snapshot()
+        )
+        refreshed = test_membership.get_membership_snapshot(refresh=True)
+        self.assertIsNot(snapshot, refreshed)
+        self.assertEqual(3, len(httpretty.latest_requests()))
+        self.assertIs(refreshed, test_membership.get_membership_snapshot())
+
+        # Snapshots expire
+        test_membership.MEMBERSHIP_SNAPSHOT_TTL = -1
+        test_membership.get_membership_snapshot()
+        self.assertEqual(4, len(httpretty.latest_requests()))
+
+    @httpretty.activate
+    def test_roles_by_course(self):
+        """Verify roles are gathered across courses"""
+        members = {
+            u'/project/a': [
+                {u'email': u'ta@example.com', u'roleType': u'TA'},
+                {u'email': self.EMAIL, u'roleType': self.ROLE},
+            ],
+            u'/project/b': [
+                {u'email': u'ta@example.com', u'roleType': u'Instructor'},
+                {u'email': u'ta@example.com', u'roleType': u'student'},
+            ],
+        }
+        group_ids = {u'/project/a': 1, u'/project/b': 2}
+
+        def group(request, uri, headers):
+            """Answer with the group of the requested course"""
+            uuid = request.querystring['uuid'][0]
+            body = {u'response': {u'docs': [{u'id': group_ids[uuid]}]}}
+            return 200, headers, json.dumps(body)
+
+        def member(request, uri, headers):
+            """Answer with the members of the requested group"""
+            group_id = int(uri.split('/')[-2])
+            uuid = [x for x, y in group_ids.items() if y == group_id][0]
+            body = {u'response': {u'docs': members[uuid]}}
+            return 200, headers, json.dumps(body)
+
+        httpretty.register_uri(
+            httpretty.GET, self.MEMBERSHIP_REGISTER_BASE + 'group',
+            body=group
+        )
+        for group_id in group_ids.values():
+            httpretty.register_uri(
+                httpretty.GET, '{0}group/{1}/member'.format(
+                    self.MEMBERSHIP_REGISTER_BASE, group_id
+                ), body=member
+            )
+        test_membership = Membership(self.CERT, self.URLBASE)
+        emails = [u'ta@example.com', self.EMAIL, u'nobody@example.com']
+        self.assertEqual(
+            {
+                u'ta@example.com': {
+                    u'/project/a': frozenset([u'TA']),
+                    u'/project/b': frozenset([u'Instructor', u'student']),
+                },
+                self.EMAIL: {u'/project/a': frozenset([self.ROLE])},
+            },
+            test_membership.roles_by_course(
+                [u'/project/a', u'/project/b', u'/project/a'], emails,
+                max_workers=2
+            )
+        )
+        self.assertEqual(4, len(httpretty.latest_requests()))
+        # Answered from the snapshots
+        self.assertEqual(
+            {
+                u'ta@example.com': {
+                    u'/project/a': frozenset([u'TA']),
+                    u'/project/b': frozenset([u'Instructor']),
+                },
+            },
+            test_membership.roles_by_course(
+                group_ids, emails, role_names=[u'TA', u'Instructor']
+            )
+        )
+        self.assertEqual(4, len(httpretty.latest_requests()))
+        with self.assertRaises(ValueError):
+            test_membership.roles_by_course(group_ids, emails, max_workers=0)
 
     @httpretty.activate
     def test_get_group_default_uuid(self):
@@ -0,0 +1,124 @@
+"""
+Verify the Prometheus metrics of requests
+"""
+import os
+import shutil
+import tempfile
+
+import requests
+
+from pylmod import GradeBook
+from pylmod.metrics import CONTENT_TYPE, MetricsCollector
+from pylmod.tests.common import BaseTest, LocalService
+
+
+class TestMetrics(BaseTest):
+    """Verify metrics are collected from hooks and exported"""
+
+    @staticmethod
+    def event(**info):
+        """Make the details of a request event"""
+        details = {
+            'method': 'GET', 'endpoint': 'students/{id}', 'status': 200,
+            'duration': 0.2, 'retries': 0, 'error': None,
+        }
+        details.update(info)
+        return details
+
+    def test_render(self):
+        """Verify the text format of every metric"""
+        metrics = MetricsCollector(buckets=(0.1, 1))
+        metrics.before_request(self.event())
+        metrics.before_request(self.event())
+        metrics.request(self.event(duration=0.05))
+        metrics.before_request(self.event(method='POST',
+                                          endpoint='multiGrades/{id}'))
+        metrics.request(self.event(
+            method='POST', endpoint='multiGrades/{id}', status=None,
+            duration=5, retries=2, error=requests.ConnectionError('down')
+        ))
+        metrics.cache({'endpoint': 'students/{id}', 'hit': True})
+        lines = metrics.render().splitlines()
+        get = 'endpoint="students/{id}",method="GET"'
+        post = 'endpoint="multiGrades/{id}",method="POST"'
+        for line in [
+                '# TYPE pylmod_request_duration_seconds histogram',
+                'pylmod_request_duration_seconds_bucket{endpoint='
+                '"students/{id}",le="0.1",method="GET"} 1',
+                'pylmod_request_duration_seconds_bucket{endpoint='
+                '"students/{id}",le="+Inf",method="GET"} 1',
+                'pylmod_request_duration_seconds_bucket{endpoint='
+                '"multiGrades/{id}",le="1.0",method="POST"} 0',
+                'pylmod_request_duration_seconds_bucket{endpoint='
+                '"multiGrades/{id}",le="+Inf",method="POST"} 1',
+                'pylmod_request_duration_seconds_count{' + post + '} 1',
+                'pylmod_request_duration_seconds_sum{' + post + '} 5',
+                'pylmod_requests_total{' + get + ',status="200"} 1',
+                'pylmod_requests_total{' + post + ',status="none"} 1',
+                'pylmod_request_errors_total{' + post.replace(
+                    ',method', ',exception="ConnectionError",method') + '} 1',
+                'pylmod_request_retries_total{' + post + '} 2',
+                '# TYPE pylmod_requests_in_flight gauge',
+                'pylmod_requests_in_flight{' + get + '} 1',
+                'pylmod_requests_in_flight{' + post + '} 0',
+                'pylmod_cache_lookups_total{endpoint="students/{id}",'
+                'result="hit"} 1',
+        ]:
+            self.assertIn(line, lines)
+
+    def test_label_escaping(self):
+        """Verify label values are escaped"""
+        metrics = MetricsCollector()
+        metrics.cache({'endpoint': 'a"b\\c\nd', 'hit': False})
+        self.assertIn(
+            r'pylmod_cache_lookups_total{endpoint="a\"b\\c\nd",'
+            r'result="miss"} 1',
+            metrics.render().splitlines()
+        )
+
+    def test_attached_client(self):
+        """Verify requests of an attached client are measured"""
+        metrics = MetricsCollector()
+        with LocalService() as service:
+            gradebook = GradeBook(self.CERT, service.urlbase)
+            metrics.attach(gradebook)
+            gradebook.get_students(gradebook_id=1)
+            gradebook.for_gradebook(gradebook_id=2).get_students()
+            metrics.detach(gradebook)
+            gradebook.get_students(gradebook_id=3)
+        lines = metrics.render().splitlines()
+        labels = 'endpoint="students/{id}",method="GET"'
+        self.assertIn(
+            'pylmod_requests_total{' + labels + ',status="200"} 2', lines
+        )
+        self.assertIn('pylmod_requests_in_flight{' + labels + '} 0', lines)
+        self.assertIn(
+            'pylmod_request_duration_seconds_count{' + labels + '} 2', lines
+        )
+
+    def test_write(self):
+        """Verify the metrics are written to a file"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'pylmod.prom')
+        metrics = MetricsCollector()
+        metrics.cache({'endpoint': 'staff/{id}', 'hit': True})
+        metrics.write(path)
+        metrics.write(path)
+        with open(path) as handle:
+            self.assertEqual(metrics.render(), handle.read())
+        self.assertEqual(['pylmod.prom'], os.listdir(directory))
+
+    def test_serve(self):
+        """Verify the metrics are served over HTTP"""
+        metrics = MetricsCollector()
+        metrics.cache({'endpoint': 'staff/{id}', 'hit': True})
+        server = metrics.serve(port=0)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = 'http://{0}:{1}'.format(*server.server_address)
+        response = requests.get(url + '/metrics')
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(CONTENT_TYPE, response.headers['Content-Type'])
+        self.assertEqual(metrics.render(), response.text)
+        self.assertEqual(404, requests.get(url + '/other').status_code)
@@ -0,0 +1,140 @@
+"""
+Verify the token buckets pacing requests
+"""
+import os
+import shutil
+import tempfile
+
+from pylmod import GradeBook, Membership
+from pylmod.ratelimit import FileTokenBucket, RateLimiter, TokenBucket
+from pylmod.tests.common import BaseTest, LocalService
+
+
+class FakeClock(object):
+    """Clock advanced by the sleeps it is asked for."""
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        """Advance the clock instead of sleeping"""
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestRateLimit(BaseTest):
+    """Verify token buckets and the rate limiter"""
+
+    def setUp(self):
+        super(TestRateLimit, self).setUp()
+        self.clock = FakeClock()
+
+    def bucket(self, rate, burst=None):
+        """Make a bucket on the fake clock"""
+        return TokenBucket(rate, burst, clock=self.clock,
+                           sleep=self.clock.sleep)
+
+    def test_bucket(self):
+        """Verify bursts are let through and then paced"""
+        bucket = self.bucket(rate=2, burst=3)
+        self.assertEqual([0, 0, 0, 0.5, 0.5],
+                         [bucket.acquire() for _ in range(5)])
+        self.assertEqual([0.5, 0.5], self.clock.sleeps)
+        self.assertEqual(2, bucket.waits)
+        # Refills while idle, up to the burst
+        self.clock.now += 60
+        self.assertEqual([0, 0, 0, 0.5],
+                         [bucket.acquire() for _ in range(4)])
+
+    def test_bucket_reservations(self):
+        """Verify waiting requests queue behind each other"""
+        bucket = self.bucket(rate=4, burst=1)
+        self.assertEqual([0, 0.25, 0.5, 0.75],
+                         [bucket.reserve() for _ in range(4)])
+
+    def test_bucket_validation(self):
+        """Verify rates and bursts must be positive"""
+        self.assertEqual(1, TokenBucket(0.5).burst)
+        with self.assertRaises(ValueError):
+            TokenBucket(0)
+        with self.assertRaises(ValueError):
+            TokenBucket(1, burst=0)
+
+    def test_file_bucket(self):
+        """Verify buckets on the same file share their tokens"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'bucket')
+        first, second = [
+            FileTokenBucket(path, rate=1, burst=2, clock=self.clock,
+                            sleep=self.clock.sleep)
+            for _ in range(2)
+        ]
+        self.assertEqual(0, first.reserve())
+        self.assertEqual(0, second.reserve())
+        self.assertEqual(1, first.reserve())
+        self.assertEqual(2, second.reserve())
+        self.clock.now += 10
+        self.assertEqual(0, second.reserve())
+        # A corrupt file is reset to a full bucket
+        with open(path, 'w') as handle:
+            handle.write('garbage')
+        self.assertEqual([0, 0, 1], [first.reserve() for _ in range(3)])
+
+    def test_limiter_buckets(self):
+        """Verify requests take tokens from their endpoint family"""
+        read, write, grades = [self.bucket(1) for _ in range(3)]
+        limiter = RateLimiter(read=read, write=write,
+                              endpoints={'multiGrades': grades})
+        self.assertIs(read, limiter.bucket_for('GET', 'students'))
+        self.assertIs(write, limiter.bucket_for('POST', 'assignment'))
+        self.assertIs(grades, limiter.bucket_for('POST', 'multiGrades'))
+        self.assertIsNone(RateLimiter().bucket_for('GET', 'students'))
+        self.assertEqual(0, RateLimiter().acquire('GET', 'students'))
+
+    def test_shared_limiter(self):
+        """Verify clients sharing a limiter are paced together"""
+        limiter = RateLimiter(
+            read=self.bucket(rate=10, burst=1),
+            endpoints={'multiGrades': self.bucket(rate=1, burst=1)},
+        )
+        throttled = []
+        with LocalService() as service:
+            gradebook = GradeBook(
+                self.CERT, service.urlbase, rate_limiter=limiter
+            )
+            gradebook.register_hook('throttle', throttled.append)
+            other = GradeBook(
+                self.CERT, service.urlbase, rate_limiter=limiter
+            )
+            gradebook.get_students(gradebook_id=1)
+            other.get_students(gradebook_id=2)
+            gradebook.multi_grade([{'studentId': 1}], gradebook_id=1)
+            gradebook.multi_grade([{'studentId': 1}], gradebook_id=1)
+        self.assertEqual(4, len(service.requests))
+        self.assertEqual([0.1, 1], self.clock.sleeps)
+        # Only this client's own throttled request is reported to it
+        self.assertEqual(
+            [('POST', 'multiGrades', 1)],
+            [(x['method'], x['endpoint'], x['sleep']) for x in throttled]
+        )
+
+    def test_endpoint(self):
+        """Verify requests are attributed to their endpoint"""
+        # pylint: disable=protected-access
+        membership = Membership(self.CERT, self.URLBASE)
+        self.assertEqual('course', membership._endpoint(
+            membership._url_format('course/1234/members')
+        ))
+        self.assertEqual('courseGuide', membership._endpoint(
+            membership._url_format('courseGuide?courseUuid=x')
+        ))
+        self.assertEqual(
+            'https://elsewhere/x',
+            membership._endpoint('https://elsewhere/x')
+        )
@@ -0,0 +1,128 @@
+"""
+Verify the memory-compact records
+"""
+import json
+from unittest import TestCase
+
+from pylmod.records import Assignment, GradeColumns, GradeEntry, Student
+
+
+class TestRecords(TestCase):
+    """Validate conversion and comparison of records"""
+
+    def test_from_dict(self):
+        """Verify records keep their fields and drop the rest"""
+        data = {
+            'studentId': 1, 'accountEmail': 'a@mit.edu',
+            'displayName': 'Alice', 'section': 'S1', 'sectionId': 7,
+            'photoUrl': None, 'nickName': 'Al',
+        }
+        student = Student.from_dict(data)
+        self.assertEqual(1, student.student_id)
+        self.assertEqual('a@mit.edu', student.email)
+        self.assertFalse(hasattr(student, '__dict__'))
+        del data['photoUrl'], data['nickName']
+        self.assertEqual(data, student.to_dict())
+        self.assertEqual(
+            "Assignment(assignment_id=2, name='HW', short_name=None, "
+            "max_points_total=None, weight=None, due_date=None)",
+            repr(Assignment.from_dict({'assignmentId': 2, 'name': 'HW'}))
+        )
+
+    def test_construction(self):
+        """Verify fields are given in order or by name"""
+        self.assertEqual(
+            GradeEntry(1, 2, 0.5, 2, False),
+            GradeEntry(1, 2, mode=2, numeric_grade_value=0.5,
+                       is_grade_approved=False)
+        )
+        self.assertNotEqual(GradeEntry(1, 2), GradeEntry(1, 3))
+        self.assertNotEqual(GradeEntry(1), Student(1))
+        with self.assertRaises(TypeError):
+            GradeEntry(1, 2, 3, 4, 5, 6)
+        with self.assertRaises(TypeError):
+            GradeEntry(grade=1)
+
+
+class TestGradeColumns(TestCase):
+    """Validate storage, slicing and encoding of GradeColumns"""
+
+    GRADES = [
+        {'studentId': 1, 'assignmentId': 10, 'numericGradeValue': 0.5,
+         'mode': 2, 'isGradeApproved': False},
+        {'studentId': 2, 'assignmentId': 10, 'numericGradeValue': 1e-07,
+         'mode': 2, 'isGradeApproved': True},
+        {'studentId': 3, 'assignmentId': 11, 'numericGradeValue': 3.0,
+         'mode': 1, 'isGradeApproved': False},
+    ]
+
+    def test_columns(self):
+        """Verify grades are indexed, sliced and iterated"""
+        grades = GradeColumns(self.GRADES)
+        self.assertEqual(3, len(grades))
+        self.assertEqual(GradeEntry(2, 10, 1e-07, 2, True), grades[1])
+        self.assertEqual(GradeEntry(3, 11, 3.0, 1, False), grades[-1])
+        self.assertEqual(self.GRADES[1:], grades[1:].to_dicts())
+        self.assertEqual(self.GRADES, [x.to_dict() for x in grades])
+        self.assertEqual('<GradeColumns of 3 grades>', repr(grades))
+        # Records and defaults
+        grades = GradeColumns([GradeEntry(1, 2, 0.0)])
+        grades.append(4, 5, 1.0, approved=True)
+        self.assertEqual(
+            [GradeEntry(1, 2, 0.0, 2, False), GradeEntry(4, 5, 1.0, 2, True)],
+            list(grades)
+        )
+        with self.assertRaises(TypeError):
+            grades.append('6', 7, 1.0)
+
+    def test_unsupported_grades(self):
+        """Verify grades the columns can't hold are refused, not dropped"""
+        excused = {
+            'comment': None, 'booleanGradeValue': None, 'studentId': 1,
+            'assignmentId': 2, 'specialGradeValue': 'x',
+            'letterGradeValue': None, 'mode': 2,
+            'numericGradeValue': None, 'isGradeApproved': False,
+        }
+        with self.assertRaises(ValueError) as context:
+            GradeColumns([excused])
+        self.assertIn('specialGradeValue', str(context.exception))
+        with self.assertRaises(ValueError):
+            GradeColumns([dict(self.GRADES[0], comment='late')])
+        with self.assertRaises(TypeError):
+            GradeColumns([dict(self.GRADES[0], numericGradeValue=None)])
+        # Empty optional fields are accepted
+        grades = GradeColumns([dict(
+            excused, specialGradeValue=None, numericGradeValue=1.0,
+            returnAffectedValues=False
+        )])
+        self.assertEqual([GradeEntry(1, 2, 1.0, 2, False)], list(grades))
+
+    def test_append_refused(self):
+        """Verify a refused grade leaves every column unchanged"""
+        grades = GradeColumns(self.GRADES)
+        for args in [(4, 10, None), (4, '10', 1.0), (4, 10, '1.0'),
+                     (4, 10, 1.0, 300), (1 << 63, 10, 1.0)]:
+            with self.assertRaises((TypeError, OverflowError)):
+                grades.append(*args)
+            self.assertEqual(
+                [3] * 5, [len(column) for column in grades._columns()]
+            )
+        grades.extend(GradeColumns(self.GRADES[:1]))
+        self.assertEqual(self.GRADES + self.GRADES[:1], grades.to_dicts())
+
+    def test_encode(self):
+        """Verify the body is what the json module would encode"""
+        grades = GradeColumns(self.GRADES)
+        self.assertEqual(self.GRADES, json.loads(grades.encode()))
+        self.assertEqual(
+            json.dumps(self.GRADES, separators=(',', ':')),
+            grades.encode().decode('utf-8')
+        )
+        grades = GradeColumns()
+        self.assertEqual(b'[]', grades.encode())
+        for value in (float('nan'), float('inf'), -float('inf')):
+            grades.append(1, 1, value)
+        self.assertEqual(
+            json.dumps(grades.to_dicts(), separators=(',', ':')),
+            grades.encode().decode('utf-8')
+        )
@@ -0,0 +1,108 @@
+"""
+Verify the retry policy decisions
+"""
+import email.utils
+import time
+from unittest import TestCase
+
+import mock
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from pylmod.retry import RetryPolicy
+
+
+class TestRetryPolicy(TestCase):
+    """Validate RetryPolicy backoff, limits and error classification"""
+
+    def test_backoff(self):
+        """Verify exponential backoff is capped and jittered"""
+        policy = RetryPolicy(backoff_factor=1, backoff_max=5, jitter=0)
+        self.assertEqual(
+            [1, 2, 4, 5, 5], [policy.get_backoff(x) for x in range(1, 6)]
+        )
+        policy = RetryPolicy(backoff_factor=1, jitter=0.5)
+        for _ in range(20):
+            self.assertTrue(1 <= policy.get_backoff(1) <= 1.5)
+
+    def test_retry_after(self):
+        """Verify Retry-After seconds and dates are honored"""
+        policy = RetryPolicy(backoff_factor=1, jitter=0)
+        response = requests.Response()
+        self.assertEqual(2, policy.get_sleep(2, response))
+
+        response.headers['Retry-After'] = '7'
+        self.assertEqual(7, policy.get_sleep(1, response))
+
+        response.headers['Retry-After'] = email.utils.formatdate(
+            time.time() + 30, usegmt=True
+        )
+        self.assertTrue(25 < policy.get_sleep(1, response) <= 30)
+
+        response.headers['Retry-After'] = 'soon'
+        self.assertEqual(1, policy.get_sleep(1, response))
+
+        policy.respect_retry_after = False
+        response.headers['Retry-After'] = '7'
+        self.assertEqual(1, policy.get_sleep(1, response))
+
+    def test_retry_after_cap(self):
+        """Verify a long Retry-After is capped"""
+        response = requests.Response()
+        response.headers['Retry-After'] = '86400'
+        self.assertEqual(60, RetryPolicy().get_sleep(1, response))
+        self.assertEqual(
+            600, RetryPolicy(max_retry_after=600).get_sleep(1, response)
+        )
+        response.headers['Retry-After'] = email.utils.formatdate(
+            time.time() + 86400, usegmt=True
+        )
+        self.assertEqual(
+            5, RetryPolicy(backoff_max=5).get_sleep(1, response)
+        )
+
+    def test_allows(self):
+        """Verify the retry count and time budget"""
+        policy = RetryPolicy(total=2, max_elapsed=10)
+        self.assertTrue(policy.allows(2, 0, 1))
+        self.assertFalse(policy.allows(3, 0, 1))
+        self.assertFalse(policy.allows(1, 8, 3))
+        self.assertTrue(RetryPolicy(max_elapsed=None).allows(1, 1e6, 1e6))
+
+    def test_should_retry(self):
+        """Verify which errors and statuses are retried"""
+        policy = RetryPolicy()
+        self.assertTrue(policy.should_retry_status('GET', 503))
+        self.assertTrue(policy.should_retry_status('GET', 429))
+        self.assertTrue(policy.should_retry_status('GET', 504))
+        self.assertFalse(policy.should_retry_status('GET', 500))
+        self.assertFalse(policy.should_retry_status('GET', 200))
+        # A write may have been applied behind a failing proxy
+        self.assertTrue(policy.should_retry_status('POST', 503))
+        self.assertTrue(policy.should_retry_status('POST', 429))
+        self.assertFalse(policy.should_retry_status('POST', 502))
+        self.assertFalse(policy.should_retry_status('POST', 504))
+
+        read_error = requests.ReadTimeout('slow')
+        self.assertTrue(policy.should_retry_error('GET', read_error))
+        self.assertFalse(policy.should_retry_error('POST', read_error))
+
+        connect_error = requests.ConnectionError(MaxRetryError(
+            None, '/', NewConnectionError(None, 'refused')
+        ))
+        self.assertTrue(RetryPolicy.is_connect_error(connect_error))
+        self.assertTrue(policy.should_retry_error('POST', connect_error))
+        self.assertTrue(policy.should_retry_error(
+            'POST', requests.ConnectTimeout('slow')
+        ))
+        self.assertFalse(policy.should_retry_error(
+            'GET', requests.TooManyRedirects('loop')
+        ))
+
+    @mock.patch('pylmod.retry.time.sleep')
+    def test_sleep(self, sleep_patch):
+        """Verify only positive waits sleep"""
+        RetryPolicy.sleep(0)
+        self.assertFalse(sleep_patch.called)
+        RetryPolicy.sleep(1.5)
+        sleep_patch.assert_called_with(1.5)
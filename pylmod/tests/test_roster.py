@@ -0,0 +1,147 @@
+"""
+Verify the staff roster merged from the gradebook and course guide
+"""
+import json
+
+import httpretty
+
+from pylmod import GradeBook, Membership
+from pylmod.roster import StaffRoster
+from pylmod.tests.common import BaseTest
+
+
+class TestStaffRoster(BaseTest):
+    """Verify merging, lookups and expiry of StaffRoster"""
+
+    GRADEBOOK_STAFF = {
+        'data': {
+            'COURSE_ADMIN': [
+                {'accountEmail': 'ben@mit.edu',
+                 'displayName': 'Benjamin Franklin'},
+            ],
+            'COURSE_TA': [
+                {'accountEmail': 'Huey@MIT.EDU', 'displayName': 'Huey Duck'},
+                {'accountEmail': 'ben@mit.edu',
+                 'displayName': 'Benjamin Franklin'},
+                {'accountEmail': 'john.smith@mit.edu',
+                 'displayName': 'John Smith'},
+                {'accountEmail': 'jsmith@mit.edu',
+                 'displayName': 'John Smith'},
+            ],
+        }
+    }
+    # As documented by Membership.get_course_guide_staff, without emails
+    COURSE_GUIDE_STAFF = {
+        'response': {
+            'docs': [
+                {'displayName': 'huey  duck', 'role': 'Instructor',
+                 'sortableDisplayName': 'Duck, Huey'},
+                {'displayName': 'George Washington', 'role': 'CourseAdmin',
+                 'sortableDisplayName': 'Washington, George'},
+                {'displayName': 'Louie Duck', 'role': 'TA',
+                 'sortableDisplayName': 'Duck, Louie'},
+                {'displayName': 'Louie Duck', 'role': 'Instructor',
+                 'sortableDisplayName': 'Duck, Louie'},
+                {'displayName': 'John Smith', 'role': 'Instructor',
+                 'sortableDisplayName': 'Smith, John'},
+            ]
+        }
+    }
+
+    def setUp(self):
+        super(TestStaffRoster, self).setUp()
+        self.now = 0.0
+        httpretty.enable()
+        self.addCleanup(httpretty.reset)
+        self.addCleanup(httpretty.disable)
+        httpretty.register_uri(
+            httpretty.GET, self.GRADEBOOK_REGISTER_BASE + 'staff/7',
+            body=json.dumps(self.GRADEBOOK_STAFF)
+        )
+        httpretty.register_uri(
+            httpretty.GET,
+            self.MEMBERSHIP_REGISTER_BASE + 'courseguide/course/12/staff',
+            body=json.dumps(self.COURSE_GUIDE_STAFF)
+        )
+        self.gradebook = GradeBook(self.CERT, self.URLBASE)
+        self.gradebook.gradebook_id = 7
+        self.membership = Membership(self.CERT, self.URLBASE)
+        self.membership.course_id = 12
+
+    def roster(self, **kwargs):
+        """Make a roster on a clock controlled by the test"""
+        return StaffRoster(clock=lambda: self.now, **kwargs)
+
+    def test_merged(self):
+        """Verify both sources are merged by email and display name"""
+        roster = self.roster(
+            gradebook=self.gradebook, membership=self.membership
+        )
+        self.assertEqual(
+            frozenset(['TA', 'Instructor']), roster.roles('huey@mit.edu')
+        )
+        self.assertEqual(
+            frozenset(['CourseAdmin', 'TA']), roster.roles('BEN@mit.edu')
+        )
+        self.assertTrue(roster.has_role('huey@mit.edu', 'Instructor'))
+        self.assertTrue(roster.has_role('huey@mit.edu', 'COURSE_TA'))
+        self.assertFalse(roster.has_role('nobody@mit.edu', 'TA'))
+        self.assertEqual(frozenset(), roster.roles('nobody@mit.edu'))
+        huey = roster.get('huey@mit.edu')
+        self.assertEqual({'gradebook', 'courseguide'}, huey['sources'])
+        self.assertEqual('Huey@MIT.EDU', huey['email'])
+        self.assertEqual(huey, roster.get_by_name('Huey Duck'))
+        # Staff only in the course guide are found by name
+        self.assertEqual(
+            {'TA', 'Instructor'}, roster.get_by_name('louie duck')['roles']
+        )
+        self.assertIsNone(roster.get_by_name('George Washington')['email'])
+        # A name shared by several people isn't merged
+        self.assertIsNone(roster.get_by_name('John Smith'))
+        self.assertEqual(
+            frozenset(['TA']), roster.roles('john.smith@mit.edu')
+        )
+        self.assertIn('jsmith@mit.edu', roster)
+        self.assertEqual(7, len(roster))
+        self.assertEqual(
+            ['Benjamin Franklin', 'Huey Duck', 'John Smith', 'John Smith',
+             'George Washington', 'Louie Duck', 'John Smith'],
+            [x['displayName'] for x in roster.members()]
+        )
+        self.assertEqual(2, len(httpretty.latest_requests()))
+
+    def test_ttl(self):
+        """Verify the staff are fetched again once expired"""
+        roster = self.roster(gradebook=self.gradebook, ttl=60)
+        self.assertTrue(roster.has_role('ben@mit.edu', 'CourseAdmin'))
+        self.now = 59
+        roster.roles('ben@mit.edu')
+        self.assertEqual(1, len(httpretty.latest_requests()))
+        self.now = 60
+        roster.roles('ben@mit.edu')
+        self.assertEqual(2, len(httpretty.latest_requests()))
+        roster.refresh()
+        self.assertEqual(3, len(httpretty.latest_requests()))
+
+    def test_explicit_ids(self):
+        """Verify the course may be given apart from the clients"""
+        roster = self.roster(
+            membership=Membership(self.CERT, self.URLBASE), course_id=12
+        )
+        self.assertEqual(
+            {'Instructor'}, roster.get_by_name('Huey Duck')['roles']
+        )
+
+    def test_copies(self):
+        """Verify members returned can't change the roster"""
+        roster = self.roster(gradebook=self.gradebook)
+        roster.get('ben@mit.edu')['roles'].add('Instructor')
+        roster.members()[0]['sources'].clear()
+        ben = roster.get('ben@mit.edu')
+        self.assertEqual({'CourseAdmin', 'TA'}, ben['roles'])
+        self.assertEqual({'gradebook'}, ben['sources'])
+
+    def test_validation(self):
+        """Verify a client is needed"""
+        with self.assertRaises(ValueError):
+            StaffRoster()
@@ -0,0 +1,171 @@
+"""
+Verify concurrent identical requests share one call
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pylmod import GradeBook
+from pylmod.aio import AsyncGradeBook
+from pylmod.base import Base
+from pylmod.exceptions import PyLmodDeadlineExceeded
+from pylmod.singleflight import AsyncSingleFlight, SingleFlight
+from pylmod.tests.common import BaseTest, LocalService
+from pylmod.tests.test_aio import MockService
+
+THREADS = 8
+
+
+def wait_for(condition, timeout=5):
+    """Wait for another thread to make ``condition()`` true."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('Timed out waiting')
+        time.sleep(0.001)
+
+
+class TestSingleFlight(BaseTest):
+    """Verify the threaded and asyncio single-flight layers"""
+
+    def test_shared_call(self):
+        """Verify waiting threads get copies of the one call's result"""
+        flight = SingleFlight()
+        calls = []
+
+        def call():
+            """Return once every other thread is waiting"""
+            calls.append(1)
+            wait_for(lambda: flight.shared == THREADS - 1)
+            return {'data': [1, 2]}
+
+        with ThreadPoolExecutor(max_workers=THREADS) as executor:
+            results = list(executor.map(
+                lambda _: flight.do(('key',), call), range(THREADS)
+            ))
+        self.assertEqual(1, len(calls))
+        self.assertEqual([{'data': [1, 2]}] * THREADS, results)
+        self.assertEqual(THREADS, len(set(id(result) for result in results)))
+        self.assertEqual(0, len(flight))
+        # Once done, the next call is made again
+        self.assertEqual({'data': [1, 2]}, flight.do(('key',), call))
+        self.assertEqual(2, len(calls))
+
+    def test_shared_error(self):
+        """Verify waiting threads get the one call's exception"""
+        flight = SingleFlight()
+        started = threading.Event()
+
+        def call():
+            """Fail once the other thread is waiting"""
+            started.set()
+            wait_for(lambda: flight.shared == 1)
+            raise ValueError('bad')
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            leader = executor.submit(flight.do, ('key',), call)
+            started.wait()
+            follower = executor.submit(flight.do, ('key',), call)
+            for future in (leader, follower):
+                with self.assertRaises(ValueError):
+                    future.result()
+        self.assertEqual(0, len(flight))
+
+    def test_deadline(self):
+        """Verify waiting threads stop at their deadline"""
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+
+        def call():
+            """Block until released"""
+            started.set()
+            release.wait(5)
+            return 1
+
+        test_base = Base(self.CERT, self.URLBASE, single_flight=flight)
+        # pylint: disable=protected-access
+        key = flight.make_key(test_base._url_format('slow'), {})
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            leader = executor.submit(flight.do, key, call)
+            started.wait(5)
+            tstart = time.monotonic()
+            with self.assertRaises(PyLmodDeadlineExceeded):
+                flight.do(key, call, deadline=tstart + 0.05)
+            with self.assertRaises(PyLmodDeadlineExceeded):
+                test_base.with_deadline(0.05).get('slow')
+            self.assertLess(time.monotonic() - tstart, 2)
+            release.set()
+            self.assertEqual(1, leader.result())
+        self.assertEqual(0, len(flight))
+
+    def test_distinct_keys(self):
+        """Verify different requests are not coalesced"""
+        flight = SingleFlight()
+        self.assertNotEqual(
+            flight.make_key('url', {'a': 1}), flight.make_key('url', {})
+        )
+        self.assertEqual(
+            flight.make_key('url', {'a': 1, 'b': 2}),
+            flight.make_key('url', {'b': 2, 'a': 1}),
+        )
+
+    def test_gradebook_get(self):
+        """Verify threads sharing a client make one request"""
+        flight = SingleFlight()
+        with LocalService() as service:
+            gradebook = GradeBook(
+                self.CERT, service.urlbase, single_flight=flight,
+                pool_maxsize=THREADS
+            )
+            get = gradebook._get  # pylint: disable=protected-access
+
+            def slow_get(url, params):
+                """Make the request once every other thread is waiting"""
+                wait_for(lambda: flight.shared == THREADS - 1)
+                return get(url, params)
+
+            gradebook._get = slow_get  # pylint: disable=protected-access
+            with ThreadPoolExecutor(max_workers=THREADS) as executor:
+                results = list(executor.map(
+                    lambda _: gradebook.get_students(gradebook_id=7),
+                    range(THREADS)
+                ))
+        self.assertEqual(1, len(service.requests))
+        self.assertEqual([7] * THREADS,
+                         [students[0]['studentId'] for students in results])
+
+    def test_async_get(self):
+        """Verify coroutines sharing a client make one request"""
+        service = MockService({
+            ('GET', '/service/gradebook/students/7'): {
+                'data': [{'studentId': 7}]
+            },
+            ('GET', '/service/gradebook/students/8'): {
+                'data': [{'studentId': 8}]
+            },
+        }, delay=0.01)
+        flight = AsyncSingleFlight()
+
+        async def exercise():
+            async with AsyncGradeBook(
+                    self.CERT, self.URLBASE, transport=service.transport(),
+                    single_flight=flight
+            ) as gradebook:
+                results = await asyncio.gather(*[
+                    gradebook.get_students(gradebook_id=gradebook_id)
+                    for gradebook_id in [7] * THREADS + [8]
+                ])
+                again = await gradebook.get_students(gradebook_id=7)
+            return results, again
+
+        results, again = asyncio.run(exercise())
+        self.assertEqual(3, len(service.requests))
+        self.assertEqual(THREADS - 1, flight.shared)
+        self.assertEqual(
+            [7] * THREADS + [8],
+            [students[0]['studentId'] for students in results]
+        )
+        self.assertEqual(7, again[0]['studentId'])
+        self.assertEqual(0, len(flight))
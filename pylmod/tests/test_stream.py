@@ -0,0 +1,74 @@
+"""
+Verify incremental parsing of JSON responses
+"""
+import json
+from unittest import TestCase
+
+from ddt import ddt, data
+
+from pylmod.exceptions import PyLmodUnexpectedData
+from pylmod.stream import iter_json_array
+
+
+def chunked(text, size):
+    """Split the UTF-8 encoding of text in chunks of size bytes"""
+    content = text.encode('utf-8')
+    return [content[x:x + size] for x in range(0, len(content), size)]
+
+
+@ddt
+class TestIterJsonArray(TestCase):
+    """Validate iter_json_array however the response is chunked"""
+
+    ITEMS = [
+        {'studentId': 1, 'displayName': u'Zoë Ünicode', 'grades': [1, 2.5]},
+        12345,
+        -0.5e3,
+        'text with "quotes" and ]}, brackets',
+        None,
+        True,
+        [],
+        {},
+    ]
+
+    @data(1, 2, 3, 7, 64, 65536)
+    def test_chunking(self, size):
+        """Verify every item is parsed whatever the chunk boundaries"""
+        body = json.dumps(
+            {'status': 1, 'message': u'ok ]', 'data': self.ITEMS,
+             'after': {'ignored': [1]}},
+            indent=1, ensure_ascii=False
+        )
+        self.assertEqual(
+            self.ITEMS, list(iter_json_array(chunked(body, size)))
+        )
+
+    def test_lazy(self):
+        """Verify items are yielded before the response is complete"""
+        def chunks():
+            """Stream two items, then fail"""
+            yield b'{"data": [1, {"a": 2}, '
+            raise AssertionError('read too far')
+
+        items = iter_json_array(chunks())
+        self.assertEqual(1, next(items))
+        self.assertEqual({'a': 2}, next(items))
+
+    def test_key(self):
+        """Verify another key and empty arrays"""
+        self.assertEqual([], list(iter_json_array([b'{"data": [ ]}'])))
+        self.assertEqual(
+            [1], list(iter_json_array([b'{"data": 0, "docs": [1]}'], 'docs'))
+        )
+
+    @data(b'{}', b'{"status": 1}', b'{"data": {"a": 1}}', b'{"data": null}')
+    def test_unexpected(self, body):
+        """Verify responses without the array raise"""
+        with self.assertRaises(PyLmodUnexpectedData):
+            list(iter_json_array([body]))
+
+    @data(b'', b'[1]', b'{"data": [1, 2', b'{"data": [1 2]}', b'not json')
+    def test_invalid(self, body):
+        """Verify invalid or truncated JSON raises ValueError"""
+        with self.assertRaises(ValueError):
+            list(iter_json_array([body]))
@@ -0,0 +1,63 @@
+"""
+Verify a client can be shared by many threads
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from pylmod import GradeBook
+from pylmod.tests.common import BaseTest, LocalService
+
+THREADS = 16
+CALLS = 25
+
+
+class TestThreads(BaseTest):
+    """Stress one shared GradeBook from many threads"""
+
+    def test_shared_gradebook(self):
+        """Verify every thread gets the answers for its own gradebook"""
+        with LocalService() as service:
+            shared = GradeBook(
+                self.CERT, service.urlbase, pool_maxsize=THREADS
+            )
+            shared.gradebook_id = 0
+
+            def worker(gradebook_id):
+                """Read students and post grades to one gradebook"""
+                gradebook = shared.for_gradebook(gradebook_id=gradebook_id)
+                mismatches = []
+                for call in range(CALLS):
+                    students = gradebook.get_students()
+                    if students[0]['studentId'] != gradebook_id:
+                        mismatches.append(students)
+                    grades = [{'studentId': gradebook_id}] * (call + 1)
+                    response = gradebook.multi_grade(grades)
+                    if response['data'] != {
+                            'gradebookId': gradebook_id, 'count': call + 1
+                    }:
+                        mismatches.append(response)
+                    # Passing the gradebook per call is thread-safe too
+                    students = shared.get_students(gradebook_id=gradebook_id)
+                    if students[0]['studentId'] != gradebook_id:
+                        mismatches.append(students)
+                return mismatches
+
+            with ThreadPoolExecutor(max_workers=THREADS) as executor:
+                results = list(executor.map(worker, range(1, THREADS + 1)))
+
+        self.assertEqual([[]] * THREADS, results)
+        self.assertEqual(THREADS * CALLS * 3, len(service.requests))
+        # The bound copies didn't change the shared default
+        self.assertEqual(0, shared.gradebook_id)
+
+    def test_for_gradebook(self):
+        """Verify bound copies share state with the original"""
+        gradebook = GradeBook(self.CERT, self.URLBASE)
+        self.assertIsNone(gradebook.gradebook_id)
+        bound = gradebook.for_gradebook(gradebook_id=1234)
+        self.assertEqual(1234, bound.gradebook_id)
+        self.assertIsNone(gradebook.gradebook_id)
+        # pylint: disable=protected-access
+        self.assertIs(gradebook._session, bound._session)
+        self.assertIs(gradebook._assignment_catalogs,
+                      bound._assignment_catalogs)
+        self.assertIs(gradebook.hooks, bound.hooks)
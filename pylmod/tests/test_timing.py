@@ -0,0 +1,143 @@
+"""
+Verify the details and timings given to request hooks
+"""
+import httpretty
+import mock
+import requests
+
+from pylmod import GradeBook, Membership
+from pylmod.cache import ConditionalCache, ResponseCache
+from pylmod.retry import RetryPolicy
+from pylmod.tests.common import BaseTest, LocalService
+from pylmod.timing import PHASES, collect
+
+
+class TestTiming(BaseTest):
+    """Verify before_request, request and cache hook events"""
+
+    def setUp(self):
+        patcher = mock.patch('pylmod.retry.time.sleep')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def record(client, *events):
+        """Record the events dispatched by a client"""
+        recorded = []
+        for event in events:
+            client.register_hook(event, recorded.append)
+        return recorded
+
+    def test_connection_timings(self):
+        """Verify new connections are timed by phase"""
+        with LocalService() as service:
+            gradebook = GradeBook(self.CERT, service.urlbase)
+            events = self.record(gradebook, 'before_request', 'request')
+            gradebook.get_students(gradebook_id=7)
+            gradebook.get_students(gradebook_id=7)
+        before, first, _, second = events
+        self.assertEqual('before_request', before['event'])
+        for event in (before, first):
+            self.assertEqual('students/{id}', event['endpoint'])
+            self.assertEqual('7', event['gradebook_id'])
+            self.assertEqual('GET', event['method'])
+            self.assertIsNone(event['cache'])
+        self.assertEqual(200, first['status'])
+        self.assertIsNone(first['error'])
+        self.assertEqual(set(PHASES), set(first['timings']))
+        for phase in ('dns', 'connect', 'ttfb', 'total'):
+            self.assertGreaterEqual(first['timings'][phase], 0)
+        # Not a TLS connection
+        self.assertIsNone(first['timings']['tls'])
+        self.assertLessEqual(first['timings']['ttfb'],
+                             first['timings']['total'])
+        # The connection was reused
+        self.assertIsNone(second['timings']['dns'])
+        self.assertIsNone(second['timings']['connect'])
+        self.assertGreaterEqual(second['timings']['ttfb'], 0)
+
+    def test_collect(self):
+        """Verify collectors nest and only collect what they wrap"""
+        with collect() as outer:
+            with collect() as inner:
+                self.assertIsNot(outer, inner)
+            self.assertEqual(dict((phase, None) for phase in PHASES), outer)
+
+    @httpretty.activate
+    def test_failed_request(self):
+        """Verify a failed request is reported with its error"""
+        httpretty.register_uri(
+            httpretty.GET, self.GRADEBOOK_REGISTER_BASE + 'students/7',
+            status=503, body='{}'
+        )
+        gradebook = GradeBook(
+            self.CERT, self.URLBASE, retry_policy=RetryPolicy(total=2)
+        )
+        events = self.record(gradebook, 'request')
+        self.assertEqual({}, gradebook.get('students/7'))
+        self.assertEqual(503, events[0]['status'])
+        self.assertEqual(2, events[0]['retries'])
+
+        gradebook.retry_policy = RetryPolicy(total=0)
+        httpretty.reset()
+        with mock.patch.object(
+                gradebook._session, 'get',  # pylint: disable=protected-access
+                side_effect=requests.ConnectionError('down')
+        ):
+            with self.assertRaises(requests.ConnectionError):
+                gradebook.get_students(gradebook_id=7)
+        self.assertIsNone(events[1]['status'])
+        self.assertIsInstance(events[1]['error'], requests.ConnectionError)
+        self.assertIsNone(events[1]['bytes_received'])
+
+    @httpretty.activate
+    def test_cache_events(self):
+        """Verify response cache hits and misses are reported"""
+        httpretty.register_uri(
+            httpretty.GET, self.GRADEBOOK_REGISTER_BASE + 'staff/7',
+            body='{"data": {}}', adding_headers={'ETag': '"v1"'}
+        )
+        gradebook = GradeBook(
+            self.CERT, self.URLBASE, response_cache=ResponseCache(),
+            conditional_cache=ConditionalCache()
+        )
+        events = self.record(gradebook, 'cache', 'request')
+        gradebook.get_staff(7)
+        gradebook.get_staff(7)
+        self.assertEqual(
+            [('cache', False), ('request', 'miss'), ('cache', True)],
+            [
+                (x['event'], x['hit'] if x['event'] == 'cache' else x['cache'])
+                for x in events
+            ]
+        )
+        self.assertEqual('staff/{id}', events[0]['endpoint'])
+        self.assertEqual('7', events[0]['gradebook_id'])
+
+        # A conditional request without the response cache
+        gradebook.response_cache = None
+        gradebook.get_staff(7)
+        self.assertEqual('revalidate', events[-1]['cache'])
+
+    def test_endpoints(self):
+        """Verify endpoint templates and gradebook ids of requests"""
+        # pylint: disable=protected-access
+        gradebook = GradeBook(self.CERT, self.URLBASE)
+        membership = Membership(self.CERT, self.URLBASE)
+        for client, service, endpoint, gradebook_id in [
+                (gradebook, 'gradebook/options/12', 'gradebook/options/{id}',
+                 '12'),
+                (gradebook, 'gradebook?uuid=x', 'gradebook', None),
+                (gradebook, 'multiGrades/12', 'multiGrades/{id}', '12'),
+                (gradebook, 'students/12/section/3',
+                 'students/{id}/section/{id}', '12'),
+                (gradebook, 'assignment/99', 'assignment/{id}', None),
+                (membership, 'group/5/member', 'group/{id}/member', None),
+        ]:
+            info = client._describe_request(
+                'GET', client._url_format(service)
+            )
+            self.assertEqual(
+                (endpoint, gradebook_id),
+                (info['endpoint'], info['gradebook_id'])
+            )
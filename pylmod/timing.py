@@ -0,0 +1,136 @@
+"""
+Timing of the phases of requests to the MIT Learning Modules Web service.
+"""
+import contextlib
+import logging
+import socket
+import threading
+import time
+
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+
+try:
+    from urllib3.exceptions import NameResolutionError
+except ImportError:  # urllib3 < 2
+    NameResolutionError = None
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+#: Phases timed, seconds. ``dns``, ``connect`` and ``tls`` are ``None``
+#: when the request reused a pooled connection.
+PHASES = ('dns', 'connect', 'tls', 'ttfb', 'total')
+
+# Timings of the request being made by each thread
+_local = threading.local()
+
+
+@contextlib.contextmanager
+def collect():
+    """Collect the timings of connections made by this thread.
+
+    .. code-block:: python
+
+        with collect() as timings:
+            session.get(url)
+        timings['connect']
+
+    Yields:
+        dict: timings by phase, filled in as connections are made
+    """
+    timings = dict((phase, None) for phase in PHASES)
+    previous = getattr(_local, 'timings', None)
+    _local.timings = timings
+    try:
+        yield timings
+    finally:
+        _local.timings = previous
+
+
+class TimedConnectionMixin(object):
+    """
+    Records the time taken to resolve, connect and negotiate TLS.
+
+    Connections are made by the thread making the request, so the
+    timings go to what that thread is collecting, if anything. The host
+    is resolved here rather than by urllib3 so that resolution is timed
+    apart from connecting; the addresses are then tried in turn.
+    """
+    # pylint: disable=too-few-public-methods
+
+    def _new_conn(self):
+        timings = getattr(_local, 'timings', None)
+        if timings is None:
+            return super(TimedConnectionMixin, self)._new_conn()
+        host = self._dns_host
+        tstart = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(
+                host, self.port, allowed_gai_family(), socket.SOCK_STREAM
+            )
+        except socket.gaierror as err:
+            timings['dns'] = time.perf_counter() - tstart
+            # Raise what urllib3 would
+            if NameResolutionError is not None:
+                raise NameResolutionError(self.host, self, err) from err
+            raise NewConnectionError(
+                self, 'Failed to establish a new connection: {0}'.format(err)
+            ) from err
+        resolved = time.perf_counter()
+        timings['dns'] = resolved - tstart
+        ips = []
+        for address in addresses:
+            if address[4][0] not in ips:
+                ips.append(address[4][0])
+        if not ips:
+            return super(TimedConnectionMixin, self)._new_conn()
+        for number, ip_address in enumerate(ips, 1):
+            self._dns_host = ip_address
+            try:
+                sock = super(TimedConnectionMixin, self)._new_conn()
+                break
+            except Exception:  # pylint: disable=broad-except
+                if number == len(ips):
+                    raise
+                log.debug('Connecting to %s at %s failed, trying the next '
+                          'address', host, ip_address)
+            finally:
+                self._dns_host = host
+        timings['connect'] = time.perf_counter() - resolved
+        return sock
+
+    def connect(self):
+        tstart = time.perf_counter()
+        super(TimedConnectionMixin, self).connect()
+        timings = getattr(_local, 'timings', None)
+        if timings is not None and isinstance(self, HTTPSConnection):
+            timings['tls'] = max(0.0, time.perf_counter() - tstart - (
+                (timings['dns'] or 0) + (timings['connect'] or 0)
+            ))
+
+
+class TimedHTTPConnection(TimedConnectionMixin, HTTPConnection):
+    """HTTPConnection recording its timings"""
+
+
+class TimedHTTPSConnection(TimedConnectionMixin, HTTPSConnection):
+    """HTTPSConnection recording its timings"""
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    """HTTPConnectionPool of timed connections"""
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    """HTTPSConnectionPool of timed connections"""
+    ConnectionCls = TimedHTTPSConnection
+
+
+#: Pool classes for ``urllib3.PoolManager.pool_classes_by_scheme``
+POOL_CLASSES_BY_SCHEME = {
+    'http': TimedHTTPConnectionPool,
+    'https': TimedHTTPSConnectionPool,
+}
@@ -71,7 +71,17 @@ setup(
             'httpretty~=0.9.0',
             'semantic_version~=2.0',
             'mock~=3.0',
-            'ddt~=1.0'
+            'ddt~=1.0',
+            'httpx~=0.18'
+        ],
+        'async': [
+            'httpx~=0.18'
+        ],
+        'fast': [
+            'orjson~=3.0'
+        ],
+        'numpy': [
+            'numpy>=1.16'
         ],
         'doc': [
             'sphinx~=2.0',